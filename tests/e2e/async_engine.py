@@ -0,0 +1,621 @@
+"""
+Asyncio execution engine for the Tier 2 checks.
+
+A pytest worker drives one page at a time and spends most of every item
+waiting on the browser. An async worker runs one event loop over one
+browser (the shared browser server of its slot, or a local launch) and
+keeps ASYNC_PAGES checks in flight at once, each on its own page.
+ASYNC_NAVIGATIONS bounds concurrent page loads so scenario_ready_ms still
+measures the app rather than contention on the worker.
+
+Every check of tier2_basic.py has a coroutine twin in TIER2_CHECKS with
+the same page setup and the same assertions, and navigation twins
+fixtures.py the way utils/async_waits.py twins utils/waits.py; selectors
+and scripts are shared, and meta_tests.py keeps the twins in step:
+
+- session      no page; reads the scenario session (load time)
+- interactive  the scenario's shared page at the interactive turn
+- completed    the shared page advanced to the end
+- fresh        an isolated page at the interactive turn (mutating checks)
+
+Like ScenarioSession in fixtures.py, each scenario is navigated once and
+its shared page is reused; checks on it take turns. Results are written
+as the usual NDJSON records and reported over the WorkerPool protocol,
+so retries, the flake ledger and the reports treat both engines alike.
+Tier 1 and the restaurant suite stay on the pytest workers.
+"""
+
+import asyncio
+import os
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+from urllib.parse import urlparse
+import sys
+sys.path.insert(0, str(Path(__file__).parent))
+from config import (
+    BASE_URL, BROWSER, HEADLESS, SLOW_MO, VIEWPORT, AGENT_ID, PROJECT_ROOT,
+    TIMEOUT_LOAD, TIMEOUT_ELEMENT, NETWORK_CACHE, COLLECT_WEB_VITALS,
+    BROWSER_SERVER_CONNECT_TIMEOUT_MS, ASYNC_PAGES, ASYNC_NAVIGATIONS, PERF_LOAD_SAMPLES
+)
+from scheduler import make_work_item
+from worker import WORKER_LOGS_DIR, redirect_output
+from utils.async_waits import (
+    reveal_blank, click_next_turn, wait_for_popover_hidden, wait_for_page_idle, wait_for_dialogue,
+)
+from utils.browser_server import endpoint_for
+from utils.selectors import Selectors
+from utils.waits import ONBOARDING_SKIP, NEXT_TURN_BUTTON
+from utils.result_stream import ResultStream, new_record, item_status, MAX_MESSAGE_CHARS
+from utils.screenshots import capture_failure_screenshot_async
+
+
+TIER2_CHECKS = {}  # test name in tier2_basic.py -> (page kind, coroutine)
+PAGE_KINDS = ("session", "interactive", "completed", "fresh")
+
+
+class CheckSkipped(Exception):
+    """Raised by a check that does not apply (pytest.skip in the sync suite)."""
+
+
+class CheckFailed(Exception):
+    """A check's own code raised: a failed check rather than an engine error."""
+
+
+def tier2_check(page_kind: str):
+    """Register a coroutine as the async twin of a Tier 2 test."""
+
+    if page_kind not in PAGE_KINDS:
+        raise ValueError(f"Unknown page kind {page_kind!r}")
+
+    def register(check):
+        TIER2_CHECKS[check.__name__] = (page_kind, check)
+        return check
+
+    return register
+
+
+async def navigate_to_scenario(page, scenario_id: str, base_url: str = BASE_URL):
+    """Async fixtures.navigate_to_scenario: deep-link and reach the interactive turn."""
+
+    url = f"{base_url}/scenario/{scenario_id}"
+    await page.goto(url, wait_until='load', timeout=TIMEOUT_LOAD)
+    await page.wait_for_selector(f'{ONBOARDING_SKIP}, {NEXT_TURN_BUTTON}', timeout=TIMEOUT_LOAD)
+
+    skip_btns = await page.locator(ONBOARDING_SKIP).all()
+    if len(skip_btns) > 0:
+        await skip_btns[-1].click()
+        await wait_for_dialogue(page)
+
+    if await page.locator(NEXT_TURN_BUTTON).is_visible():
+        await click_next_turn(page)
+
+    await page.wait_for_selector(Selectors.BLANK_UNREVEALED, timeout=TIMEOUT_LOAD)
+    return page
+
+
+async def advance_to_end(page, max_turns: int = 50):
+    """Async fixtures.advance_to_end: click Next Turn until the scenario ends."""
+
+    for _ in range(max_turns):
+        if not await page.locator(NEXT_TURN_BUTTON).is_visible():
+            break
+        await click_next_turn(page)
+    return page
+
+
+class AsyncScenarioSession:
+    """One navigation per scenario, shared by its checks (see fixtures.ScenarioSession)."""
+
+    STAGES = ("interactive", "completed")
+
+    def __init__(self, engine: "AsyncEngine", scenario_id: str):
+        """Initialize session; open() navigates."""
+        self.engine = engine
+        self.scenario_id = scenario_id
+        self.lock = asyncio.Lock()  # Checks on the shared page take turns
+        self.navigations = 0
+        self.context = None
+        self.page = None
+        self.stage = None
+        self.load_time_ms = None
+        self.metrics = {}
+        self._metrics_attached = False
+
+    async def open(self) -> "AsyncScenarioSession":
+        """Navigate once to the scenario's interactive turn and collect load metrics."""
+
+        from utils.metrics import collect_page_metrics_async
+
+        self.context, self.page = await self.engine.new_page()
+        samples = []
+        try:
+            self.load_time_ms = await self._navigate()
+            if COLLECT_WEB_VITALS:
+                self.metrics = {
+                    **await collect_page_metrics_async(self.page),
+                    "scenario_ready_ms": round(self.load_time_ms, 1),
+                }
+                # Perf mode only: more cold loads as regression gate samples
+                for _ in range(PERF_LOAD_SAMPLES - 1):
+                    samples.append(await self._sample_cold_load())
+        except Exception:
+            await self.close()
+            raise
+        if self.metrics:
+            self.engine.report.add_scenario_metrics(self.scenario_id, self.metrics)
+        for metrics in samples:
+            self.engine.report.add_metric_samples(self.scenario_id, metrics)
+        return self
+
+    async def _sample_cold_load(self) -> Dict:
+        """Load the scenario in a fresh context (cold like the first load); returns its metrics."""
+
+        from utils.metrics import collect_page_metrics_async
+
+        context, page = await self.engine.new_page()
+        try:
+            load_time_ms = await self.engine.navigate(page, self.scenario_id)
+            return {
+                **await collect_page_metrics_async(page),
+                "scenario_ready_ms": round(load_time_ms, 1),
+            }
+        finally:
+            await context.close()
+
+    async def _navigate(self) -> float:
+        elapsed_ms = await self.engine.navigate(self.page, self.scenario_id)
+        self.navigations += 1
+        self.stage = "interactive"
+        return elapsed_ms
+
+    def attach_metrics(self, record: Dict) -> None:
+        """Attach the load metrics to the first shared-page check's record."""
+
+        if self.metrics and not self._metrics_attached:
+            record["properties"]["metrics"] = self.metrics
+            self._metrics_attached = True
+
+    async def page_at(self, stage: str):
+        """Return the shared page, advanced (or reloaded) to a stage."""
+
+        if self.STAGES.index(stage) < self.STAGES.index(self.stage):
+            await self._navigate()  # Stages only move forward; going back needs a reload
+
+        if stage == "completed" and self.stage != "completed":
+            await advance_to_end(self.page)
+            self.stage = "completed"
+
+        return self.page
+
+    async def fresh_page(self):
+        """Open an isolated page at the interactive turn for a mutating check."""
+
+        context, page = await self.engine.new_page()
+        try:
+            await self.engine.navigate(page, self.scenario_id)
+        except Exception:
+            await context.close()
+            raise
+        self.navigations += 1
+        return context, page
+
+    async def close(self) -> None:
+        """Close the shared context."""
+
+        try:
+            await self.context.close()
+        except Exception:
+            pass  # Browser already gone
+
+
+class AsyncEngine:
+    """One browser and many concurrent checks in one event loop."""
+
+    def __init__(self, base_url: str = BASE_URL, navigations: int = ASYNC_NAVIGATIONS,
+                 max_sessions: int = ASYNC_PAGES or 1):
+        """Initialize engine; start() connects the browser."""
+        from utils.reporters import TestReport
+
+        self.base_url = base_url
+        self.max_sessions = max_sessions  # Scenarios kept open between their checks
+        self.report = TestReport(AGENT_ID)
+        self.stream = ResultStream()
+        self.contexts_created = 0
+        self.storage_state = None
+        self.network_cache = None
+        self._navigations = asyncio.Semaphore(navigations)
+        self._sessions = OrderedDict()  # scenario id -> task opening its session
+        self._users = {}  # scenario id -> checks currently using its session
+        self._playwright = None
+        self._browser = None
+        self._endpoint = None
+        self._replaced = []  # Connections to replaced browser servers, closed at the end
+        self._reported_contexts = 0
+
+    async def start(self) -> "AsyncEngine":
+        """Connect to the shared browser server (or launch) and record the storage state."""
+
+        from playwright.async_api import async_playwright
+        from utils.network_cache import NetworkCache
+        from utils.storage_state import record_onboarding_storage_state_async
+
+        self._playwright = await async_playwright().start()
+        browser = await self._connect()
+        self.storage_state = await record_onboarding_storage_state_async(browser, self.base_url)
+        if NETWORK_CACHE:
+            self.network_cache = NetworkCache(urlparse(self.base_url).hostname)
+        return self
+
+    async def _connect(self):
+        """The current browser; follows the registry when a server is replaced."""
+
+        endpoint = endpoint_for(AGENT_ID)
+        if self._browser is not None and self._browser.is_connected() and endpoint == self._endpoint:
+            return self._browser
+        if self._browser is not None:
+            # Checks still running on the old server finish there
+            self._replaced.append(self._browser)
+
+        browser_type = getattr(self._playwright, BROWSER)
+        self._browser = None
+        self._endpoint = endpoint
+        if endpoint:
+            try:
+                self._browser = await browser_type.connect(
+                    endpoint, slow_mo=SLOW_MO, timeout=BROWSER_SERVER_CONNECT_TIMEOUT_MS
+                )
+            except Exception as e:
+                print(f"AsyncEngine: cannot reach {endpoint} ({e}); launching locally")
+                self._endpoint = None
+        if self._browser is None:
+            self._browser = await browser_type.launch(headless=HEADLESS, slow_mo=SLOW_MO)
+        return self._browser
+
+    async def new_page(self):
+        """A fresh isolated context (past onboarding) and its page."""
+
+        from utils.console import attach_console_capture
+        from utils.metrics import install_web_vitals_async
+
+        browser = await self._connect()
+        context = await browser.new_context(viewport=VIEWPORT, storage_state=self.storage_state)
+        context.set_default_timeout(TIMEOUT_ELEMENT)
+        context.set_default_navigation_timeout(TIMEOUT_LOAD)
+        if self.network_cache is not None:
+            await self.network_cache.install_async(context)
+        if COLLECT_WEB_VITALS:
+            await install_web_vitals_async(context)
+        self.contexts_created += 1
+        return context, attach_console_capture(await context.new_page())
+
+    async def navigate(self, page, scenario_id: str) -> float:
+        """Load a scenario (bounded by ASYNC_NAVIGATIONS); returns the load time in ms."""
+
+        async with self._navigations:
+            start = time.time()
+            await navigate_to_scenario(page, scenario_id, self.base_url)
+            return (time.time() - start) * 1000
+
+    async def session(self, scenario_id: str) -> AsyncScenarioSession:
+        """The scenario's session, opened by whichever check needs it first."""
+
+        task = self._sessions.get(scenario_id)
+        if task is None:
+            task = self._sessions[scenario_id] = asyncio.ensure_future(
+                AsyncScenarioSession(self, scenario_id).open()
+            )
+            await self._evict()
+        self._sessions.move_to_end(scenario_id)
+        try:
+            return await task
+        except Exception:
+            # Checks waiting on it error out together; a retry navigates afresh
+            if self._sessions.get(scenario_id) is task:
+                del self._sessions[scenario_id]
+            raise
+
+    async def _evict(self) -> None:
+        """Close least recently used sessions no check is using."""
+
+        for scenario_id, task in list(self._sessions.items()):
+            if len(self._sessions) <= self.max_sessions:
+                return
+            if task.done() and not self._users.get(scenario_id):
+                del self._sessions[scenario_id]
+                if not task.cancelled() and task.exception() is None:
+                    await task.result().close()
+
+    async def _run(self, scenario_id: str, page_kind: str, check, record: Dict) -> None:
+        self._users[scenario_id] = self._users.get(scenario_id, 0) + 1
+        try:
+            session = await self.session(scenario_id)
+            if page_kind == "fresh":
+                context, page = await session.fresh_page()
+                try:
+                    await _call(check, session, page, record)
+                finally:
+                    await context.close()
+            elif page_kind == "session":
+                await _call(check, session, None, record)
+            else:
+                async with session.lock:
+                    page = await session.page_at(page_kind)
+                    session.attach_metrics(record)
+                    await _call(check, session, page, record)
+        finally:
+            self._users[scenario_id] -= 1
+
+    async def run_check(self, nodeid: str) -> Dict:
+        """Run one Tier 2 work item; returns (and writes) its result record."""
+
+        record = new_record(nodeid, self.stream.run_id)
+        item = make_work_item(nodeid)
+        start = time.time()
+        try:
+            if item["check"] not in TIER2_CHECKS:
+                raise LookupError(f"{item['check']} has no async implementation")
+            await self._run(item["scenario_id"], *TIER2_CHECKS[item["check"]], record)
+        except CheckSkipped:
+            record["outcome"] = "skipped"
+        except CheckFailed as e:
+            # Failures inside the check fail it; anything in setup is an error (as in pytest)
+            record.update(outcome="failed", message=_message(e.__cause__))
+        except Exception as e:
+            record.update(outcome="error", message=_message(e))
+
+        duration = round(time.time() - start, 3)
+        record["durations"]["call"] = duration
+        record["duration"] = duration
+        self.stream.write(record)
+        return record
+
+    def take_contexts(self) -> int:
+        """Contexts opened since the last call (for browser server recycling)."""
+
+        opened = self.contexts_created - self._reported_contexts
+        self._reported_contexts = self.contexts_created
+        return opened
+
+    async def close(self) -> None:
+        """Close sessions and browsers; save the agent report."""
+
+        for task in self._sessions.values():
+            if task.done() and not task.cancelled() and task.exception() is None:
+                await task.result().close()
+        self._sessions.clear()
+        for browser in self._replaced + [self._browser]:
+            try:
+                if browser is not None:
+                    await browser.close()
+            except Exception:
+                pass
+        if self._playwright is not None:
+            await self._playwright.stop()
+        self.stream.close()
+        if self.report.metrics:
+            self.report.save_json()
+
+
+async def _call(check, session, page, record: Dict) -> None:
+    try:
+        await check(session, page)
+    except CheckSkipped:
+        raise
+    except Exception as e:
+        if page is not None:
+            await _attach_failure_screenshot(page, record)
+        raise CheckFailed() from e
+
+
+async def _attach_failure_screenshot(page, record: Dict) -> None:
+    """Screenshot a failed check's page; its path goes to the result record."""
+
+    try:
+        shot = await capture_failure_screenshot_async(page, record["check"], record["scenario_id"])
+        # The background write may still be running: wait for it off the event loop
+        path = await asyncio.get_running_loop().run_in_executor(None, shot.path)
+        record["properties"]["screenshot"] = path
+    except Exception as e:
+        print(f"Failure screenshot of {record['nodeid']} not taken: {e}")
+
+
+def _message(error: BaseException) -> str:
+    text = "".join(traceback.format_exception(type(error), error, error.__traceback__))
+    return text[-MAX_MESSAGE_CHARS:]
+
+
+# Tier 2 checks (tests/e2e/scenarios/tier2_basic.py), one coroutine each
+
+@tier2_check("session")
+async def test_page_loads(session, page):
+    """Check 1: Page loads successfully."""
+    load_time = session.load_time_ms
+    assert load_time < 5000, f"Load time {load_time}ms exceeds 5000ms"
+
+
+@tier2_check("interactive")
+async def test_no_console_errors(session, page):
+    """Check 2: No console errors on load."""
+    await wait_for_page_idle(page)
+    assert len(page.console_errors) == 0, f"Console errors: {page.console_errors}"
+
+
+@tier2_check("interactive")
+async def test_title_correct(session, page):
+    """Check 3: Page title is correct."""
+    assert await page.title() == "FluentStep: IELTS Roleplay Engine"
+
+
+@tier2_check("interactive")
+async def test_dialogue_renders(session, page):
+    """Check 4: Dialogue renders without errors."""
+    next_btn = page.locator('button:has-text("Next Turn")')
+    assert await next_btn.count() > 0, "Dialogue not found"
+
+
+@tier2_check("interactive")
+async def test_blanks_visible(session, page):
+    """Check 5: At least one blank is visible."""
+    blanks = await page.locator('button:has-text("Tap to discover")').all()
+    assert len(blanks) > 0, "No blanks found"
+
+
+@tier2_check("fresh")
+async def test_reveal_blank(session, page):
+    """Check 6: Revealing a blank shows alternatives."""
+    await reveal_blank(page)
+
+    popover = page.locator('text=Native Alternatives')
+    assert await popover.is_visible(), "Popover not visible after reveal"
+
+
+@tier2_check("fresh")
+async def test_popover_has_options(session, page):
+    """Check 7: Popover shows multiple alternatives."""
+    await reveal_blank(page)
+
+    options = page.locator('text=Other ways to say')
+    assert await options.count() > 0, "No alternatives shown"
+
+
+@tier2_check("fresh")
+async def test_close_popover(session, page):
+    """Check 8: Closing popover works."""
+    await reveal_blank(page)
+
+    close_btn = page.locator('button:has(i.fa-times)').first
+    await close_btn.click()
+    await wait_for_popover_hidden(page)
+
+    popover = page.locator('text=Native Alternatives')
+    if await close_btn.count() > 0:
+        assert not await popover.is_visible(), "Popover not closed"
+
+
+@tier2_check("fresh")
+async def test_continue_button_works(session, page):
+    """Check 9: Continue button advances dialogue."""
+    next_turn_btn = page.locator('button:has-text("Next Turn")')
+    assert await next_turn_btn.is_visible(), "Next Turn button not visible"
+
+    await click_next_turn(page)
+
+    # Button should either still be visible or we're at the end
+    completion = page.locator('text=Return to Library')
+    if await completion.count() > 0:
+        assert await completion.is_visible(), "Completion modal not visible"
+
+
+@tier2_check("fresh")
+async def test_reveal_second_blank(session, page):
+    """Check 10: Can reveal multiple blanks independently."""
+    blanks = await page.locator('button:has-text("Tap to discover")').all()
+    if len(blanks) < 2:
+        raise CheckSkipped(f"Scenario has only {len(blanks)} blank(s)")
+
+    await reveal_blank(page, blanks[0])
+
+    close_btn = page.locator('button:has(i.fa-times)').first
+    await close_btn.click()
+    await wait_for_popover_hidden(page)
+
+    await reveal_blank(page, blanks[1])
+
+    popover = page.locator('text=Native Alternatives')
+    assert await popover.is_visible(), "Second blank not revealed"
+
+
+@tier2_check("completed")
+async def test_navigate_to_end(session, page):
+    """Check 11: Can navigate to end of scenario."""
+    next_turn_btn = page.locator('button:has-text("Next Turn")')
+    assert not await next_turn_btn.is_visible(), "Still mid-scenario after 50 turns"
+
+
+@tier2_check("completed")
+async def test_completion_modal_appears(session, page):
+    """Check 12: Completion modal appears at end."""
+    completion = page.locator('text=Return to Library')
+    assert await completion.is_visible(), "Completion modal not visible"
+
+
+@tier2_check("completed")
+async def test_return_to_library_works(session, page):
+    """Check 13: Return to Library button works."""
+    return_btn = page.locator('button:has-text("Return to Library")')
+    assert await return_btn.is_visible(), "Return to Library button not visible"
+
+
+@tier2_check("completed")
+async def test_progress_saved(session, page):
+    """Check 14: Scenario progress is saved."""
+    final_value = await page.evaluate('localStorage.getItem("fluentstep:progress")')
+    assert final_value is not None, "Progress not saved to localStorage"
+
+
+@tier2_check("completed")
+async def test_no_final_errors(session, page):
+    """Check 15: No console errors during full scenario."""
+    assert len(page.console_errors) == 0, f"Errors occurred: {page.console_errors}"
+
+
+async def _serve(worker_id: int, control, results, engine: AsyncEngine, pages: int) -> None:
+    """Keep `pages` checks in flight: each slot asks for an item when it is free."""
+
+    loop = asyncio.get_running_loop()
+    # control.get() blocks; one thread per slot keeps the event loop free
+    executor = ThreadPoolExecutor(max_workers=pages)
+
+    def send(kind: str, payload=None) -> None:
+        results.put((kind, worker_id, payload))
+
+    async def slot() -> None:
+        while True:
+            send("ready")
+            nodeid = await loop.run_in_executor(executor, control.get)
+            if nodeid is None:
+                control.put(None)  # One shutdown signal is sent per worker; pass it on
+                return
+            send("started", nodeid)
+            record = await engine.run_check(nodeid)
+            send("result", {
+                "nodeid": nodeid,
+                "status": item_status([record]),
+                "duration_seconds": record["duration"],
+                "tests": [record],
+                "error": record["message"],
+                "browser_contexts": engine.take_contexts(),
+            })
+
+    try:
+        await asyncio.gather(*(slot() for _ in range(pages)))
+    finally:
+        executor.shutdown(wait=False)
+
+
+async def _main(worker_id: int, control, results, pages: int) -> None:
+    engine = AsyncEngine()
+    # No "ready" before the browser is up: the pool treats that as a failed start
+    await engine.start()
+    try:
+        await _serve(worker_id, control, results, engine, pages)
+    finally:
+        await engine.close()
+
+
+def async_worker_main(worker_id: int, test_files: List[str], control, results,
+                      logs_dir: Path = WORKER_LOGS_DIR, pages: int = ASYNC_PAGES) -> None:
+    """Worker process entry point for WorkerPool(worker_target=...).
+
+    test_files is accepted for the WorkerPool signature; the checks are
+    the ones registered in TIER2_CHECKS.
+    """
+
+    log = redirect_output(worker_id, logs_dir)
+    os.chdir(PROJECT_ROOT)
+    asyncio.run(_main(worker_id, control, results, max(1, pages)))
+    log.flush()
@@ -0,0 +1,213 @@
+"""
+Resource-aware worker autoscaling for E2E runs.
+
+The orchestrator starts with as many workers as the cores and free memory
+allow, assuming AUTOSCALE_DEFAULT_WORKER_RSS_MB per worker. Once workers
+have run an item, their real footprint replaces the estimate: pytest and
+the Playwright driver (each worker's process tree), plus Chromium. A
+worker's browser lives in its own tree unless the orchestrator runs
+shared browser servers (utils/browser_server.py); then each warm worker
+is charged an equal share of the servers' process trees.
+Every AUTOSCALE_INTERVAL_S the target is re-planned: workers are added
+while cores and memory allow, and shed when free memory runs below the
+reserve or the load average per core crosses the threshold. Every decision
+and its reason is kept for the report.
+"""
+
+import os
+import statistics
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import sys
+sys.path.insert(0, str(Path(__file__).parent))
+from config import (
+    NUM_AGENTS, AUTOSCALE_MIN_WORKERS, AUTOSCALE_MAX_WORKERS, AUTOSCALE_CPUS_PER_WORKER,
+    AUTOSCALE_DEFAULT_WORKER_RSS_MB, AUTOSCALE_MEM_RESERVE_MB,
+    AUTOSCALE_MAX_LOAD_PER_CPU, AUTOSCALE_INTERVAL_S
+)
+
+
+def _meminfo() -> Dict[str, float]:
+    """/proc/meminfo in MB (empty where unavailable)."""
+
+    info = {}
+    try:
+        with open("/proc/meminfo", 'r') as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                info[name] = int(value.split()[0]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return info
+
+
+def probe_resources() -> Dict:
+    """Usable cores, total/available memory (MB) and 1-minute load average."""
+
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        load = os.getloadavg()[0]
+    except OSError:
+        load = None
+
+    mem = _meminfo()
+    return {
+        "cpus": cpus,
+        "mem_total_mb": round(mem["MemTotal"]) if "MemTotal" in mem else None,
+        "mem_available_mb": round(mem["MemAvailable"]) if "MemAvailable" in mem else None,
+        "load_1m": round(load, 2) if load is not None else None,
+    }
+
+
+def process_tree_rss_mb(pid: int) -> Optional[float]:
+    """Resident memory of a process and all its descendants (MB)."""
+
+    children = {}
+    rss_pages = {}
+    for entry in os.listdir("/proc") if os.path.isdir("/proc") else []:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", 'r') as f:
+                # Fields after the parenthesised command name
+                fields = f.read().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue  # Exited while we were looking
+        children.setdefault(int(fields[1]), []).append(int(entry))
+        rss_pages[int(entry)] = int(fields[21])
+
+    if pid not in rss_pages:
+        return None
+    total, stack = 0, [pid]
+    while stack:
+        current = stack.pop()
+        total += rss_pages.get(current, 0)
+        stack.extend(children.get(current, []))
+    return total * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def plan_workers(
+    resources: Dict,
+    worker_rss_mb: float,
+    current: int = 0,
+    remaining_items: Optional[int] = None,
+) -> Tuple[int, str]:
+    """Worker count the machine can sustain, with the reasoning."""
+
+    by_cpu = max(1, int(resources["cpus"] / AUTOSCALE_CPUS_PER_WORKER))
+    reasons = [f"{resources['cpus']} cores → {by_cpu}"]
+    target = by_cpu
+
+    if resources.get("mem_available_mb") is not None:
+        # Running workers are already counted against available memory
+        spare = resources["mem_available_mb"] - AUTOSCALE_MEM_RESERVE_MB
+        by_mem = current + int(spare // worker_rss_mb)
+        reasons.append(
+            f"{resources['mem_available_mb']}MB free, {worker_rss_mb:.0f}MB per worker → {by_mem}"
+        )
+        target = min(target, by_mem)
+
+    load = resources.get("load_1m")
+    if current and load is not None and load / resources["cpus"] > AUTOSCALE_MAX_LOAD_PER_CPU:
+        reasons.append(f"load {load / resources['cpus']:.1f}/core → shed one")
+        target = min(target, current - 1)
+
+    if remaining_items is not None and remaining_items < target:
+        reasons.append(f"{remaining_items} items left")
+        target = remaining_items
+
+    target = max(AUTOSCALE_MIN_WORKERS, min(AUTOSCALE_MAX_WORKERS, target))
+    return target, "; ".join(reasons)
+
+
+class Autoscaler:
+    """Chooses and adjusts the worker count of a WorkerPool."""
+
+    def __init__(self, fixed: Optional[int] = NUM_AGENTS, interval_s: float = AUTOSCALE_INTERVAL_S,
+                 fleet=None):
+        """Initialize; a fixed count (E2E_WORKERS) disables scaling.
+
+        ``fleet`` is the run's BrowserServerFleet, if workers share browsers.
+        """
+        self.fixed = fixed
+        self.interval_s = interval_s
+        self.fleet = fleet
+        self.worker_rss_mb = []  # Measured per-worker footprints
+        self.decisions = []
+        self._last_check = 0.0
+
+    def _record(self, workers: int, reason: str, resources: Dict) -> int:
+        self.decisions.append({
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "workers": workers,
+            "reason": reason,
+            "resources": resources,
+            "worker_rss_mb": self.rss_estimate(),
+        })
+        return workers
+
+    def shared_browser_rss_mb(self) -> float:
+        """RSS of the shared browser servers (driver + browser trees), MB."""
+
+        if self.fleet is None:
+            return 0.0
+        return sum(process_tree_rss_mb(pid) or 0.0 for pid in self.fleet.pids())
+
+    def rss_estimate(self) -> float:
+        """Per-worker RSS used for planning (measured once available)."""
+
+        if not self.worker_rss_mb:
+            return AUTOSCALE_DEFAULT_WORKER_RSS_MB
+        return statistics.median(self.worker_rss_mb[-20:])
+
+    def initial(self, num_items: int) -> int:
+        """Worker count to start with."""
+
+        resources = probe_resources()
+        if self.fixed:
+            return self._record(min(self.fixed, num_items), "fixed by E2E_WORKERS", resources)
+        workers, reason = plan_workers(
+            resources, AUTOSCALE_DEFAULT_WORKER_RSS_MB, remaining_items=num_items
+        )
+        self._last_check = time.time()
+        return self._record(workers, f"warm-up estimate: {reason}", resources)
+
+    def adjust(self, pool, remaining_items: int) -> Optional[int]:
+        """New target for a running pool, or None to keep the current one."""
+
+        if self.fixed or time.time() - self._last_check < self.interval_s:
+            return None
+        self._last_check = time.time()
+
+        # Only workers that have run something have a browser to measure
+        pids = pool.warm_worker_pids()
+        browser_share = self.shared_browser_rss_mb() / len(pids) if pids else 0.0
+        for pid in pids:
+            rss = process_tree_rss_mb(pid)
+            if rss:
+                self.worker_rss_mb.append(round(rss + browser_share, 1))
+
+        current = pool.target
+        resources = probe_resources()
+        workers, reason = plan_workers(
+            resources, self.rss_estimate(), current, remaining_items + pool.busy_workers()
+        )
+        if workers == current:
+            return None
+        return self._record(workers, reason, resources)
+
+    def summary(self) -> Dict:
+        """Chosen parallelism and its reasoning, for the report."""
+
+        return {
+            "mode": "fixed" if self.fixed else "auto",
+            "initial_workers": self.decisions[0]["workers"] if self.decisions else None,
+            "peak_workers": max((d["workers"] for d in self.decisions), default=None),
+            "measured_worker_rss_mb": self.rss_estimate() if self.worker_rss_mb else None,
+            "decisions": self.decisions,
+        }
@@ -0,0 +1,79 @@
+"""
+Scenario catalogue for E2E suites.
+
+Reads the scenario index straight from src/services/staticData.ts (the
+CURATED_ROLEPLAYS array is JSON apart from trailing commas), so suites
+are parametrised from the app's own data: a scenario added there is
+tested without editing any test file.
+"""
+
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Tuple
+import sys
+sys.path.insert(0, str(Path(__file__).parent))
+from config import STATIC_DATA_FILE, TIER1_SCENARIOS
+
+_ARRAY_START = re.compile(r"export const CURATED_ROLEPLAYS\b[^=]*=\s*\[")
+_TRAILING_COMMA = re.compile(r",(\s*[\]}])")
+
+
+@lru_cache(maxsize=None)
+def _parse(path: Path) -> Tuple[List[Dict], str]:
+    """Split staticData.ts into the scenario array and the rest of the file."""
+
+    source = _TRAILING_COMMA.sub(r"\1", Path(path).read_text(encoding='utf-8'))
+    match = _ARRAY_START.search(source)
+    if match is None:
+        raise ValueError(f"CURATED_ROLEPLAYS not found in {path}")
+
+    # raw_decode stops at the array's closing bracket
+    start = match.end() - 1
+    try:
+        scenarios, end = json.JSONDecoder().raw_decode(source, start)
+    except ValueError as e:
+        raise ValueError(f"Could not parse CURATED_ROLEPLAYS in {path}: {e}") from e
+
+    return scenarios, source[:start] + source[end:]
+
+
+def load_scenarios(path: Path = STATIC_DATA_FILE) -> List[Dict]:
+    """Full scenario objects, in source order."""
+
+    return _parse(Path(path))[0]
+
+
+def static_data_remainder(path: Path = STATIC_DATA_FILE) -> str:
+    """staticData.ts without the scenario array (types, helpers, other exports)."""
+
+    return _parse(Path(path))[1]
+
+
+def load_catalogue(path: Path = STATIC_DATA_FILE) -> List[Dict]:
+    """Summaries of every curated scenario, in source order."""
+
+    return [
+        {
+            "id": scenario["id"],
+            "category": scenario.get("category"),
+            "topic": scenario.get("topic"),
+            "turns": len(scenario.get("dialogue", [])),
+            "blanks": len(scenario.get("answerVariations", [])),
+            "has_chunk_feedback": bool(scenario.get("chunkFeedback")),
+        }
+        for scenario in load_scenarios(path)
+    ]
+
+
+def scenario_ids(path: Path = STATIC_DATA_FILE) -> List[str]:
+    """Every scenario id in the catalogue."""
+
+    return [scenario["id"] for scenario in load_catalogue(path)]
+
+
+def tier2_scenario_ids(path: Path = STATIC_DATA_FILE) -> List[str]:
+    """Scenarios covered by the basic tier 2 checks (all but tier 1)."""
+
+    return [sid for sid in scenario_ids(path) if sid not in TIER1_SCENARIOS]
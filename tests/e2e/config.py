@@ -6,43 +6,271 @@ Defines base URLs, timeouts, browsers, and output directories.
 
 import os
 from pathlib import Path
+from urllib.parse import urlparse
 
-# Base URL (adjust if dev server runs on different port)
-# Use live Vercel deployment for production testing
-BASE_URL = "https://fluentstep-ielts-roleplay-engine.vercel.app"
+# Base URL
+# By default the suite builds the app and serves it on a free local port
+# (utils/local_server.py). Set E2E_BASE_URL to test a deployed app instead,
+# e.g. E2E_BASE_URL=https://fluentstep-ielts-roleplay-engine.vercel.app
+LIVE_BASE_URL = "https://fluentstep-ielts-roleplay-engine.vercel.app"
+BASE_URL = os.environ.get("E2E_BASE_URL", "http://localhost")  # Port set at startup
+USE_LOCAL_SERVER = "E2E_BASE_URL" not in os.environ
+LOCAL_SERVER_HOST = "localhost"
+IS_LOCAL_APP = urlparse(BASE_URL).hostname in ("localhost", "127.0.0.1")
 
 # Timeouts (in milliseconds)
-# Increased for live Vercel deployment (network latency)
-TIMEOUT_LOAD = 20000  # Page load (increased for React rendering + network)
-TIMEOUT_ELEMENT = 10000  # Element visibility (increased for interactive elements)
+# Remote deployments need headroom for network latency
+TIMEOUT_LOAD = 10000 if IS_LOCAL_APP else 20000  # Page load (React rendering + network)
+TIMEOUT_ELEMENT = 5000 if IS_LOCAL_APP else 10000  # Element visibility
 TIMEOUT_ACTION = 5000  # Click, fill, etc.
 TIMEOUT_ANIMATION = 1000  # Animations
+TIMEOUT_UI_EVENT = 2000  # Upper bound for event-driven UI waits (utils/waits.py)
 
 # Browser settings
 BROWSER = "chromium"
 HEADLESS = True
 SLOW_MO = 0  # Slow down actions for debugging (0 = normal speed)
 VIEWPORT = {"width": 1280, "height": 720}
+BROWSER_POOL_PREWARM = True  # Open the next test's context during teardown
+
+# Shared browser servers (utils/browser_server.py): the orchestrator starts
+# this many long-lived browsers and workers connect to them (0 = each
+# worker launches its own)
+BROWSER_SERVERS = int(os.environ.get("E2E_BROWSER_SERVERS", "2"))
+BROWSER_SERVER_RECYCLE_CONTEXTS = 200  # Contexts served before a browser is replaced
+BROWSER_SERVER_START_TIMEOUT_S = 30
+BROWSER_SERVER_RETIRE_GRACE_S = 120  # Replaced browsers stay up while clients move over
+BROWSER_SERVER_CONNECT_TIMEOUT_MS = 10000  # Workers fall back to launching locally after this
+
+# localStorage the app checks before showing onboarding (App.tsx)
+ONBOARDING_DISMISSED_STORAGE = {
+    "fluentstep:skipOnboarding": "true",
+}
 
 # Screenshot/Log settings
 SCREENSHOT_ON_FAILURE = True
-CAPTURE_CONSOLE_LOGS = True
+# Screenshot store (utils/screenshots.py): encoded and deduplicated off the test thread
+SCREENSHOT_FORMAT = "webp"  # Needs Pillow; screenshots stay PNG without it
+SCREENSHOT_QUALITY = 80
+SCREENSHOT_WORKERS = 2  # Background encode/write threads per process
+SCREENSHOT_RETENTION_DAYS = 7
+CAPTURE_CONSOLE_LOGS = True  # False keeps console errors only
+
+# Console capture (utils/console.py): bounded ring buffers of serialised messages
+CONSOLE_CAPTURE_LEVEL = "log"  # Lowest type kept: "debug", "log", "warning" or "error"
+CONSOLE_BUFFER_SIZE = 200  # Most recent messages kept per page
+CONSOLE_MAX_ERRORS = 100  # Most recent error texts kept per page
+CONSOLE_MAX_TEXT_CHARS = 2000  # Longer messages are truncated
+COLLECT_WEB_VITALS = True  # Per-scenario rendering metrics (utils/metrics.py)
+
+# Playwright tracing (utils/tracing.py): "off", "retain-on-failure" or "on"
+# retain-on-failure keeps traces of failed or over-budget tests only
+TRACE_MODE = os.environ.get("E2E_TRACE", "off")
+TRACE_DISK_BUDGET_MB = 500  # Least recently used traces are evicted beyond this
+
+# Interaction latency probes (utils/interactions.py)
+COLLECT_INTERACTIONS = True
+INTERACTION_PROBE_TIMEOUT_MS = 5000  # Samples slower than this are marked timed_out
+# Click -> DOM mutation -> next paint budgets, enforced on INTERACTION_BUDGET_STAT
+INTERACTION_BUDGETS_MS = {
+    "blank_reveal": 100,
+    "modal_open": 100,
+    "popover_close": 100,
+    "next_turn": 100,
+}
+INTERACTION_BUDGET_STAT = "p95"
+
+# Device profiles (utils/device_profiles.py) the performance tests run under.
+# Viewport and touch are context options; CPU and network throttling go
+# through CDP (Chromium only). Throughput is in bytes/s, latency in ms.
+DEVICE_PROFILES = {
+    "desktop": {
+        "viewport": VIEWPORT,
+        "device_scale_factor": 1,
+        "is_mobile": False,
+        "has_touch": False,
+        "cpu_throttling_rate": 1,
+        "network": None,  # Unthrottled
+        "interaction_budgets_ms": INTERACTION_BUDGETS_MS,
+        "action_budget_ms": 2000,
+    },
+    "mid-range": {
+        "viewport": {"width": 412, "height": 915},
+        "device_scale_factor": 2.625,
+        "is_mobile": True,
+        "has_touch": True,
+        "cpu_throttling_rate": 4,
+        "network": {"latency": 150, "downloadThroughput": 1_600_000 // 8, "uploadThroughput": 750_000 // 8},
+        "interaction_budgets_ms": {kind: budget * 2 for kind, budget in INTERACTION_BUDGETS_MS.items()},
+        "action_budget_ms": 4000,
+    },
+    "low-end-android": {
+        "viewport": {"width": 360, "height": 640},
+        "device_scale_factor": 2,
+        "is_mobile": True,
+        "has_touch": True,
+        "cpu_throttling_rate": 6,
+        "network": {"latency": 400, "downloadThroughput": 400_000 // 8, "uploadThroughput": 400_000 // 8},
+        "interaction_budgets_ms": {kind: budget * 3 for kind, budget in INTERACTION_BUDGETS_MS.items()},
+        "action_budget_ms": 6000,
+    },
+}
+DEFAULT_DEVICE_PROFILE = "desktop"  # Metrics of other profiles are keyed "<scenario>@<profile>"
+# Profiles the performance tests are parametrised over, e.g. E2E_DEVICE_PROFILES=desktop,mid-range
+PERF_DEVICE_PROFILES = [
+    name.strip() for name in os.environ.get("E2E_DEVICE_PROFILES", ",".join(DEVICE_PROFILES)).split(",")
+    if name.strip()
+]
+
+# Performance regression gate (perf_gate.py)
+PERF_BASELINE_FILE = Path(__file__).parent / "baselines" / "perf_baseline.json"
+PERF_BASELINE_MAX_SAMPLES = 50  # Newest samples kept per metric across baseline updates
+PERF_GATE_METRICS = {"fcp_ms", "lcp_ms", "cls", "total_blocking_time_ms", "scenario_ready_ms"}
+PERF_GATE_TOLERANCE_PCT = 10  # Median may worsen this much before it can fail
+PERF_GATE_MIN_DELTA = {"default": 10.0, "cls": 0.01}  # Absolute changes below this are noise
+PERF_GATE_ALPHA = 0.05  # Mann-Whitney U significance level
+PERF_GATE_MIN_SAMPLES = 5  # Per side; fewer samples are reported but never fail
+# Loads measured per scenario session: 1 in functional runs; perf mode (orchestrator.py
+# --perf-samples N) adds N-1 cold loads in fresh contexts as gate samples
+PERF_LOAD_SAMPLES = int(os.environ.get("E2E_PERF_LOAD_SAMPLES", "1"))
+
+# Visual regression gate (visual_gate.py, utils/visual_diff.py); needs NumPy and Pillow
+VISUAL_BASELINE_DIR = Path(__file__).parent / "baselines" / "visual"
+VISUAL_TILE_SIZE = 32  # Pixels per tile side
+VISUAL_PIXEL_TOLERANCE = 16  # Largest channel difference still counted as equal
+VISUAL_AA_MIN_CONTRAST = 32  # Neighbourhood contrast that marks an edge (anti-aliasing candidates)
+VISUAL_TILE_MAX_PIXELS = 4  # Differing pixels a tile may have before it counts as changed
+VISUAL_GATE_WORKERS = 4  # Comparison threads (NumPy releases the GIL)
 
 # Directories
 PROJECT_ROOT = Path(__file__).parent.parent.parent
 TESTS_DIR = PROJECT_ROOT / "tests"
 REPORTS_DIR = TESTS_DIR / "reports"
 SCREENSHOTS_DIR = REPORTS_DIR / "screenshots"
+SCREENSHOT_INDEX_FILE = SCREENSHOTS_DIR / "index.ndjson"  # One line per capture
 JSON_REPORTS_DIR = REPORTS_DIR / "json"
+STORAGE_STATE_FILE = REPORTS_DIR / "storage_state.json"
+TRACES_DIR = REPORTS_DIR / "traces"
+VISUAL_DIFF_DIR = REPORTS_DIR / "visual_diffs"  # Heatmaps of changed screenshots
+STATIC_DATA_FILE = PROJECT_ROOT / "src" / "services" / "staticData.ts"  # Scenario catalogue (catalogue.py)
+
+# Local app build (utils/local_server.py), cached by source hash
+BUILD_CACHE_DIR = PROJECT_ROOT / "node_modules" / ".cache" / "e2e-build"
+BUILD_CACHE_KEEP = 3  # Cached builds kept on disk
+BUILD_INPUTS = [
+    "index.html", "src/**/*", "public/**/*", ".env*",
+    "package-lock.json", "vite.config.ts", "tsconfig.json",
+    "tailwind.config.js", "postcss.config.js",
+]
+
+# Network cache (utils/network_cache.py)
+NETWORK_CACHE = True  # Record/replay static resources, block non-essential requests
+NETWORK_CACHE_DIR = REPORTS_DIR / "network_cache"
+NETWORK_CACHE_KEEP_RUNS = 2  # Run stores kept on disk
+NETWORK_CACHE_RESOURCE_TYPES = {"script", "stylesheet", "font", "image"}
+NETWORK_BLOCKED_RESOURCE_TYPES = {"media"}  # Hero video etc.
+# Third-party hosts the app needs (see index.html); all others are blocked
+NETWORK_ALLOWED_THIRD_PARTY_HOSTS = {
+    "cdn.tailwindcss.com",
+    "cdnjs.cloudflare.com",
+    "fonts.googleapis.com",
+    "fonts.gstatic.com",
+    "esm.sh",
+}
 
 # Ensure directories exist
-for dir_path in [REPORTS_DIR, SCREENSHOTS_DIR, JSON_REPORTS_DIR]:
+for dir_path in [REPORTS_DIR, SCREENSHOTS_DIR, JSON_REPORTS_DIR, NETWORK_CACHE_DIR]:
     dir_path.mkdir(parents=True, exist_ok=True)
 
-# Parallel execution
-NUM_AGENTS = 11
+# Parallel execution: E2E_WORKERS=<n> fixes the worker count; "auto" sizes
+# it from cores, free memory and measured per-worker RSS (autoscale.py)
+_WORKERS = os.environ.get("E2E_WORKERS", "auto")
+NUM_AGENTS = None if _WORKERS == "auto" else int(_WORKERS)
+AGENT_ID = int(os.environ.get("E2E_AGENT_ID", "0"))  # Set per worker by the orchestrator
 SCENARIOS_PER_AGENT = 5
 
+# Suite files the scheduler expands into (scenario, check) work items
+SUITE_FILES = [
+    "tests/e2e/scenarios/tier1_with_feedback.py",
+    "tests/e2e/scenarios/tier2_basic.py",
+]
+
+# Async engine (async_engine.py): Tier 2 checks run as coroutines, this many
+# at once per worker on one browser (0 = every suite runs on pytest workers)
+ASYNC_PAGES = int(os.environ.get("E2E_ASYNC_PAGES", "0"))
+ASYNC_NAVIGATIONS = 2  # Concurrent page loads per worker, so scenario_ready_ms stays comparable
+ASYNC_SUITE_FILES = ["tests/e2e/scenarios/tier2_basic.py"]  # Suites with async twins
+
+# Worker autoscaling (autoscale.py)
+AUTOSCALE_MIN_WORKERS = 1
+AUTOSCALE_MAX_WORKERS = 16
+AUTOSCALE_CPUS_PER_WORKER = 1.0  # Chromium renderer + pytest per worker
+AUTOSCALE_DEFAULT_WORKER_RSS_MB = 700  # Assumed until a warm-up worker is measured
+AUTOSCALE_MEM_RESERVE_MB = 1024  # Left free for the OS, the app server and spikes
+AUTOSCALE_MAX_LOAD_PER_CPU = 1.5  # 1-minute load average per core that sheds a worker
+AUTOSCALE_INTERVAL_S = 15  # Seconds between mid-run adjustments
+
+# Work-stealing scheduler
+DEFAULT_ITEM_DURATION_S = 30.0  # Estimate for items with no history
+ITEM_TIMEOUT_S = 300  # Per-item timeout (matches pytest.ini)
+
+# Retries and flake quarantine (flakes.py)
+RETRY_STATUSES = ("failed", "timeout", "error")  # Statuses worth another attempt
+MAX_RETRIES_PER_ITEM = 2
+RETRY_BUDGET = 20  # Retries per run; a broken build should fail fast, not retry everything
+FLAKE_LEDGER_FILE = JSON_REPORTS_DIR / "flake_ledger.json"
+FLAKE_HISTORY_LENGTH = 20  # Runs of history kept per (scenario, check)
+FLAKE_QUARANTINE_THRESHOLD = 2  # Flaky runs within the history that quarantine an item
+
+# Distributed execution (distributed.py)
+DIST_HOST = "127.0.0.1"  # Use --serve 0.0.0.0:PORT to accept other machines
+DIST_PORT = 8765
+DIST_TOKEN = os.environ.get("E2E_DIST_TOKEN")  # Shared secret workers must send, if set
+DIST_LEASE_S = 60  # A lease without a heartbeat for this long is re-queued
+DIST_MAX_LEASE_EXPIRIES = 3  # Lost leases per item before it is reported as an error
+DIST_POLL_S = 2  # Worker back-off while every item is leased out
+DIST_CONNECT_TIMEOUT_S = 120  # How long a worker waits for the coordinator to come up
+DIST_DRAIN_S = 60  # How long the coordinator waits for workers to upload reports
+
+# Test impact analysis (impact.py)
+IMPACT_MANIFEST_FILE = JSON_REPORTS_DIR / "impact_manifest.json"  # Last green run
+IMPACT_APP_ENTRY = "src/index.tsx"  # Files reachable from here are app sources
+IMPACT_GLOBAL_FILES = [  # Any change re-runs everything
+    "index.html", "src/index.css", "package.json", "package-lock.json",
+    "vite.config.ts", "tailwind.config.js", "postcss.config.js", "tsconfig.json",
+    "pytest.ini",
+]
+# App sources exercised only by some checks: file -> substrings of check
+# names. An empty list means no check reaches it (library page only);
+# reachable files not listed here affect every check.
+_COMPLETION_CHECKS = ["completion", "navigate_to_end", "return_to_library", "progress", "final"]
+IMPACT_CHECK_KEYWORDS = {
+    "src/components/FeedbackCard.tsx": ["feedback", "modal", "deep_dive", "empty_state"],
+    "src/components/PatternSummaryView.tsx": ["feedback", "modal", "deep_dive", "empty_state"],
+    "src/components/CelebrationOverlay.tsx": _COMPLETION_CHECKS,
+    "src/services/celebrationService.ts": _COMPLETION_CHECKS,
+    "src/services/encouragementMessages.ts": _COMPLETION_CHECKS,
+    "src/hooks/useMilestoneDetection.ts": _COMPLETION_CHECKS,
+    "src/services/progressService.ts": _COMPLETION_CHECKS,
+    "src/components/ContinueLearningBanner.tsx": [],
+    "src/components/FilterPanel.tsx": [],
+    "src/components/FootstepTrail.tsx": [],
+    "src/components/HandwrittenNote.tsx": [],
+    "src/components/HeroVideo.tsx": [],
+    "src/components/HikerAvatar.tsx": [],
+    "src/components/JourneyMap.tsx": [],
+    "src/components/LandscapeElements.tsx": [],
+    "src/components/ScenarioWaypoint.tsx": [],
+    "src/components/SearchBar.tsx": [],
+    "src/components/SortingControls.tsx": [],
+    "src/components/SurpriseMeButton.tsx": [],
+    "src/components/TopicSelector.tsx": [],
+    "src/services/filterService.ts": [],
+    "src/services/organicPathGenerator.ts": [],
+    "src/services/searchService.ts": [],
+    "src/services/sortingService.ts": [],
+}
+
 # Tier 1: 6 scenarios with full validation
 TIER1_SCENARIOS = [
     "social-1-flatmate",
@@ -53,8 +281,4 @@ TIER1_SCENARIOS = [
     "service-35-landlord-repairs",
 ]
 
-# All 52 scenarios (Tier 2: 46 without chunkFeedback)
-TIER2_SCENARIOS = [
-    # Tier 2 will be populated from staticData.ts
-    # This is a placeholder - orchestrator will discover all scenarios
-]
+# Tier 2: every other scenario in staticData.ts (see catalogue.tier2_scenario_ids)
@@ -7,10 +7,65 @@ Makes fixtures available to all test modules.
 from pathlib import Path
 import sys
 
+import pytest
+
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
 # Import fixtures so they're available to all tests
-from fixtures import browser, page, goto_scenario, load_home, timer
+from fixtures import (
+    base_url, browser_pool, browser, context, page, goto_scenario, load_home, timer,
+    metrics_report, scenario_session, scenario_page, completed_scenario_page, fresh_scenario_page,
+    interaction_latency, device_profile,
+)
+from utils.result_stream import ResultStream
+from scheduler import make_work_item, parse_shard, select_shard
+
+__all__ = [
+    'base_url', 'browser_pool', 'browser', 'context', 'page', 'goto_scenario', 'load_home', 'timer',
+    'metrics_report', 'scenario_session', 'scenario_page', 'completed_scenario_page', 'fresh_scenario_page',
+    'interaction_latency', 'device_profile',
+]
+
+
+def pytest_addoption(parser):
+    """E2E command-line options."""
+
+    parser.addoption(
+        "--shard", default=None, metavar="i/N",
+        help="Run only shard i of N; scenarios are balanced by historical duration",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """Keep only this shard's scenarios when --shard is given."""
+
+    spec = config.getoption("--shard")
+    if not spec:
+        return
+    try:
+        shard = parse_shard(spec)
+    except ValueError as e:
+        raise pytest.UsageError(str(e))
+
+    work_items = [make_work_item(item.nodeid) for item in items]
+    selected = {w["nodeid"] for w in select_shard(work_items, shard)}
+    deselected = [item for item in items if item.nodeid not in selected]
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = [item for item in items if item.nodeid in selected]
+
+
+def pytest_configure(config):
+    """Stream per-test results to this worker's NDJSON file."""
+
+    config.pluginmanager.register(ResultStream(), "e2e_result_stream")
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    """Expose each phase's report as item.rep_<phase> for fixture teardown."""
 
-__all__ = ['browser', 'page', 'goto_scenario', 'load_home', 'timer']
+    outcome = yield
+    report = outcome.get_result()
+    setattr(item, f"rep_{report.when}", report)
@@ -0,0 +1,619 @@
+#!/usr/bin/env python3
+"""
+Distributed E2E execution: a coordinator and pull-based workers.
+
+The coordinator (``orchestrator.py --serve HOST:PORT``) serves the run's
+(scenario, check) work items over a small JSON-over-HTTP protocol. Any
+number of machines with the same checkout start a worker:
+
+    python tests/e2e/distributed.py worker --coordinator http://HOST:PORT
+
+A worker builds and serves the app locally, then runs one long-lived
+pytest session per slot (worker.worker_main), each leasing items one at a
+time. Leases are kept alive by heartbeats; a lease with no heartbeat for
+DIST_LEASE_S (machine lost) is re-queued, and an item running longer than
+ITEM_TIMEOUT_S is reported as a timeout and its slot replaced. Results
+are uploaded as each item finishes, and the per-worker JSON/NDJSON files
+are uploaded at the end, so the report, perf gate and duration history
+see a distributed run exactly like a local one.
+
+Endpoints (POST bodies and replies are JSON):
+    GET  /config     test files, run id, lease length, app source hash
+    GET  /status     {"done": bool}
+    POST /lease      {"worker"} -> {"lease_id", "nodeid"} or {"nodeid": null, "done"}
+    POST /started    {"lease_id"}
+    POST /heartbeat  {"worker", "leases"} -> {"revoked": [...]}
+    POST /result     {"lease_id", "result"}
+    POST /upload     {"worker", "name", "content"}
+    POST /bye        {"worker"}
+"""
+
+import argparse
+import hmac
+import json
+import os
+import queue
+import re
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+import sys
+sys.path.insert(0, str(Path(__file__).parent))
+from config import (
+    JSON_REPORTS_DIR, USE_LOCAL_SERVER, ITEM_TIMEOUT_S, AUTOSCALE_DEFAULT_WORKER_RSS_MB,
+    DIST_HOST, DIST_PORT, DIST_TOKEN, DIST_LEASE_S, DIST_MAX_LEASE_EXPIRIES,
+    DIST_POLL_S, DIST_CONNECT_TIMEOUT_S, DIST_DRAIN_S
+)
+from worker import WORKER_LOGS_DIR, worker_main
+from scheduler import ScenarioAffinity
+
+PROTOCOL_VERSION = 1
+
+# Per-worker report files a worker uploads (renamed to carry its name)
+_UPLOAD_NAME_RE = re.compile(r"^(agent|results)_[\w.-]+\.(json|ndjson)$")
+
+
+def parse_address(value: str) -> tuple:
+    """Parse HOST:PORT (either part may be omitted)."""
+
+    host, _, port = value.rpartition(":")
+    try:
+        return host or DIST_HOST, int(port) if port else DIST_PORT
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected HOST:PORT, got {value!r}")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Thin JSON layer over the Coordinator's methods."""
+
+    def log_message(self, format, *args):
+        pass  # One line per heartbeat would drown the orchestrator output
+
+    def _reply(self, status: int, body: Dict) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _authorised(self) -> bool:
+        token = self.server.coordinator.token
+        if not token:
+            return True
+        return hmac.compare_digest(self.headers.get("X-E2E-Token", ""), token)
+
+    def do_GET(self):
+        coordinator = self.server.coordinator
+        if not self._authorised():
+            self._reply(403, {"error": "bad token"})
+        elif self.path == "/config":
+            self._reply(200, coordinator.config())
+        elif self.path == "/status":
+            self._reply(200, {"done": coordinator.done.is_set()})
+        else:
+            self._reply(404, {"error": f"unknown path {self.path}"})
+
+    def do_POST(self):
+        coordinator = self.server.coordinator
+        if not self._authorised():
+            self._reply(403, {"error": "bad token"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._reply(400, {"error": "invalid JSON"})
+            return
+
+        routes = {
+            "/lease": lambda: coordinator.lease(body["worker"]),
+            "/started": lambda: coordinator.started(body["lease_id"]),
+            "/heartbeat": lambda: coordinator.heartbeat(body["worker"], body.get("leases", [])),
+            "/result": lambda: coordinator.submit(body["lease_id"], body["result"]),
+            "/upload": lambda: coordinator.upload(body["worker"], body["name"], body["content"]),
+            "/bye": lambda: coordinator.bye(body["worker"]),
+        }
+        if self.path not in routes:
+            self._reply(404, {"error": f"unknown path {self.path}"})
+            return
+        try:
+            reply = routes[self.path]()
+        except KeyError as e:
+            self._reply(400, {"error": f"missing field {e}"})
+        except ValueError as e:
+            self._reply(409, {"error": str(e)})
+        else:
+            self._reply(200, reply or {})
+
+
+class Coordinator:
+    """Serves work items to remote workers; run() mirrors WorkerPool.run()."""
+
+    def __init__(self, test_files: List[str], host: str = DIST_HOST, port: int = DIST_PORT,
+                 lease_s: float = DIST_LEASE_S, item_timeout: float = ITEM_TIMEOUT_S,
+                 json_dir: Path = JSON_REPORTS_DIR, token: Optional[str] = DIST_TOKEN,
+                 drain_s: float = DIST_DRAIN_S):
+        """Initialize coordinator; the server starts with run() (or start())."""
+        self.test_files = list(test_files)
+        self.address = (host, port)
+        self.lease_s = lease_s
+        self.item_timeout = item_timeout
+        self.json_dir = Path(json_dir)
+        self.token = token
+        self.drain_s = drain_s
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+        self._server = None
+        self._finished = queue.Queue()  # Results posted by workers
+        self._pending = []
+        self._affinity = ScenarioAffinity()  # Keeps a scenario's items on one worker slot
+        self._items = {}
+        self._attempts = {}
+        self._expiries = {}  # node id -> lost leases
+        self._leases = {}  # lease id -> {"item", "worker", "heartbeat", "started"}
+        self.workers = {}  # worker name -> activity
+        self.respawned = 0  # Leases lost to dead or hung workers
+        self.worker_seconds = 0.0
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2] if self._server else self.address
+        return f"http://{host}:{port}"
+
+    @property
+    def peak_workers(self) -> int:
+        return len(self.workers)
+
+    def start(self) -> "Coordinator":
+        """Start serving in a background thread."""
+
+        self._server = ThreadingHTTPServer(self.address, _Handler)
+        self._server.daemon_threads = True
+        self._server.coordinator = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving."""
+
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    # Protocol (called from the HTTP threads)
+
+    def config(self) -> Dict:
+        from utils.local_server import source_hash
+
+        return {
+            "protocol": PROTOCOL_VERSION,
+            "test_files": self.test_files,
+            "run_id": os.environ.get("E2E_RUN_ID"),
+            "lease_s": self.lease_s,
+            "source_hash": source_hash(),
+        }
+
+    def _seen(self, worker: str) -> Dict:
+        now = time.time()
+        activity = self.workers.setdefault(
+            worker, {"first_seen": now, "last_seen": now, "items": 0, "bye": False}
+        )
+        activity["last_seen"] = now
+        return activity
+
+    def lease(self, worker: str) -> Dict:
+        with self._lock:
+            self._seen(worker)
+            item = self._affinity.next_item(worker, self._pending)
+            if item is None:
+                # Idle: the rest belongs to scenarios other slots are working through
+                return {"nodeid": None, "done": self.done.is_set()}
+            lease_id = uuid.uuid4().hex
+            self._leases[lease_id] = {
+                "item": item, "worker": worker, "heartbeat": time.time(), "started": None,
+            }
+            return {"lease_id": lease_id, "nodeid": item["nodeid"]}
+
+    def started(self, lease_id: str) -> None:
+        with self._lock:
+            lease = self._leases.get(lease_id)
+            if lease is None:
+                raise ValueError("lease revoked")
+            lease["started"] = lease["heartbeat"] = time.time()
+
+    def heartbeat(self, worker: str, lease_ids: List[str]) -> Dict:
+        with self._lock:
+            self._seen(worker)
+            now = time.time()
+            revoked = []
+            for lease_id in lease_ids:
+                if lease_id in self._leases:
+                    self._leases[lease_id]["heartbeat"] = now
+                else:
+                    revoked.append(lease_id)
+            return {"revoked": revoked}
+
+    def submit(self, lease_id: str, payload: Dict) -> None:
+        with self._lock:
+            lease = self._leases.pop(lease_id, None)
+            if lease is None:
+                raise ValueError("lease revoked")  # Already re-queued or timed out
+            self._seen(lease["worker"])["items"] += 1
+        self._finished.put({**lease["item"], **payload, "worker": lease["worker"]})
+
+    def upload(self, worker: str, name: str, content: str) -> None:
+        if not _UPLOAD_NAME_RE.match(name):
+            raise ValueError(f"refusing to store {name!r}")
+        # The worker name keeps files from different machines apart
+        prefix, _, rest = name.partition("_")
+        safe_worker = re.sub(r"[^\w.-]", "-", worker)
+        self.json_dir.mkdir(parents=True, exist_ok=True)
+        (self.json_dir / f"{prefix}_{safe_worker}-{rest}").write_text(content, encoding='utf-8')
+
+    def bye(self, worker: str) -> None:
+        # A machine signs off for all of its slots ("<machine>/<slot>")
+        with self._lock:
+            for name, activity in self.workers.items():
+                if name == worker or name.startswith(worker + "/"):
+                    activity["bye"] = True
+                    self._affinity.release(name)
+
+    # Run loop (orchestrator thread)
+
+    def _failed(self, lease: Dict, status: str, error: str, duration: float) -> Dict:
+        return {
+            **lease["item"],
+            "worker": lease["worker"],
+            "status": status,
+            "duration_seconds": duration,
+            "tests": [],
+            "error": error,
+        }
+
+    def _expire(self) -> List[Dict]:
+        """Time out hung items and re-queue leases of lost workers."""
+
+        results = []
+        now = time.time()
+        with self._lock:
+            # Scenarios held by silent workers go back to everyone
+            for name, activity in self.workers.items():
+                if now - activity["last_seen"] > self.lease_s:
+                    self._affinity.release(name)
+            for lease_id, lease in list(self._leases.items()):
+                started = lease["started"]
+                if started is not None and now - started > self.item_timeout:
+                    # Revoking makes the worker's heartbeat replace the hung slot
+                    del self._leases[lease_id]
+                    self.respawned += 1
+                    results.append(self._failed(lease, "timeout",
+                                                f"Item exceeded {self.item_timeout:.0f}s",
+                                                now - started))
+                elif now - lease["heartbeat"] > self.lease_s:
+                    del self._leases[lease_id]
+                    self.respawned += 1
+                    nodeid = lease["item"]["nodeid"]
+                    self._expiries[nodeid] = self._expiries.get(nodeid, 0) + 1
+                    if self._expiries[nodeid] <= DIST_MAX_LEASE_EXPIRIES:
+                        self._pending.insert(0, lease["item"])  # Not the item's fault
+                    else:
+                        results.append(self._failed(
+                            lease, "error",
+                            f"Lost {self._expiries[nodeid]} leases (no heartbeat from workers)",
+                            now - (started or now),
+                        ))
+        return results
+
+    def _load(self, items: List[Dict]) -> None:
+        with self._lock:
+            self._pending = list(items)
+            self._affinity = ScenarioAffinity()
+            self._items = {item["nodeid"]: item for item in items}
+            self._attempts = {}
+            self._expiries = {}
+            self.done.clear()
+
+    def run(self, items: List[Dict], retry=None) -> Iterator[Dict]:
+        """Yield one result per item, in completion order, from remote workers."""
+
+        from flakes import finish_attempt
+
+        self._load(items)
+        if self._server is None:
+            self.start()
+        remaining = len(items)
+        try:
+            while remaining:
+                try:
+                    results = [self._finished.get(timeout=1.0)]
+                except queue.Empty:
+                    results = []
+                for result in results + self._expire():
+                    result, again = finish_attempt(result, self._attempts, retry)
+                    if again:
+                        with self._lock:
+                            self._pending.insert(0, self._items[result["nodeid"]])
+                        continue
+                    remaining -= 1
+                    yield result
+
+            self.done.set()
+            self._drain()
+        finally:
+            self.done.set()
+            self.worker_seconds = sum(
+                w["last_seen"] - w["first_seen"] for w in self.workers.values()
+            )
+            self.stop()
+
+    def _drain(self) -> None:
+        """Wait for workers to upload their report files and sign off."""
+
+        deadline = time.time() + self.drain_s
+        while time.time() < deadline:
+            with self._lock:
+                if all(w["bye"] for w in self.workers.values()):
+                    return
+            time.sleep(0.5)
+        missing = sorted(name for name, w in self.workers.items() if not w["bye"])
+        print(f"Workers that did not upload their reports: {', '.join(missing)}")
+
+    def summary(self) -> Dict:
+        """Workers that took part, for the report."""
+
+        return {
+            "mode": "distributed",
+            "initial_workers": None,
+            "peak_workers": self.peak_workers,
+            "measured_worker_rss_mb": None,
+            "workers": self.workers,
+            "decisions": [
+                {"time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(w["first_seen"])),
+                 "workers": 1, "reason": f"{name} joined ({w['items']} items)"}
+                for name, w in sorted(self.workers.items(), key=lambda kv: kv[1]["first_seen"])
+            ],
+        }
+
+
+class CoordinatorClient:
+    """Minimal JSON client for the coordinator protocol."""
+
+    def __init__(self, url: str, worker: str, token: Optional[str] = DIST_TOKEN):
+        """Initialize client."""
+        self.url = url.rstrip("/")
+        self.worker = worker
+        self.token = token
+
+    def call(self, path: str, body: Optional[Dict] = None) -> Dict:
+        """GET (no body) or POST a JSON body; raises OSError if unreachable."""
+
+        data = None
+        if body is not None:
+            data = json.dumps({"worker": self.worker, **body}).encode()
+        request = urllib.request.Request(self.url + path, data=data)
+        request.add_header("Content-Type", "application/json")
+        if self.token:
+            request.add_header("X-E2E-Token", self.token)
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                return json.loads(response.read() or b"{}")
+        except urllib.error.HTTPError as e:
+            if e.code == 409:
+                return {"error": "revoked"}
+            raise
+
+
+class LeaseChannel:
+    """Control and result channel for worker_main backed by coordinator leases."""
+
+    def __init__(self, client: CoordinatorClient, heartbeat_s: float, poll_s: float = DIST_POLL_S):
+        """Initialize channel; the heartbeat thread starts with the first lease."""
+        self.client = client
+        self.heartbeat_s = heartbeat_s
+        self.poll_s = poll_s
+        self._leases = {}  # node id -> lease id (running and reserve)
+        self._running = None
+        self._lock = None
+        self._heartbeat = None
+
+    def __getstate__(self):
+        # Pickled into the spawned slot before any thread or lock exists
+        return {k: v for k, v in self.__dict__.items() if k not in ("_lock", "_heartbeat")}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state, _lock=None, _heartbeat=None)
+
+    def _start_heartbeat(self) -> None:
+        self._lock = threading.Lock()
+        self._heartbeat = threading.Thread(target=self._beat, daemon=True)
+        self._heartbeat.start()
+
+    def _beat(self) -> None:
+        while True:
+            time.sleep(self.heartbeat_s)
+            with self._lock:
+                leases = list(self._leases.values())
+                running = self._running
+            try:
+                reply = self.client.call("/heartbeat", {"leases": leases})
+            except OSError:
+                continue  # Transient; the lease survives DIST_LEASE_S without us
+            if running is not None and running in reply.get("revoked", []):
+                # The running item timed out: this pytest session is stuck in
+                # it, so exit and let the supervisor start a fresh slot
+                os._exit(3)
+
+    def get(self) -> Optional[str]:
+        """Next node id to run, or None when the run is over."""
+
+        if self._heartbeat is None:
+            self._start_heartbeat()
+        while True:
+            try:
+                reply = self.client.call("/lease", {})
+            except OSError:
+                return None  # Coordinator gone: the run is over
+            if reply.get("nodeid"):
+                with self._lock:
+                    self._leases[reply["nodeid"]] = reply["lease_id"]
+                return reply["nodeid"]
+            with self._lock:
+                holding = bool(self._leases)
+            if reply.get("done") or holding:
+                # A held item only runs once get() returns, so never wait with one
+                return None
+            time.sleep(self.poll_s)  # Everything is leased out; retries may follow
+
+    def put(self, message) -> None:
+        """Forward WorkerPlugin messages ("ready" needs no round trip)."""
+
+        kind, _, payload = message
+        try:
+            if kind == "started":
+                with self._lock:
+                    self._running = self._leases.get(payload)
+                if self._running:
+                    self.client.call("/started", {"lease_id": self._running})
+            elif kind == "result":
+                with self._lock:
+                    lease_id = self._leases.pop(payload["nodeid"], None)
+                    self._running = None
+                if lease_id:
+                    self.client.call("/result", {"lease_id": lease_id, "result": payload})
+        except OSError as e:
+            # The lease expires and is re-queued; the next get() ends the slot if the run is over
+            print(f"Could not reach the coordinator: {e}")
+
+
+def _wait_for_config(client: CoordinatorClient, timeout: float) -> Dict:
+    deadline = time.time() + timeout
+    while True:
+        try:
+            return client.call("/config")
+        except OSError:
+            if time.time() > deadline:
+                raise
+            time.sleep(DIST_POLL_S)
+
+
+def run_worker(url: str, slots: Optional[int] = None, logs_dir: Path = WORKER_LOGS_DIR,
+               connect_timeout: float = DIST_CONNECT_TIMEOUT_S) -> int:
+    """Serve the app locally and run slots until the coordinator's run is over."""
+
+    import multiprocessing
+    from utils.local_server import source_hash, start_local_app_server
+
+    name = f"{socket.gethostname()}-{os.getpid()}"
+    client = CoordinatorClient(url, name)
+    config = _wait_for_config(client, connect_timeout)
+    if config.get("protocol") != PROTOCOL_VERSION:
+        print(f"❌ Coordinator speaks protocol {config.get('protocol')}, not {PROTOCOL_VERSION}")
+        return 2
+    if config["source_hash"] != source_hash():
+        print("❌ App sources differ from the coordinator's checkout")
+        return 2
+    if config.get("run_id"):
+        os.environ["E2E_RUN_ID"] = config["run_id"]
+
+    server = None
+    if USE_LOCAL_SERVER:
+        server = start_local_app_server()
+        os.environ["E2E_BASE_URL"] = server.url
+
+    if not slots:
+        from autoscale import plan_workers, probe_resources
+        slots, reason = plan_workers(probe_resources(), AUTOSCALE_DEFAULT_WORKER_RSS_MB)
+        print(f"{name}: {slots} slots ({reason})")
+
+    # Agent ids only need to be unique on this machine
+    mp = multiprocessing.get_context("spawn")
+    agent_ids = []
+    processes = {}
+
+    def spawn(slot: int) -> None:
+        agent_id = os.getpid() * 100 + len(agent_ids)
+        agent_ids.append(agent_id)
+        channel = LeaseChannel(CoordinatorClient(url, f"{name}/{slot}"), config["lease_s"] / 3)
+        os.environ["E2E_AGENT_ID"] = str(agent_id)
+        try:
+            process = mp.Process(
+                target=worker_main,
+                args=(agent_id, config["test_files"], channel, channel, Path(logs_dir)),
+                name=f"slot-{slot}",
+                daemon=True,
+            )
+            process.start()
+        finally:
+            os.environ.pop("E2E_AGENT_ID", None)
+        processes[slot] = process
+
+    for slot in range(1, slots + 1):
+        spawn(slot)
+    try:
+        while processes:
+            time.sleep(1.0)
+            for slot, process in list(processes.items()):
+                if process.is_alive():
+                    continue
+                process.join()
+                del processes[slot]
+                try:
+                    done = client.call("/status")["done"]
+                except OSError:
+                    done = True
+                if not done:
+                    # Crashed, replaced after a timeout, or ran out of items
+                    # while retries may still come
+                    print(f"{name}: slot {slot} exited (code {process.exitcode}) "
+                          f"before the run finished; starting a new one")
+                    spawn(slot)
+    finally:
+        if server is not None:
+            server.stop()
+
+    # Hand over this machine's report files, then sign off
+    for agent_id in agent_ids:
+        for path in (JSON_REPORTS_DIR / f"agent_{agent_id}.json",
+                     JSON_REPORTS_DIR / f"results_{agent_id}.ndjson"):
+            if not path.exists():
+                continue
+            try:
+                client.call("/upload", {"name": path.name,
+                                        "content": path.read_text(encoding='utf-8')})
+                path.unlink()  # Also keeps a worker on the coordinator's machine from double counting
+            except OSError as e:
+                print(f"{name}: could not upload {path.name}: {e}")
+    try:
+        client.call("/bye", {})
+    except OSError:
+        pass
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Distributed E2E worker")
+    sub = parser.add_subparsers(dest="command", required=True)
+    worker = sub.add_parser("worker", help="Pull work items from a coordinator")
+    worker.add_argument("--coordinator", required=True, metavar="URL",
+                        help="Coordinator URL, e.g. http://ci-box:8765")
+    worker.add_argument("--slots", type=int, default=None,
+                        help="Concurrent pytest sessions (default: sized from cores and memory)")
+    worker.add_argument("--logs-dir", type=Path, default=WORKER_LOGS_DIR)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    return run_worker(args.coordinator, args.slots, args.logs_dir)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
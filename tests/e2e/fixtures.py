@@ -2,119 +2,461 @@
 Pytest fixtures for E2E tests.
 
 Provides fixtures for browser setup, page navigation, and logging.
+The browser is launched once per worker process; each test gets its
+own isolated context from the pool.
 """
 
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
 import pytest
-from playwright.sync_api import sync_playwright, Page, Browser
+from playwright.sync_api import Page, Browser, BrowserContext
 import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 from config import (
-    BASE_URL, TIMEOUT_LOAD, TIMEOUT_ELEMENT, TIMEOUT_ACTION,
-    BROWSER, HEADLESS, SLOW_MO, VIEWPORT
+    BASE_URL, USE_LOCAL_SERVER, NETWORK_CACHE, COLLECT_WEB_VITALS, AGENT_ID,
+    COLLECT_INTERACTIONS, PERF_DEVICE_PROFILES, PERF_LOAD_SAMPLES,
+    TIMEOUT_LOAD, TIMEOUT_ELEMENT, TIMEOUT_ACTION,
+)
+from utils.browser_pool import BrowserPool, get_browser_pool
+from utils.local_server import start_local_app_server
+from utils.network_cache import NetworkCache
+from utils.metrics import install_web_vitals, collect_page_metrics
+from utils.interactions import (
+    install_interaction_probe, drain_interactions, latencies_by_kind, summarise_latencies,
+    over_budget,
+)
+from utils.reporters import TestReport
+from utils.tracing import get_trace_recorder
+from utils.storage_state import record_onboarding_storage_state
+from utils.console import attach_console_capture
+from utils.screenshots import capture_failure_screenshot
+from utils.device_profiles import (
+    context_options, apply_device_profile, interaction_budgets, profile_key, throttles_network,
+)
+from utils.selectors import Selectors
+from utils.waits import (
+    ONBOARDING_SKIP, NEXT_TURN_BUTTON, click_next_turn, wait_for_dialogue, wait_for_home,
 )
 
 
-@pytest.fixture(scope="function")
-def browser():
-    """Create and teardown browser instance."""
+@pytest.fixture(scope="session")
+def base_url() -> str:
+    """URL of the app under test.
+
+    Serves a local (cached) production build unless E2E_BASE_URL is set.
+    """
+
+    if not USE_LOCAL_SERVER:
+        yield BASE_URL
+        return
+
+    server = start_local_app_server()
+    yield server.url
+    server.stop()
+
+
+@pytest.fixture(scope="session")
+def browser_pool(base_url) -> BrowserPool:
+    """Worker-scoped browser pool (one browser launch per process)."""
+
+    pool = get_browser_pool()
+    browser_instance = pool.start()
 
-    with sync_playwright() as p:
-        browser_instance = getattr(p, BROWSER).launch(
-            headless=HEADLESS,
-            slow_mo=SLOW_MO,
+    # Every context starts with onboarding already dismissed
+    pool.context_options["storage_state"] = record_onboarding_storage_state(
+        browser_instance, base_url
+    )
+
+    # Hooks run on every new pool context
+    if not pool.context_hooks:
+        if NETWORK_CACHE:
+            # Static resources are fetched once per run and replayed from memory
+            pool.network_cache = NetworkCache(urlparse(base_url).hostname)
+            pool.context_hooks.append(pool.network_cache.install)
+        if COLLECT_WEB_VITALS:
+            pool.context_hooks.append(install_web_vitals)
+        if COLLECT_INTERACTIONS:
+            pool.context_hooks.append(install_interaction_probe)
+        if get_trace_recorder().enabled:
+            pool.context_hooks.append(get_trace_recorder().attach)
+    pool.prewarm()
+    yield pool
+    pool.close()
+
+
+@pytest.fixture(scope="session")
+def browser(browser_pool) -> Browser:
+    """Shared browser instance for this worker."""
+
+    return browser_pool.start()
+
+
+@contextmanager
+def traced(context_instance: BrowserContext, request, report: TestReport):
+    """Record the test's trace chunk; keep it if the test failed or was slow."""
+
+    recorder = get_trace_recorder()
+    node = request.node
+    recorder.start_chunk(context_instance, node.nodeid)
+    try:
+        yield
+    finally:
+        failed = any(
+            getattr(node, f"rep_{when}", None) is not None and getattr(node, f"rep_{when}").failed
+            for when in ("setup", "call")
         )
-        yield browser_instance
-        browser_instance.close()
+        slow = getattr(node, "e2e_over_budget", False)
+        path = recorder.stop_chunk(context_instance, node.nodeid, retain=failed or slow)
+        if path:
+            node.user_properties.append(("trace", path))
+            report.add_trace(node.nodeid, _scenario_id_for(request), path,
+                             "failed" if failed else "over budget" if slow else "recorded")
+
+
+@pytest.fixture(scope="function", params=PERF_DEVICE_PROFILES)
+def device_profile(request) -> str:
+    """Device profile the test's page emulates (runs once per PERF_DEVICE_PROFILES entry)."""
+
+    return request.param
+
+
+def _device_profile_for(request):
+    """The test's device profile, or None if it does not use one."""
+
+    if "device_profile" not in request.fixturenames:
+        return None
+    return request.getfixturevalue("device_profile")
 
 
 @pytest.fixture(scope="function")
-def page(browser) -> Page:
+def context(browser_pool, metrics_report, request) -> BrowserContext:
+    """Fresh isolated browser context per test (emulating its device profile, if any)."""
+
+    profile = _device_profile_for(request)
+    if profile:
+        # Cached responses are fulfilled in the driver and would skip network throttling
+        skip_hooks = (
+            (browser_pool.network_cache.install,)
+            if throttles_network(profile) and browser_pool.network_cache is not None else ()
+        )
+        context_instance = browser_pool.acquire(skip_hooks, **context_options(profile))
+    else:
+        context_instance = browser_pool.acquire()
+    try:
+        with traced(context_instance, request, metrics_report):
+            yield context_instance
+    finally:
+        browser_pool.release(context_instance)
+
+
+def record_interactions(page_instance: Page, report: TestReport, scenario_id: str, node=None,
+                        profile: str = None) -> list:
+    """Drain a page's interaction latency samples into the agent report.
+
+    Samples of a device profile are keyed "<scenario>@<profile>". Flags the
+    test node (for trace retention) when a sample is over the profile's budget.
+    """
+
+    if not COLLECT_INTERACTIONS or report is None or scenario_id is None:
+        return []
+    try:
+        samples = drain_interactions(page_instance)
+    except Exception:
+        return []  # Page closed or crashed
+    report.add_interaction_samples(profile_key(scenario_id, profile), samples)
+    if node is not None and samples:
+        node.user_properties.append(("interactions", latencies_by_kind(samples)))
+        if over_budget(samples, interaction_budgets(profile)):
+            node.e2e_over_budget = True
+    return samples
+
+
+def attach_failure_screenshot(page_instance: Page, request) -> None:
+    """Screenshot a failed test's page; its path goes to the result record."""
+
+    node = request.node
+    rep_call = getattr(node, "rep_call", None)
+    if rep_call is None or not rep_call.failed:
+        return
+    try:
+        shot = capture_failure_screenshot(page_instance, node.name, _scenario_id_for(request))
+        node.user_properties.append(("screenshot", shot.path()))
+    except Exception as e:
+        print(f"Failure screenshot of {node.nodeid} not taken: {e}")
+
+
+def _scenario_id_for(request) -> str:
+    """Scenario under test: the scenario_id parameter or the module's SCENARIO_ID."""
+
+    callspec = getattr(request.node, "callspec", None)
+    if callspec is not None and "scenario_id" in callspec.params:
+        return callspec.params["scenario_id"]
+    return getattr(request.module, "SCENARIO_ID", None)
+
+
+@pytest.fixture(scope="function")
+def page(context, metrics_report, request) -> Page:
     """Create page with logging and timeouts."""
 
-    page_instance = browser.new_page(
-        viewport=VIEWPORT
-    )
+    # Pool contexts come with a pre-warmed page
+    page_instance = context.pages[0] if context.pages else context.new_page()
+    attach_console_capture(page_instance)
+    profile = _device_profile_for(request)
+    if profile:
+        apply_device_profile(page_instance, profile)
+
+    yield page_instance
 
-    # Set timeouts
-    page_instance.set_default_timeout(TIMEOUT_ELEMENT)
-    page_instance.set_default_navigation_timeout(TIMEOUT_LOAD)
+    attach_failure_screenshot(page_instance, request)
+    record_interactions(page_instance, metrics_report, _scenario_id_for(request), request.node, profile)
+    # Context (and its pages) is closed by the pool
+
+
+def navigate_to_scenario(page: Page, scenario_id: str, base_url: str = BASE_URL) -> Page:
+    """Deep-link to a scenario and reach the interactive turn.
+
+    Contexts start from the pre-seeded storage state, so onboarding is
+    normally already dismissed; "Skip for now" is only a fallback.
+    """
+
+    url = f"{base_url}/scenario/{scenario_id}"
+    page.goto(url, wait_until='load', timeout=TIMEOUT_LOAD)
+
+    # Wait for the dialogue (or the onboarding, if seeding didn't apply)
+    page.wait_for_selector(f'{ONBOARDING_SKIP}, {NEXT_TURN_BUTTON}', timeout=TIMEOUT_LOAD)
+
+    skip_btns = page.locator(ONBOARDING_SKIP).all()
+    if len(skip_btns) > 0:
+        skip_btns[-1].click()
+        wait_for_dialogue(page)
+
+    # Click Next Turn (waiting for the turn to advance) to reach the interactive user turn
+    if page.locator(NEXT_TURN_BUTTON).is_visible():
+        click_next_turn(page)
+
+    # Wait for blanks to appear
+    page.wait_for_selector(Selectors.BLANK_UNREVEALED, timeout=TIMEOUT_LOAD)
+
+    return page
+
+
+def advance_to_end(page: Page, max_turns: int = 50) -> Page:
+    """Click Next Turn until the scenario ends."""
+
+    for _ in range(max_turns):
+        if not page.locator(NEXT_TURN_BUTTON).is_visible():
+            break
+        click_next_turn(page)
+
+    return page
+
+
+class ScenarioSession:
+    """
+    One navigation per scenario, shared by all of its checks.
+
+    The shared page moves forward through stages ("interactive", then
+    "completed"); read-only checks run against it. Mutating checks get a
+    cheap reset instead: a fresh pool context (already past onboarding)
+    that deep-links straight to the scenario.
+    """
+
+    STAGES = ("interactive", "completed")
+
+    def __init__(self, pool: BrowserPool, scenario_id: str, base_url: str = BASE_URL, report: TestReport = None):
+        """Navigate once to the scenario's interactive turn."""
+        self.pool = pool
+        self.report = report
+        self.scenario_id = scenario_id
+        self.base_url = base_url
+        self.navigations = 0
+        self.metrics = {}
+        self._metrics_attached = False
+        self.context = pool.acquire()
+        try:
+            self.page = attach_console_capture(
+                self.context.pages[0] if self.context.pages else self.context.new_page()
+            )
+
+            start = time.time()
+            self._navigate()
+            self.load_time_ms = (time.time() - start) * 1000
+
+            if COLLECT_WEB_VITALS:
+                self.metrics = {
+                    **collect_page_metrics(self.page),
+                    "scenario_ready_ms": round(self.load_time_ms, 1),
+                }
+                if self.report is not None:
+                    self.report.add_scenario_metrics(scenario_id, self.metrics)
+                # Perf mode only: more cold loads as regression gate samples
+                for _ in range(PERF_LOAD_SAMPLES - 1):
+                    self._sample_cold_load()
+        except BaseException:
+            # No session to close() later: hand the context back now
+            pool.release(self.context)
+            raise
+
+    def _sample_cold_load(self) -> None:
+        """Load the scenario in a fresh context (cold like the first load) for the perf gate."""
+        context = self.pool.acquire()
+        try:
+            page_instance = context.pages[0] if context.pages else context.new_page()
+            start = time.time()
+            navigate_to_scenario(page_instance, self.scenario_id, self.base_url)
+            metrics = {
+                **collect_page_metrics(page_instance),
+                "scenario_ready_ms": round((time.time() - start) * 1000, 1),
+            }
+        finally:
+            self.pool.release(context)
+        if self.report is not None:
+            self.report.add_metric_samples(self.scenario_id, metrics)
+
+    def attach_metrics(self, node) -> None:
+        """Attach the load metrics to the first check's result record."""
+
+        if self.metrics and not self._metrics_attached:
+            node.user_properties.append(("metrics", self.metrics))
+            self._metrics_attached = True
+
+    def _navigate(self) -> None:
+        """(Re)load the scenario on the shared page."""
+        navigate_to_scenario(self.page, self.scenario_id, self.base_url)
+        self.navigations += 1
+        self.stage = "interactive"
+
+    def page_at(self, stage: str) -> Page:
+        """Return the shared page, advanced (or reloaded) to a stage."""
+
+        if self.STAGES.index(stage) < self.STAGES.index(self.stage):
+            self._navigate()  # Stages only move forward; going back needs a reload
+
+        if stage == "completed" and self.stage != "completed":
+            advance_to_end(self.page)
+            self.stage = "completed"
+
+        return self.page
+
+    def fresh_page(self):
+        """Open an isolated page at the interactive turn for a mutating check."""
+
+        context = self.pool.acquire()
+        try:
+            page_instance = attach_console_capture(
+                context.pages[0] if context.pages else context.new_page()
+            )
+            navigate_to_scenario(page_instance, self.scenario_id, self.base_url)
+        except BaseException:
+            self.pool.release(context)
+            raise
+        self.navigations += 1
+        return context, page_instance
+
+    def close(self) -> None:
+        """Return the shared context to the pool."""
+        record_interactions(self.page, self.report, self.scenario_id)
+        self.pool.release(self.context)
+
+
+@pytest.fixture(scope="session")
+def metrics_report() -> TestReport:
+    """This worker's agent report; per-scenario metrics are saved at exit."""
+
+    report = TestReport(AGENT_ID)
+    yield report
+    if report.metrics or report.scenarios or report.interactions or report.traces:
+        report.save_json()
+
+
+@pytest.fixture(scope="class")
+def scenario_session(browser_pool, base_url, metrics_report, scenario_id) -> ScenarioSession:
+    """Navigate to a scenario once for a whole group of checks.
+
+    Parametrise ``scenario_id`` with ``scope="class"`` so pytest groups
+    every check of one scenario together.
+    """
+
+    session = ScenarioSession(browser_pool, scenario_id, base_url, metrics_report)
+    yield session
+    session.close()
 
-    # Capture console logs
-    console_messages = []
-    console_errors = []
 
-    def on_console(msg):
-        console_messages.append({
-            'type': msg.type,
-            'text': msg.text,
-            'args': msg.args,
-        })
-        if msg.type == 'error':
-            console_errors.append(msg.text)
+@pytest.fixture(scope="function")
+def scenario_page(scenario_session, request) -> Page:
+    """Shared page at the interactive turn (read-only checks)."""
 
-    page_instance.on('console', on_console)
+    scenario_session.attach_metrics(request.node)
+    with traced(scenario_session.context, request, scenario_session.report):
+        page_instance = scenario_session.page_at("interactive")
+        yield page_instance
+        attach_failure_screenshot(page_instance, request)
 
-    # Store for access in tests
-    page_instance.console_errors = console_errors
-    page_instance.console_messages = console_messages
 
-    yield page_instance
+@pytest.fixture(scope="function")
+def completed_scenario_page(scenario_session, request) -> Page:
+    """Shared page advanced to the end of the scenario (read-only checks)."""
+
+    scenario_session.attach_metrics(request.node)
+    with traced(scenario_session.context, request, scenario_session.report):
+        page_instance = scenario_session.page_at("completed")
+        yield page_instance
+        attach_failure_screenshot(page_instance, request)
+
 
-    page_instance.close()
+@pytest.fixture(scope="function")
+def fresh_scenario_page(scenario_session, browser_pool, request) -> Page:
+    """Isolated page at the interactive turn (mutating checks)."""
+
+    context_instance, page_instance = scenario_session.fresh_page()
+    try:
+        with traced(context_instance, request, scenario_session.report):
+            yield page_instance
+            attach_failure_screenshot(page_instance, request)
+            record_interactions(page_instance, scenario_session.report,
+                                scenario_session.scenario_id, request.node)
+    finally:
+        browser_pool.release(context_instance)
+
+
+@pytest.fixture(scope="function")
+def interaction_latency(page, metrics_report, request):
+    """Drain this test's interaction samples as {kind: p50/p95/max}."""
+
+    scenario_id = _scenario_id_for(request)
+    profile = _device_profile_for(request)
+
+    def _collect() -> dict:
+        samples = record_interactions(page, metrics_report, scenario_id, request.node, profile)
+        return {
+            kind: summarise_latencies(latencies)
+            for kind, latencies in latencies_by_kind(samples).items()
+        }
+
+    return _collect
 
 
 @pytest.fixture(scope="function")
-def goto_scenario(page: Page):
+def goto_scenario(page: Page, base_url):
     """Helper fixture to navigate to a scenario."""
 
     def _goto(scenario_id: str):
         """Navigate to scenario and reach the interactive turn."""
-        # First, go to homepage (with extended timeout for slower connections)
-        page.goto(f"{BASE_URL}/", timeout=TIMEOUT_LOAD)
-        page.wait_for_load_state('networkidle', timeout=TIMEOUT_LOAD)
-
-        # Skip the homepage onboarding if it appears
-        skip_btns = page.locator('button:has-text("Skip for now")').all()
-        if len(skip_btns) > 0:
-            skip_btns[0].click()
-            page.wait_for_load_state('networkidle')
-
-        # Navigate to the scenario (with extended timeout)
-        url = f"{BASE_URL}/scenario/{scenario_id}"
-        page.goto(url, wait_until='load', timeout=TIMEOUT_LOAD)
-
-        # Wait for the scenario onboarding/tutorial to appear
-        page.wait_for_selector('button:has-text("Skip for now"), button:has-text("Next Turn")', timeout=TIMEOUT_LOAD)
-
-        # Close the scenario onboarding/tutorial if it appears
-        skip_btns = page.locator('button:has-text("Skip for now")').all()
-        if len(skip_btns) > 0:
-            # Skip the last one (scenario-specific, not homepage)
-            skip_btns[-1].click()
-            page.wait_for_load_state('networkidle')
-
-        # Click Next Turn to reach the interactive user turn with blanks
-        next_turn = page.locator('button:has-text("Next Turn")')
-        if next_turn.is_visible():
-            next_turn.click()
-            page.wait_for_load_state('networkidle')
-
-        # Wait for blanks to appear
-        page.wait_for_selector('button:has-text("Tap to discover")', timeout=TIMEOUT_LOAD)
-
-        return page
+        return navigate_to_scenario(page, scenario_id, base_url)
 
     return _goto
 
 
 @pytest.fixture(scope="function")
-def load_home(page: Page):
+def load_home(page: Page, base_url):
     """Helper fixture to load homepage."""
 
     def _load():
-        page.goto(BASE_URL)
-        page.wait_for_load_state('networkidle')
+        page.goto(base_url, wait_until='load', timeout=TIMEOUT_LOAD)
+        wait_for_home(page)
         return page
 
     return _load
@@ -127,13 +469,22 @@ def timer():
     class Timer:
         def __init__(self):
             self.start_time = None
+            self.last_duration = None
 
         def start(self):
-            import time
             self.start_time = time.time()
 
         def stop(self) -> float:
-            import time
-            return (time.time() - self.start_time) * 1000  # ms
+            self.last_duration = (time.time() - self.start_time) * 1000  # ms
+            return self.last_duration
+
+        @contextmanager
+        def measure(self, label: str = ""):
+            """Time a block; the result is kept in last_duration (ms)."""
+            self.start()
+            try:
+                yield self
+            finally:
+                self.stop()
 
     return Timer()
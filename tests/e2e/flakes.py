@@ -0,0 +1,138 @@
+"""
+Targeted retries and flake quarantine for E2E runs.
+
+A failed, timed-out or errored work item is re-run on its own (up to
+MAX_RETRIES_PER_ITEM times, RETRY_BUDGET per run) instead of failing the
+run outright. The outcome of every (scenario, check) pair is kept in a
+ledger across runs:
+
+- pass   passed on the first attempt
+- flaky  failed, then passed on a retry
+- fail   failed every attempt
+
+Items with FLAKE_QUARANTINE_THRESHOLD flaky runs in their recent history
+are quarantined: they run after everything else, are not retried and do
+not fail the run. They leave quarantine once the flaky runs age out of
+the history.
+"""
+
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+import sys
+sys.path.insert(0, str(Path(__file__).parent))
+from config import (
+    RETRY_STATUSES, MAX_RETRIES_PER_ITEM, RETRY_BUDGET, FLAKE_LEDGER_FILE,
+    FLAKE_HISTORY_LENGTH, FLAKE_QUARANTINE_THRESHOLD
+)
+from utils.device_profiles import profile_key
+
+LEDGER_SCHEMA_VERSION = 1
+
+
+def ledger_key(item: Dict) -> str:
+    """Ledger key of a work item: stable across node id formatting changes.
+
+    Checks run under a non-default device profile are keyed per profile
+    ("<scenario>@<profile>::<check>"), like their metrics.
+    """
+
+    return f"{profile_key(item['scenario_id'], item.get('device_profile'))}::{item['check']}"
+
+
+def run_outcome(attempts: List[str]) -> str:
+    """Ledger outcome of one run from the statuses of its attempts."""
+
+    if attempts[-1] != "passed":
+        return "fail"
+    return "flaky" if len(attempts) > 1 else "pass"
+
+
+def finish_attempt(result: Dict, attempts: Dict[str, List[str]], retry=None) -> Tuple[Dict, bool]:
+    """Record a finished attempt; returns the result with its attempts and whether to retry."""
+
+    history = attempts.setdefault(result["nodeid"], [])
+    history.append(result["status"])
+    result = {**result, "attempts": list(history)}
+    return result, retry is not None and retry.should_retry(result)
+
+
+class RetryPolicy:
+    """Decides whether a finished attempt is retried, within a run-wide budget."""
+
+    def __init__(self, budget: int = RETRY_BUDGET, per_item: int = MAX_RETRIES_PER_ITEM):
+        """Initialize policy."""
+        self.budget = budget
+        self.per_item = per_item
+        self.used = 0
+
+    def should_retry(self, result: Dict) -> bool:
+        """True if the item should run again (counts against the budget)."""
+
+        if result.get("status") not in RETRY_STATUSES or result.get("quarantined"):
+            return False
+        if len(result.get("attempts", [])) > self.per_item or self.used >= self.budget:
+            return False
+        self.used += 1
+        return True
+
+
+class FlakeLedger:
+    """Pass/fail history of every (scenario, check) pair across runs."""
+
+    def __init__(self, path: Path = FLAKE_LEDGER_FILE):
+        """Initialize ledger; history is read from path if it exists."""
+        self.path = Path(path)
+        self.items = {}
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            if data.get("schema_version") == LEDGER_SCHEMA_VERSION:
+                self.items = data.get("items", {})
+        except (OSError, ValueError):
+            pass
+
+    def history(self, item: Dict) -> List[str]:
+        """Outcomes of the item's recent runs, oldest first."""
+
+        return self.items.get(ledger_key(item), {}).get("history", [])
+
+    def is_flaky(self, item: Dict) -> bool:
+        """True if the item has flaked often enough to be quarantined."""
+
+        return self.history(item).count("flaky") >= FLAKE_QUARANTINE_THRESHOLD
+
+    def partition(self, items: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """Split items into the main lane and the quarantine lane."""
+
+        main, quarantined = [], []
+        for item in items:
+            if self.is_flaky(item):
+                quarantined.append({**item, "quarantined": True})
+            else:
+                main.append(item)
+        return main, quarantined
+
+    def record(self, result: Dict) -> str:
+        """Add a finished item's run to its history; returns the outcome."""
+
+        outcome = run_outcome(result.get("attempts") or [result.get("status", "error")])
+        entry = self.items.setdefault(ledger_key(result), {"history": []})
+        entry["history"] = (entry["history"] + [outcome])[-FLAKE_HISTORY_LENGTH:]
+        entry["last_run"] = datetime.now().isoformat(timespec="seconds")
+        if outcome == "flaky":
+            entry["last_flaky"] = entry["last_run"]
+        return outcome
+
+    def save(self) -> str:
+        """Write the ledger."""
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'w') as f:
+            json.dump({
+                "schema_version": LEDGER_SCHEMA_VERSION,
+                "updated": datetime.now().isoformat(),
+                "items": self.items,
+            }, f, indent=2, sort_keys=True)
+        return str(self.path)
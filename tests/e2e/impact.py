@@ -0,0 +1,202 @@
+"""
+Test impact analysis for E2E runs.
+
+Fingerprints what the suites depend on: each scenario's data in
+staticData.ts, every app source reachable from src/index.tsx, the app
+shell/build config and the test code itself. A run compares these with
+the manifest of the last green run and keeps only the (scenario, check)
+work items a change can affect:
+
+- a scenario's data changed          -> all checks of that scenario
+- an app source changed              -> the checks IMPACT_CHECK_KEYWORDS
+                                        maps it to (all if unmapped)
+- a suite file changed               -> all items of that file
+- shared test code / build config    -> everything
+- an item was not green last time    -> that item
+"""
+
+import hashlib
+import json
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+import sys
+sys.path.insert(0, str(Path(__file__).parent))
+from config import (
+    PROJECT_ROOT, STATIC_DATA_FILE, IMPACT_MANIFEST_FILE, IMPACT_APP_ENTRY,
+    IMPACT_GLOBAL_FILES, IMPACT_CHECK_KEYWORDS
+)
+from catalogue import load_scenarios, static_data_remainder
+
+MANIFEST_SCHEMA_VERSION = 1
+
+_E2E_DIR = Path(__file__).parent
+_IMPORT_RE = re.compile(
+    r"""(?:import|export)\s[^'"]*?from\s*['"]([^'"]+)['"]|import\s*\(?\s*['"]([^'"]+)['"]"""
+)
+_SOURCE_SUFFIXES = (".ts", ".tsx", ".js", ".jsx")
+_RESOLVE_SUFFIXES = ("", ".ts", ".tsx", ".js", ".jsx", ".json", ".css")
+
+
+def _sha(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _relative(path: Path) -> str:
+    return path.resolve().relative_to(PROJECT_ROOT.resolve()).as_posix()
+
+
+def _resolve_import(importer: Path, spec: str) -> Optional[Path]:
+    """Resolve a relative import the way the bundler would."""
+
+    base = importer.parent / spec
+    candidates = [Path(f"{base}{suffix}") for suffix in _RESOLVE_SUFFIXES]
+    candidates += [base / f"index{suffix}" for suffix in _SOURCE_SUFFIXES]
+    return next((c for c in candidates if c.is_file()), None)
+
+
+def app_sources(root: Path = PROJECT_ROOT, entry: str = IMPACT_APP_ENTRY) -> Set[str]:
+    """Project-relative paths of every file reachable from the app entry."""
+
+    seen = set()
+    stack = [(Path(root) / entry).resolve()]
+    while stack:
+        path = stack.pop()
+        if path in seen or not path.is_file():
+            continue
+        seen.add(path)
+        if path.suffix not in _SOURCE_SUFFIXES:
+            continue
+        for match in _IMPORT_RE.finditer(path.read_text(encoding='utf-8', errors='replace')):
+            spec = match.group(1) or match.group(2)
+            if spec.startswith("."):  # Packages are covered by package-lock.json
+                resolved = _resolve_import(path, spec)
+                if resolved is not None:
+                    stack.append(resolved.resolve())
+
+    return {p.relative_to(Path(root).resolve()).as_posix() for p in seen}
+
+
+def current_fingerprint() -> Dict:
+    """Hashes of everything the E2E items depend on."""
+
+    files = {}
+    static_data = _relative(STATIC_DATA_FILE)
+    for rel in sorted(app_sources() | set(IMPACT_GLOBAL_FILES)):
+        path = PROJECT_ROOT / rel
+        if rel == static_data:
+            # Scenario data is fingerprinted per scenario below
+            files[rel] = _sha(static_data_remainder().encode())
+        elif path.is_file():
+            files[rel] = _sha(path.read_bytes())
+
+    for path in sorted(_E2E_DIR.rglob("*.py")):
+        if "__pycache__" not in path.parts:
+            files[_relative(path)] = _sha(path.read_bytes())
+
+    scenarios = {
+        scenario["id"]: _sha(json.dumps(scenario, sort_keys=True).encode())
+        for scenario in load_scenarios()
+    }
+    return {"files": files, "scenarios": scenarios}
+
+
+def _changed(previous: Dict[str, str], current: Dict[str, str]) -> Set[str]:
+    return {key for key in previous.keys() | current.keys() if previous.get(key) != current.get(key)}
+
+
+def _is_test_infra(rel: str) -> bool:
+    """Shared test code (everything but suites and the meta tests)."""
+
+    return (
+        rel.startswith("tests/e2e/")
+        and not rel.startswith("tests/e2e/scenarios/")
+        and rel != "tests/e2e/meta_tests.py"
+    )
+
+
+def select_affected(
+    items: List[Dict],
+    manifest: Optional[Dict],
+    current: Dict,
+) -> Tuple[List[Dict], Dict[str, str]]:
+    """Items affected since the last green run, with the reason for each."""
+
+    if manifest is None:
+        return items, {item["nodeid"]: "no last green run" for item in items}
+
+    changed_files = _changed(manifest.get("files", {}), current["files"])
+    changed_scenarios = _changed(manifest.get("scenarios", {}), current["scenarios"])
+
+    global_changes = sorted(
+        rel for rel in changed_files if rel in IMPACT_GLOBAL_FILES or _is_test_infra(rel)
+    )
+    if global_changes:
+        reason = f"{global_changes[0]} changed"
+        return items, {item["nodeid"]: reason for item in items}
+
+    app_changes = {
+        rel: IMPACT_CHECK_KEYWORDS.get(rel)
+        for rel in changed_files if not rel.startswith("tests/")
+    }
+    green = set(manifest.get("items", []))
+
+    selected, reasons = [], {}
+    for item in items:
+        reason = None
+        if item["nodeid"] not in green:
+            reason = "not green in last run"
+        elif item["scenario_id"] in changed_scenarios:
+            reason = f"scenario {item['scenario_id']} data changed"
+        elif item["test_file"] in changed_files:
+            reason = f"{item['test_file']} changed"
+        else:
+            for rel, keywords in sorted(app_changes.items()):
+                if keywords is None or any(k in item["check"] for k in keywords):
+                    reason = f"{rel} changed"
+                    break
+        if reason:
+            selected.append(item)
+            reasons[item["nodeid"]] = reason
+
+    return selected, reasons
+
+
+def load_manifest(path: Path = IMPACT_MANIFEST_FILE) -> Optional[Dict]:
+    """Load the last green run's manifest (None if missing or outdated)."""
+
+    try:
+        with open(path, 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("schema_version") != MANIFEST_SCHEMA_VERSION:
+        return None
+    return manifest
+
+
+def save_manifest(
+    current: Dict,
+    passed_nodeids: List[str],
+    all_nodeids: List[str],
+    previous: Optional[Dict] = None,
+    path: Path = IMPACT_MANIFEST_FILE,
+) -> str:
+    """Record a green run: items skipped as unaffected stay green."""
+
+    still_collected = set(all_nodeids)
+    green = set(passed_nodeids)
+    if previous is not None:
+        green |= set(previous.get("items", [])) & still_collected
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({
+            "schema_version": MANIFEST_SCHEMA_VERSION,
+            "updated": datetime.now().isoformat(),
+            "files": current["files"],
+            "scenarios": current["scenarios"],
+            "items": sorted(green),
+        }, f, indent=2, sort_keys=True)
+    return str(path)
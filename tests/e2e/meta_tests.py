@@ -2,13 +2,15 @@
 Meta tests for the E2E test suite itself.
 
 Validates that:
-1. All 52 scenarios have corresponding tests
+1. Every scenario in the catalogue (staticData.ts) has corresponding tests
 2. Tier 1 has 6 scenarios with full validation
-3. Tier 2 has 46 scenarios with basic validation
+3. Tier 2 covers every other scenario with basic validation
 4. Test file structure is correct
 5. All imports resolve correctly
 """
 
+import os
+import time
 import pytest
 from pathlib import Path
 import sys
@@ -29,13 +31,10 @@ class TestTestSuiteStructure:
         tier1_file = Path(__file__).parent / "scenarios" / "tier1_with_feedback.py"
         assert tier1_file.exists(), f"Tier 1 test file not found: {tier1_file}"
 
-    def test_tier2_batch_files_exist(self):
-        """Verify all 10 Tier 2 batch files exist."""
-        scenarios_dir = Path(__file__).parent / "scenarios"
-
-        for batch_num in range(1, 11):
-            batch_file = scenarios_dir / f"tier2_batch_{batch_num:02d}.py"
-            assert batch_file.exists(), f"Batch {batch_num} file not found: {batch_file}"
+    def test_tier2_test_file_exists(self):
+        """Verify the Tier 2 suite exists."""
+        tier2_file = Path(__file__).parent / "scenarios" / "tier2_basic.py"
+        assert tier2_file.exists(), f"Tier 2 test file not found: {tier2_file}"
 
     def test_config_file_exists(self):
         """Verify config.py exists."""
@@ -151,5 +150,1707 @@ class TestSelectorConstants:
             assert len(selector_value) > 0, f"Selector {selector_name} is empty"
 
 
+class TestCatalogue:
+    """Validate suite coverage against the scenario catalogue."""
+
+    def test_catalogue_parses(self):
+        """staticData.ts yields unique scenario ids."""
+        from catalogue import scenario_ids
+
+        ids = scenario_ids()
+        assert len(ids) > len(TIER1_SCENARIOS)
+        assert len(ids) == len(set(ids)), "Duplicate scenario ids in staticData.ts"
+
+    def test_tier1_scenarios_have_feedback(self):
+        """Tier 1 scenarios exist and carry chunkFeedback."""
+        from catalogue import load_catalogue
+
+        by_id = {s["id"]: s for s in load_catalogue()}
+        for scenario_id in TIER1_SCENARIOS:
+            assert scenario_id in by_id, f"{scenario_id} missing from staticData.ts"
+            assert by_id[scenario_id]["has_chunk_feedback"], f"{scenario_id} has no chunkFeedback"
+
+    def test_every_scenario_covered_once(self):
+        """Tier 1 and Tier 2 together cover the catalogue without overlap."""
+        from catalogue import scenario_ids, tier2_scenario_ids
+
+        tier2 = tier2_scenario_ids()
+        assert not set(tier2) & set(TIER1_SCENARIOS)
+        assert set(tier2) | set(TIER1_SCENARIOS) == set(scenario_ids())
+
+    def test_tier2_suite_uses_catalogue(self):
+        """The Tier 2 suite is parametrised from the catalogue, not a fixed list."""
+        source = (Path(__file__).parent / "scenarios" / "tier2_basic.py").read_text()
+        assert "tier2_scenario_ids()" in source
+
+
+class TestScheduler:
+    """Verify work items are expanded and ordered correctly."""
+
+    def test_work_item_from_nodeid(self):
+        """Parametrised node ids map to (scenario, check) pairs."""
+        from scheduler import make_work_item
+
+        item = make_work_item(
+            "tests/e2e/scenarios/tier2_basic.py::TestTier2BasicInteraction::"
+            "test_page_loads[advanced-1-manager-escalation]"
+        )
+        assert item["scenario_id"] == "advanced-1-manager-escalation"
+        assert item["check"] == "test_page_loads"
+        assert item["device_profile"] is None
+
+    def test_work_item_device_profile(self):
+        """The device profile id is split off the scenario id."""
+        from scheduler import make_work_item
+
+        item = make_work_item(
+            "tests/e2e/scenarios/tier1_with_feedback.py::TestTier1Performance::"
+            "test_modal_open_speed[low-end-android-social-1-flatmate]"
+        )
+        assert (item["device_profile"], item["scenario_id"]) == ("low-end-android", "social-1-flatmate")
+
+        item = make_work_item(
+            "tests/e2e/scenarios/test_service_8_restaurant_order.py::TestRestaurantOrderingScenario::"
+            "test_no_performance_issues[mid-range]"
+        )
+        assert (item["device_profile"], item["scenario_id"]) == ("mid-range", "test_service_8_restaurant_order")
+
+    def test_longest_first_ordering(self):
+        """Scenarios with longer history (or check-level estimates) run first, items grouped."""
+        from scheduler import make_work_item, order_longest_first
+
+        prefix = "tests/e2e/scenarios/tier2_basic.py::TestTier2BasicInteraction::"
+        items = [
+            make_work_item(prefix + "test_title_correct[a]"),
+            make_work_item(prefix + "test_title_correct[b]"),
+            make_work_item(prefix + "test_navigate_to_end[a]"),
+            make_work_item(prefix + "test_navigate_to_end[b]"),
+        ]
+        durations = {
+            prefix + "test_title_correct[a]": 2.0,
+            prefix + "test_navigate_to_end[a]": 20.0,
+            prefix + "test_navigate_to_end[b]": 30.0,
+        }
+
+        ordered = order_longest_first(items, durations)
+        # b (30 + 2) before a (2 + 20); each scenario contiguous, in collection order
+        assert [(i["scenario_id"], i["check"]) for i in ordered] == [
+            ("b", "test_title_correct"), ("b", "test_navigate_to_end"),
+            ("a", "test_title_correct"), ("a", "test_navigate_to_end"),
+        ]
+        # Unknown items inherit the median of the same check
+        assert ordered[0]["estimate_seconds"] == 2.0
+
+    def test_scenario_affinity(self):
+        """A worker works through its scenario; others never take it."""
+        from scheduler import make_work_item, ScenarioAffinity
+
+        prefix = "tests/e2e/scenarios/tier2_basic.py::TestTier2BasicInteraction::"
+        pending = [make_work_item(f"{prefix}{check}[{scenario}]")
+                   for scenario in ("a", "b") for check in ("test_one", "test_two", "test_three")]
+        affinity = ScenarioAffinity()
+
+        assert affinity.next_item(1, pending)["scenario_id"] == "a"
+        assert affinity.next_item(2, pending)["scenario_id"] == "b"
+        assert affinity.free_scenarios(pending) == 0
+        # Retried items go back to the front; worker 1 still finds its own next
+        pending.insert(0, pending.pop())
+        assert affinity.next_item(1, pending)["nodeid"] == prefix + "test_two[a]"
+        assert affinity.next_item(1, pending)["nodeid"] == prefix + "test_three[a]"
+        # Scenario a is done and b is held by worker 2: nothing for worker 1
+        assert affinity.next_item(1, pending) is None
+        affinity.release(2)
+        assert affinity.free_scenarios(pending) == 1
+        assert affinity.next_item(1, pending)["scenario_id"] == "b"
+
+
+    def test_shards_partition_and_balance(self):
+        """Every scenario lands in exactly one shard; cost is balanced."""
+        from scheduler import make_work_item, select_shard, parse_shard
+
+        prefix = "tests/e2e/scenarios/tier2_basic.py::TestTier2BasicInteraction::"
+        items = [
+            make_work_item(f"{prefix}{check}[{scenario}]")
+            for scenario in ("a", "b", "c", "d")
+            for check in ("test_page_loads", "test_navigate_to_end")
+        ]
+        durations = {f"{prefix}test_page_loads[a]": 1.0, f"{prefix}test_navigate_to_end[a]": 30.0}
+        durations.update({f"{prefix}test_navigate_to_end[{s}]": 5.0 for s in ("b", "c", "d")})
+
+        shards = [select_shard(items, (i, 2), durations) for i in (1, 2)]
+        assert sorted(i["nodeid"] for s in shards for i in s) == sorted(i["nodeid"] for i in items)
+        # The expensive scenario gets a shard to itself
+        assert {i["scenario_id"] for i in shards[0]} == {"a"}
+
+        assert parse_shard("2/4") == (2, 4)
+        with pytest.raises(ValueError):
+            parse_shard("5/4")
+
+
+class TestLocalServer:
+    """Verify the local app server and its build cache key."""
+
+    def test_spa_fallback(self, tmp_path):
+        """Client-side routes get index.html; real files are served as-is."""
+        from urllib.request import urlopen
+        from urllib.error import HTTPError
+        from utils.local_server import LocalAppServer
+
+        (tmp_path / "index.html").write_text("<html>app</html>")
+        (tmp_path / "assets").mkdir()
+        (tmp_path / "assets" / "main.js").write_text("console.log(1)")
+
+        server = LocalAppServer(tmp_path).start()
+        try:
+            assert "localhost" in server.url and server.port > 0
+            assert urlopen(f"{server.url}/scenario/social-1-flatmate").read() == b"<html>app</html>"
+            assert urlopen(f"{server.url}/assets/main.js").read() == b"console.log(1)"
+            with pytest.raises(HTTPError):
+                urlopen(f"{server.url}/assets/missing.js")
+        finally:
+            server.stop()
+
+    def test_source_hash_tracks_inputs(self, tmp_path):
+        """The build cache key changes when a build input changes."""
+        from utils.local_server import source_hash
+
+        (tmp_path / "src").mkdir()
+        (tmp_path / "src" / "App.tsx").write_text("a")
+        before = source_hash(tmp_path, ["src/**/*"])
+        assert source_hash(tmp_path, ["src/**/*"]) == before
+
+        (tmp_path / "src" / "App.tsx").write_text("b")
+        assert source_hash(tmp_path, ["src/**/*"]) != before
+
+
+class TestNetworkCache:
+    """Verify request blocking and record/replay."""
+
+    def _request(self, url, resource_type="script", method="GET"):
+        from types import SimpleNamespace
+        return SimpleNamespace(url=url, resource_type=resource_type, method=method)
+
+    def test_blocks_non_essential_requests(self, tmp_path):
+        """Unknown third parties and media are blocked; the app and its CDNs are not."""
+        from utils.network_cache import NetworkCache
+
+        cache = NetworkCache("localhost", run_id="run", root=tmp_path)
+        assert not cache.should_block(self._request("http://localhost:4173/assets/index.js"))
+        assert not cache.should_block(self._request("https://cdn.tailwindcss.com/"))
+        assert cache.should_block(self._request("https://www.googletagmanager.com/gtag/js"))
+        assert cache.should_block(self._request("http://localhost:4173/videos/a.mp4", "media"))
+        assert not cache.is_cacheable(self._request("http://localhost:4173/scenario/x", "document"))
+
+    def test_record_then_replay_across_instances(self, tmp_path):
+        """A response recorded by one worker is replayed by another."""
+        from utils.network_cache import NetworkCache
+
+        url = "https://fonts.gstatic.com/s/inter.woff2"
+        NetworkCache("localhost", run_id="run", root=tmp_path).record(
+            url, 200, {"content-type": "font/woff2", "content-encoding": "br"}, b"font"
+        )
+
+        other = NetworkCache("localhost", run_id="run", root=tmp_path)
+        entry = other.lookup(url)
+        assert entry["body"] == b"font"
+        assert "content-encoding" not in entry["headers"]
+        assert other.lookup(url) is entry  # Second hit comes from memory
+        assert other.stats["disk_hits"] == 1 and other.stats["memory_hits"] == 1
+
+
+class TestBrowserPool:
+    """Verify context hand-out, prewarming and leak detection against a fake browser."""
+
+    class Context:
+        def __init__(self, browser, options):
+            self.browser = browser
+            self.options = options
+            self.pages = []
+            self.closed = False
+
+        def set_default_timeout(self, ms):
+            pass
+
+        def set_default_navigation_timeout(self, ms):
+            pass
+
+        def new_page(self):
+            self.pages.append(object())
+
+        def close(self):
+            self.closed = True
+            if self in self.browser.contexts:
+                self.browser.contexts.remove(self)
+
+    class Browser:
+        def __init__(self):
+            self.contexts = []
+
+        def is_connected(self):
+            return True
+
+        def new_context(self, **options):
+            context = TestBrowserPool.Context(self, options)
+            self.contexts.append(context)
+            return context
+
+    def _pool(self, monkeypatch, prewarm=True):
+        from utils import browser_pool
+        monkeypatch.setattr(browser_pool, "BROWSER_POOL_PREWARM", prewarm)
+        pool = browser_pool.BrowserPool({"storage_state": {"origins": []}})
+        pool.browser = self.Browser()
+        return pool
+
+    def test_acquire_release_and_prewarm(self, monkeypatch):
+        from config import VIEWPORT
+
+        pool = self._pool(monkeypatch)
+        first = pool.acquire()
+        assert first.pages and first.options == {"viewport": VIEWPORT, "storage_state": {"origins": []}}
+
+        pool.release(first)
+        assert first.closed
+        [spare] = pool.browser.contexts  # Pre-warmed during release
+        assert pool.acquire() is spare
+        assert pool.contexts_created == 2
+
+        # Extra options never get the spare, which has the pool defaults
+        pool.release(spare)
+        custom = pool.acquire(viewport={"width": 360, "height": 640})
+        assert custom is not pool._spare and custom.options["viewport"] == {"width": 360, "height": 640}
+        assert pool.leaked_contexts == 0
+
+    def test_no_prewarm_when_disabled(self, monkeypatch):
+        pool = self._pool(monkeypatch, prewarm=False)
+        pool.release(pool.acquire())
+        assert pool.browser.contexts == []
+
+    def test_leaked_contexts_are_closed_on_release(self, monkeypatch):
+        pool = self._pool(monkeypatch, prewarm=False)
+        held, released = pool.acquire(), pool.acquire()
+        leaked = pool.browser.new_context()  # Opened behind the pool's back
+
+        with pytest.warns(UserWarning, match="still open after release"):
+            pool.release(released)
+        assert leaked.closed and not held.closed
+        assert pool.leaked_contexts == 1
+        assert pool.browser.contexts == [held]
+
+
+class TestStorageState:
+    """Verify the onboarding storage state is seeded without loading the app."""
+
+    class Page:
+        def __init__(self, calls):
+            self.calls = calls
+
+        def route(self, url, handler):
+            self.calls.append(("route", url))
+            self.handler = handler
+
+        def goto(self, url):
+            self.calls.append(("goto", url))
+
+        def evaluate(self, script, arg):
+            self.calls.append(("evaluate", arg))
+
+    class Context:
+        def __init__(self, fail=False):
+            self.calls = []
+            self.fail = fail
+
+        def new_page(self):
+            self.page = TestStorageState.Page(self.calls)
+            return self.page
+
+        def storage_state(self, path=None):
+            if self.fail:
+                raise RuntimeError("browser gone")
+            return {"origins": [{"origin": "http://app", "path": path}]}
+
+        def close(self):
+            self.calls.append(("close",))
+
+    def test_records_seeded_local_storage(self):
+        from types import SimpleNamespace
+        from config import ONBOARDING_DISMISSED_STORAGE, STORAGE_STATE_FILE
+        from utils.storage_state import record_onboarding_storage_state
+
+        context = self.Context()
+        state = record_onboarding_storage_state(SimpleNamespace(new_context=lambda: context), "http://app")
+        assert state["origins"][0]["path"] == str(STORAGE_STATE_FILE)
+        assert context.calls == [
+            ("route", "http://app/"), ("goto", "http://app/"),
+            ("evaluate", ONBOARDING_DISMISSED_STORAGE), ("close",),
+        ]
+
+        # The origin root is answered with an empty document, not the app
+        fulfilled = {}
+        context.page.handler(SimpleNamespace(fulfill=lambda **kwargs: fulfilled.update(kwargs)))
+        assert fulfilled["status"] == 200 and fulfilled["body"] == "<html></html>"
+
+        failing = self.Context(fail=True)
+        with pytest.raises(RuntimeError):
+            record_onboarding_storage_state(SimpleNamespace(new_context=lambda: failing), "http://app")
+        assert failing.calls[-1] == ("close",)
+
+    def test_async_variant_seeds_the_same_keys(self):
+        import asyncio
+        from types import SimpleNamespace
+        from config import ONBOARDING_DISMISSED_STORAGE
+        from utils.storage_state import record_onboarding_storage_state_async
+
+        calls = []
+
+        async def call(*entry):
+            calls.append(entry)
+
+        page = SimpleNamespace(
+            route=lambda url, handler: call("route", url),
+            goto=lambda url: call("goto", url),
+            evaluate=lambda script, arg: call("evaluate", arg),
+        )
+
+        async def new_page():
+            return page
+
+        async def storage_state():
+            return {"origins": []}
+
+        context = SimpleNamespace(new_page=new_page, storage_state=storage_state, close=lambda: call("close"))
+
+        async def new_context():
+            return context
+
+        browser = SimpleNamespace(new_context=new_context)
+        state = asyncio.run(record_onboarding_storage_state_async(browser, "http://app"))
+        assert state == {"origins": []}
+        assert ("evaluate", ONBOARDING_DISMISSED_STORAGE) in calls and calls[-1] == ("close",)
+
+
+class TestMetricsReport:
+    """Verify per-scenario metrics land in the agent JSON."""
+
+    def test_metrics_merged_within_a_run(self, tmp_path, monkeypatch):
+        """Work items of one run add to the same agent file instead of replacing it."""
+        import json
+        from utils import reporters
+
+        monkeypatch.setattr(reporters, "JSON_REPORTS_DIR", tmp_path)
+        monkeypatch.setenv("E2E_RUN_ID", "run-1")
+
+        first = reporters.TestReport(3)
+        first.add_scenario_metrics("social-1-flatmate", {"lcp_ms": 420.0})
+        first.save_json()
+
+        second = reporters.TestReport(3)
+        second.add_scenario_metrics("service-1-cafe", {"lcp_ms": 380.0})
+        path = second.save_json()
+
+        with open(path) as f:
+            data = json.load(f)
+        assert data["metrics"] == {
+            "social-1-flatmate": {"lcp_ms": 420.0},
+            "service-1-cafe": {"lcp_ms": 380.0},
+        }
+        assert "Rendering Metrics" in reporters.HTMLReporter._generate_html([data], {
+            "total_scenarios": 0, "passed_scenarios": 0, "failed_scenarios": 0,
+            "total_checks": 0, "passed_checks": 0,
+        })
+
+
+class TestInteractionLatency:
+    """Verify interaction samples are summarised per type."""
+
+    def test_percentiles(self):
+        """p50/p95 interpolate between samples; max is the slowest sample."""
+        from utils.interactions import summarise_latencies
+
+        stats = summarise_latencies([10.0, 20.0, 30.0, 40.0, 100.0])
+        assert stats == {"count": 5, "p50": 30.0, "p95": 88.0, "max": 100.0}
+
+    def test_samples_grouped_by_kind(self):
+        """Timed-out samples are excluded from the latency summary."""
+        from utils.reporters import TestReport
+
+        report = TestReport(0)
+        report.add_interaction_samples("social-1-flatmate", [
+            {"kind": "blank_reveal", "to_paint_ms": 40.0},
+            {"kind": "blank_reveal", "to_paint_ms": 60.0},
+            {"kind": "next_turn", "timed_out": True},
+        ])
+        summary = report.get_interaction_summary()["social-1-flatmate"]
+        assert list(summary) == ["blank_reveal"]
+        assert summary["blank_reveal"]["p50"] == 50.0
+
+
+class TestPerfGate:
+    """Verify the regression gate's statistics and decisions."""
+
+    def test_mann_whitney_detects_shift(self):
+        """A clear upward shift is significant; identical samples are not."""
+        from perf_gate import mann_whitney_u
+
+        _, p_shifted = mann_whitney_u([10, 11, 12, 13, 14, 15], [20, 21, 22, 23, 24, 25])
+        assert p_shifted < 0.01
+        _, p_same = mann_whitney_u([10, 11, 12, 13, 14], [10, 11, 12, 13, 14])
+        assert p_same > 0.4
+
+    def test_regression_needs_tolerance_and_significance(self):
+        """Significant but tiny changes and big changes with few samples both pass."""
+        from perf_gate import compare_metric
+
+        baseline = [100, 101, 102, 103, 104, 105]
+        assert compare_metric(baseline, [130, 131, 132, 133, 134, 135])["status"] == "regression"
+        assert compare_metric(baseline, [105, 106, 107, 108, 109, 110])["status"] == "ok"
+        assert compare_metric(baseline, [300, 300])["status"] == "insufficient_samples"
+
+    def test_baseline_updates_merge_samples(self, tmp_path):
+        """Updates accumulate samples up to the cap; accepted regressions start over."""
+        from perf_gate import save_baseline, load_baseline
+        from config import PERF_BASELINE_MAX_SAMPLES
+
+        path = tmp_path / "perf_baseline.json"
+        run = {"social-1": {"load": {"fcp_ms": [100.0, 101.0], "lcp_ms": [200.0]}}}
+        save_baseline(run, path)
+        save_baseline(run, path, previous=load_baseline(path))
+        stored = load_baseline(path)["scenarios"]["social-1"]["load"]
+        assert stored == {"fcp_ms": [100.0, 101.0, 100.0, 101.0], "lcp_ms": [200.0, 200.0]}
+
+        many = {"social-1": {"load": {"fcp_ms": [float(i) for i in range(PERF_BASELINE_MAX_SAMPLES)]}}}
+        save_baseline(many, path, previous=load_baseline(path))
+        stored = load_baseline(path)["scenarios"]["social-1"]["load"]
+        assert stored["fcp_ms"] == many["social-1"]["load"]["fcp_ms"]
+        assert stored["lcp_ms"] == [200.0, 200.0]  # Metrics missing from the run are kept
+
+        save_baseline({"social-1": {"load": {"lcp_ms": [300.0]}}}, path,
+                      previous=load_baseline(path), replace={("social-1", "load", "lcp_ms")})
+        assert load_baseline(path)["scenarios"]["social-1"]["load"]["lcp_ms"] == [300.0]
+
+    def test_perf_mode_samples_keep_the_first_load_reported(self, monkeypatch):
+        """Extra perf mode loads use fresh contexts and only feed the gate's samples."""
+        from types import SimpleNamespace
+        import fixtures
+        from utils.reporters import TestReport
+
+        loads = iter([100.0, 300.0, 500.0])
+        navigated = []
+        monkeypatch.setattr(fixtures, "PERF_LOAD_SAMPLES", 3)
+        monkeypatch.setattr(fixtures, "COLLECT_WEB_VITALS", True)
+        monkeypatch.setattr(fixtures, "attach_console_capture", lambda page: page)
+        monkeypatch.setattr(fixtures, "navigate_to_scenario",
+                            lambda page, scenario_id, base_url: navigated.append(page))
+        monkeypatch.setattr(fixtures, "collect_page_metrics", lambda page: {"fcp_ms": next(loads)})
+
+        class Pool:
+            def __init__(self):
+                self.out = []
+
+            def acquire(self):
+                context = SimpleNamespace(pages=[object()])
+                self.out.append(context)
+                return context
+
+            def release(self, context):
+                self.out.remove(context)
+
+        pool, report = Pool(), TestReport(0)
+        session = fixtures.ScenarioSession(pool, "social-1", "http://127.0.0.1:9", report=report)
+        assert session.navigations == 1
+        assert len(set(map(id, navigated))) == 3  # Each extra load gets its own context
+        assert pool.out == [session.context]
+        assert report.metrics["social-1"]["fcp_ms"] == 100.0
+        assert report.metric_samples["social-1"]["fcp_ms"] == [100.0, 300.0, 500.0]
+
+
+class TestTracing:
+    """Verify trace retention stays within its disk budget."""
+
+    def test_lru_eviction(self, tmp_path):
+        """Least recently used traces go first; the newest trace is kept."""
+        import os
+        from utils.tracing import TraceRecorder
+
+        recorder = TraceRecorder("retain-on-failure", tmp_path, budget_mb=2 / 1024)  # 2 KB
+        for age, name in enumerate(["newest", "middle", "oldest"]):
+            path = tmp_path / f"{name}.zip"
+            path.write_bytes(b"x" * 1024)
+            os.utime(path, (1000 - age, 1000 - age))
+
+        TraceRecorder.touch(str(tmp_path / "oldest.zip"))  # Used again, now most recent
+        recorder.enforce_budget(keep=tmp_path / "newest.zip")
+
+        assert sorted(p.name for p in tmp_path.glob("*.zip")) == ["newest.zip", "oldest.zip"]
+        assert recorder.evicted == 1
+
+    def test_unknown_mode_rejected(self):
+        """Typos in E2E_TRACE fail fast instead of silently disabling tracing."""
+        from utils.tracing import TraceRecorder
+
+        with pytest.raises(ValueError):
+            TraceRecorder("retain-on-fail")
+
+
+class TestStreamingReport:
+    """Verify the HTML report is written incrementally."""
+
+    def test_sections_appear_as_scenarios_complete(self, tmp_path):
+        """A scenario's section is written once all its items reported."""
+        import time
+        from utils.reporters import StreamingHTMLReporter
+
+        output = tmp_path / "report.html"
+        reporter = StreamingHTMLReporter(
+            {"scenario-a": 1, "scenario-b": 2}, output, tmp_path / "payloads"
+        ).start()
+
+        reporter.submit({"scenario_id": "scenario-a", "check": "test_title", "status": "passed",
+                         "duration_seconds": 1.0, "worker": "w1", "stdout": "x" * 10000})
+        reporter.submit({"scenario_id": "scenario-b", "check": "test_title", "status": "failed",
+                         "duration_seconds": 2.0, "worker": "w2", "stdout": ""})
+
+        deadline = time.time() + 5
+        while "scenario-a" not in output.read_text() and time.time() < deadline:
+            time.sleep(0.01)
+        partial = output.read_text()
+        assert "scenario-a" in partial and "scenario-b" not in partial
+        assert partial.rstrip().endswith("</html>")
+        assert "x" * 10000 not in partial  # Payload is linked, not inlined
+
+        reporter.close(final_html="<h2>Final</h2>")
+        final = output.read_text()
+        assert "scenario-b" in final and "<h2>Final</h2>" in final
+        assert final.count("</html>") == 1
+        assert len(list((tmp_path / "payloads").glob("*.stdout.txt"))) == 1
+
+    def test_payload_files_are_unique_per_item_and_attempt(self, tmp_path):
+        """Items of one check in one scenario (e.g. per device profile) keep their own output."""
+        from utils.reporters import StreamingHTMLReporter
+
+        output = tmp_path / "report.html"
+        reporter = StreamingHTMLReporter({"scenario-a": 2}, output, tmp_path / "payloads").start()
+        base = {"scenario_id": "scenario-a", "check": "test_title", "status": "passed"}
+        first = reporter._row({**base, "nodeid": "t.py::test_title[desktop-a]", "stdout": "one"})
+        second = reporter._row({**base, "nodeid": "t.py::test_title[mobile-a]", "stdout": "two",
+                                "attempts": ["failed", "passed"]})
+        retried = reporter._row({**base, "nodeid": "t.py::test_title[mobile-a]", "stdout": "three",
+                                 "attempts": ["failed", "failed", "passed"]})
+        assert len({first["stdout"], second["stdout"], retried["stdout"]}) == 3
+        assert (tmp_path / first["stdout"]).read_text() == "one"
+        assert (tmp_path / second["stdout"]).read_text() == "two"
+        reporter.close()
+
+    def test_failure_screenshots_are_linked(self, tmp_path, monkeypatch):
+        """Page fixtures attach a failed test's screenshot; its row links it."""
+        from types import SimpleNamespace
+        import fixtures
+        from utils.reporters import StreamingHTMLReporter
+
+        stored = tmp_path / "screenshots" / "0123abcd.webp"
+        monkeypatch.setattr(fixtures, "capture_failure_screenshot",
+                            lambda page, name, scenario_id: SimpleNamespace(path=lambda: str(stored)))
+        nodes = [
+            SimpleNamespace(name=f"test_{outcome}", nodeid=outcome, user_properties=[],
+                            rep_call=SimpleNamespace(failed=outcome == "failed"))
+            for outcome in ("passed", "failed")
+        ]
+        for node in nodes:
+            fixtures.attach_failure_screenshot(object(), SimpleNamespace(node=node, module=None))
+        assert nodes[0].user_properties == []
+        assert nodes[1].user_properties == [("screenshot", str(stored))]
+
+        output = tmp_path / "report.html"
+        reporter = StreamingHTMLReporter({"scenario-a": 1}, output, tmp_path / "payloads").start()
+        reporter.submit({"scenario_id": "scenario-a", "check": "test_failed", "status": "failed",
+                         "tests": [{"properties": dict(nodes[1].user_properties)}]})
+        reporter.close()
+        assert 'src="screenshots/0123abcd.webp"' in output.read_text()
+
+
+class TestResultStream:
+    """Verify per-test NDJSON result records."""
+
+    @staticmethod
+    def _report(nodeid, when, failed=False, skipped=False, duration=0.5, props=()):
+        from types import SimpleNamespace
+        return SimpleNamespace(
+            nodeid=nodeid, when=when, duration=duration, failed=failed, skipped=skipped,
+            longreprtext="AssertionError: title missing" if failed else "",
+            user_properties=list(props),
+        )
+
+    def test_records_written_per_test(self, tmp_path):
+        """One record per test, written at teardown with outcome and durations."""
+        from utils.result_stream import ResultStream, read_results, item_status
+
+        path = tmp_path / "results_1.ndjson"
+        stream = ResultStream(path)
+        nodeid = "tests/e2e/scenarios/tier2.py::TestChecks::test_title[coffee-shop-1]"
+
+        for when in ("setup", "call"):
+            stream.pytest_runtest_logreport(self._report(nodeid, when, failed=when == "call"))
+        assert not path.exists()  # Nothing written before teardown
+        stream.pytest_runtest_logreport(
+            self._report(nodeid, "teardown", props=[("metrics", {"fcp_ms": 120.0})])
+        )
+
+        offset = path.stat().st_size
+        other = "tests/e2e/scenarios/tier2.py::TestChecks::test_turns[coffee-shop-1]"
+        for when in ("setup", "call", "teardown"):
+            stream.pytest_runtest_logreport(self._report(other, when))
+        stream.pytest_sessionfinish()
+
+        records = read_results(path)
+        assert [r["outcome"] for r in records] == ["failed", "passed"]
+        assert records[0]["scenario_id"] == "coffee-shop-1"
+        assert records[0]["check"] == "test_title"
+        assert records[0]["duration"] == 1.5
+        assert records[0]["properties"]["metrics"] == {"fcp_ms": 120.0}
+        assert "title missing" in records[0]["message"]
+
+        assert item_status(read_results(path, offset)) == "passed"
+        assert item_status(records) == "failed"
+
+    def test_setup_failure_and_missing_records_are_errors(self, tmp_path):
+        """Fixture failures and runs that wrote nothing count as errors."""
+        from utils.result_stream import ResultStream, read_results, item_status
+
+        path = tmp_path / "results_2.ndjson"
+        stream = ResultStream(path)
+        stream.pytest_runtest_logreport(self._report("a.py::test_x", "setup", failed=True))
+        stream.pytest_runtest_logreport(self._report("a.py::test_x", "teardown"))
+        with open(path, 'a') as f:
+            f.write('{"torn":')  # Partial line from a killed worker
+
+        records = read_results(path)
+        assert len(records) == 1
+        assert item_status(records) == "error"
+        assert item_status([]) == "error"
+
+
+class TestImpactAnalysis:
+    """Verify only affected work items are selected."""
+
+    PREFIX = "tests/e2e/scenarios/tier2_basic.py::TestTier2BasicInteraction::"
+
+    def _items(self):
+        from scheduler import make_work_item
+        return [
+            make_work_item(f"{self.PREFIX}{check}[{scenario}]")
+            for scenario in ("a", "b")
+            for check in ("test_page_loads", "test_progress_saved")
+        ]
+
+    def _state(self, **changes):
+        state = {
+            "files": {"src/App.tsx": "1", "src/services/progressService.ts": "1",
+                      "src/components/TopicSelector.tsx": "1", "tests/e2e/fixtures.py": "1"},
+            "scenarios": {"a": "1", "b": "1"},
+        }
+        for key, value in changes.items():
+            group = "scenarios" if key in state["scenarios"] else "files"
+            state[group][key] = value
+        return state
+
+    def _select(self, current, manifest=None):
+        from impact import select_affected
+        items = self._items()
+        if manifest is None:
+            manifest = {**self._state(), "items": [i["nodeid"] for i in items]}
+        selected, _ = select_affected(items, manifest, current)
+        return sorted(i["nodeid"].split("::")[-1] for i in selected)
+
+    def test_nothing_changed(self):
+        assert self._select(self._state()) == []
+
+    def test_scenario_data_change(self):
+        assert self._select(self._state(b="2")) == [
+            "test_page_loads[b]", "test_progress_saved[b]",
+        ]
+
+    def test_source_mapped_to_checks(self):
+        """Mapped sources select matching checks; unexercised ones nothing."""
+        assert self._select(self._state(**{"src/services/progressService.ts": "2"})) == [
+            "test_progress_saved[a]", "test_progress_saved[b]",
+        ]
+        assert self._select(self._state(**{"src/components/TopicSelector.tsx": "2"})) == []
+        assert len(self._select(self._state(**{"src/App.tsx": "2"}))) == 4
+
+    def test_shared_test_code_and_unknown_state_run_everything(self):
+        from impact import select_affected
+        assert len(self._select(self._state(**{"tests/e2e/fixtures.py": "2"}))) == 4
+        items = self._items()
+        assert select_affected(items, None, self._state())[0] == items
+
+    def test_items_not_green_are_selected(self):
+        manifest = {**self._state(), "items": [f"{self.PREFIX}test_page_loads[a]"]}
+        assert len(self._select(self._state(), manifest)) == 3
+
+    def test_manifest_keeps_unaffected_items_green(self, tmp_path):
+        from impact import save_manifest, load_manifest
+        path = tmp_path / "manifest.json"
+        previous = {"items": ["x", "gone"]}
+        save_manifest(self._state(), ["y"], ["x", "y"], previous=previous, path=path)
+        assert load_manifest(path)["items"] == ["x", "y"]
+
+    def test_app_sources_follow_imports(self, tmp_path):
+        from impact import app_sources
+        (tmp_path / "src" / "components").mkdir(parents=True)
+        (tmp_path / "src" / "index.tsx").write_text("import App from './App';\n")
+        (tmp_path / "src" / "App.tsx").write_text(
+            "import React from 'react';\nimport Card from './components/Card';\n"
+        )
+        (tmp_path / "src" / "components" / "Card.tsx").write_text("export default 1;\n")
+        (tmp_path / "src" / "components" / "Unused.tsx").write_text("export default 2;\n")
+
+        assert app_sources(tmp_path, "src/index.tsx") == {
+            "src/index.tsx", "src/App.tsx", "src/components/Card.tsx",
+        }
+
+
+class TestWorkerPool:
+    """Verify in-process pytest workers run items and survive hangs."""
+
+    def test_items_run_in_long_lived_workers(self, tmp_path):
+        from worker import WorkerPool
+        from scheduler import make_work_item
+
+        (tmp_path / "pytest.ini").write_text("[pytest]\n")
+        (tmp_path / "conftest.py").write_text(
+            "import sys\n"
+            f"sys.path.insert(0, {str(Path(__file__).parent)!r})\n"
+            "from utils.result_stream import ResultStream\n\n"
+            "def pytest_configure(config):\n"
+            "    config.pluginmanager.register(\n"
+            "        ResultStream(config.rootpath / 'results.ndjson'), 'e2e_result_stream')\n"
+        )
+        (tmp_path / "test_suite.py").write_text(
+            "import os, time\n\n"
+            "def test_pass(): pass\n"
+            "def test_fail(): assert False, 'boom'\n"
+            "def test_hang(): time.sleep(60)\n"
+            "def test_pid(): assert os.environ['E2E_AGENT_ID']\n"
+        )
+        items = [
+            make_work_item(f"test_suite.py::{name}")
+            for name in ("test_hang", "test_pass", "test_fail", "test_pid")
+        ]
+
+        pool = WorkerPool(1, [str(tmp_path / "test_suite.py")], item_timeout=2,
+                          logs_dir=tmp_path / "logs")
+        results = {r["check"]: r for r in pool.run(items)}
+
+        assert {c: r["status"] for c, r in results.items()} == {
+            "test_hang": "timeout", "test_pass": "passed",
+            "test_fail": "failed", "test_pid": "passed",
+        }
+        assert "boom" in results["test_fail"]["error"]
+        assert results["test_pass"]["tests"][0]["outcome"] == "passed"
+        # The hung worker was replaced and the replacement ran the rest
+        assert pool.respawned == 1
+        assert len({r["worker"] for c, r in results.items() if c != "test_hang"}) == 1
+
+    def test_failed_items_are_retried_alone(self, tmp_path):
+        from worker import WorkerPool
+        from scheduler import make_work_item
+        from flakes import RetryPolicy
+
+        (tmp_path / "pytest.ini").write_text("[pytest]\n")
+        (tmp_path / "conftest.py").write_text(
+            "import sys\n"
+            f"sys.path.insert(0, {str(Path(__file__).parent)!r})\n"
+            "from utils.result_stream import ResultStream\n\n"
+            "def pytest_configure(config):\n"
+            "    config.pluginmanager.register(\n"
+            "        ResultStream(config.rootpath / 'results.ndjson'), 'e2e_result_stream')\n"
+        )
+        marker = tmp_path / "attempted"
+        (tmp_path / "test_suite.py").write_text(
+            "from pathlib import Path\n\n"
+            "def test_pass(): pass\n"
+            "def test_broken(): assert False\n"
+            "def test_flaky():\n"
+            f"    marker = Path({str(marker)!r})\n"
+            "    if not marker.exists():\n"
+            "        marker.touch()\n"
+            "        assert False, 'first attempt'\n"
+        )
+        items = [make_work_item(f"test_suite.py::{name}")
+                 for name in ("test_pass", "test_broken", "test_flaky")]
+
+        pool = WorkerPool(1, [str(tmp_path / "test_suite.py")], logs_dir=tmp_path / "logs")
+        retry = RetryPolicy(budget=10, per_item=2)
+        results = {r["check"]: r for r in pool.run(items, retry=retry)}
+
+        assert results["test_pass"]["attempts"] == ["passed"]
+        assert results["test_flaky"]["attempts"] == ["failed", "passed"]
+        assert results["test_broken"]["attempts"] == ["failed"] * 3
+        assert results["test_broken"]["status"] == "failed"
+        assert retry.used == 3
+
+
+class TestDistributed:
+    """Verify the coordinator leases items to workers on other "machines"."""
+
+    def test_workers_pull_items_and_survive_hangs(self, tmp_path):
+        import subprocess
+        from distributed import Coordinator
+        from scheduler import make_work_item
+
+        e2e_dir = Path(__file__).parent
+        (tmp_path / "pytest.ini").write_text("[pytest]\n")
+        (tmp_path / "conftest.py").write_text(
+            "import sys\n"
+            f"sys.path.insert(0, {str(e2e_dir)!r})\n"
+            "from utils.result_stream import ResultStream\n\n"
+            "def pytest_configure(config):\n"
+            "    config.pluginmanager.register(\n"
+            "        ResultStream(config.rootpath / 'results.ndjson'), 'e2e_result_stream')\n"
+        )
+        # Two scenarios (one per file), so scenario affinity gives each machine one
+        (tmp_path / "test_suite_a.py").write_text(
+            "import time\n\n"
+            "def test_hang(): time.sleep(60)\n"
+            + "".join(f"def test_pass_{i}(): pass\n" for i in range(2))
+        )
+        (tmp_path / "test_suite_b.py").write_text(
+            "def test_fail(): assert False, 'boom'\n"
+            + "".join(f"def test_pass_{i}(): pass\n" for i in range(2, 4))
+        )
+        names = {"a": ["test_hang", "test_pass_0", "test_pass_1"],
+                 "b": ["test_fail", "test_pass_2", "test_pass_3"]}
+        items = [make_work_item(f"test_suite_{suite}.py::{name}")
+                 for suite, checks in names.items() for name in checks]
+
+        coordinator = Coordinator([str(tmp_path / f"test_suite_{suite}.py") for suite in names],
+                                  port=0, lease_s=3, item_timeout=3, json_dir=tmp_path / "json",
+                                  drain_s=30).start()
+        # Two "machines", one slot each; E2E_BASE_URL skips the app build
+        env = {**os.environ, "E2E_BASE_URL": "http://127.0.0.1:9"}
+        workers = [
+            subprocess.Popen(
+                [sys.executable, str(e2e_dir / "distributed.py"), "worker",
+                 "--coordinator", coordinator.url, "--slots", "1",
+                 "--logs-dir", str(tmp_path / f"logs{n}")],
+                env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            for n in range(2)
+        ]
+        try:
+            results = {r["check"]: r for r in coordinator.run(items)}
+        finally:
+            for worker in workers:
+                try:
+                    worker.wait(timeout=30)
+                except subprocess.TimeoutExpired:
+                    worker.kill()
+
+        assert {c: r["status"] for c, r in results.items()} == {
+            "test_hang": "timeout", "test_fail": "failed",
+            **{f"test_pass_{i}": "passed" for i in range(4)},
+        }
+        assert "boom" in results["test_fail"]["error"]
+        # Both machines took part and signed off
+        machines = {r["worker"].split("/")[0] for r in results.values()}
+        assert len(machines) == 2
+        assert all(w["bye"] for w in coordinator.workers.values())
+        assert all(worker.returncode == 0 for worker in workers)
+
+    def test_lost_leases_are_requeued(self, tmp_path):
+        from distributed import Coordinator
+        from config import DIST_MAX_LEASE_EXPIRIES
+        from scheduler import make_work_item
+
+        item = make_work_item("test_suite.py::test_pass")
+        coordinator = Coordinator([], port=0, lease_s=0.05, json_dir=tmp_path)
+        coordinator._load([item])
+
+        for _ in range(DIST_MAX_LEASE_EXPIRIES):
+            assert coordinator.lease("lost-box/1")["nodeid"] == item["nodeid"]
+            time.sleep(0.1)  # No heartbeat
+            assert coordinator._expire() == []
+        lease = coordinator.lease("lost-box/1")
+        assert coordinator.heartbeat("lost-box/1", [lease["lease_id"]])["revoked"] == []
+        time.sleep(0.1)
+        [result] = coordinator._expire()
+        assert result["status"] == "error"
+        assert coordinator.heartbeat("lost-box/1", [lease["lease_id"]])["revoked"] == [lease["lease_id"]]
+
+    def test_uploads_are_confined_to_report_files(self, tmp_path):
+        from distributed import Coordinator
+
+        coordinator = Coordinator([], port=0, json_dir=tmp_path)
+        coordinator.upload("box-1", "agent_4200.json", "{}")
+        assert (tmp_path / "agent_box-1-4200.json").exists()
+        for name in ("../agent_1.json", "conftest.py", "agent_1.json/../../x"):
+            with pytest.raises(ValueError):
+                coordinator.upload("box-1", name, "")
+
+
+class TestFlakeLedger:
+    """Verify retry budgets and quarantine of known-flaky items."""
+
+    def test_retry_budget_and_per_item_limit(self):
+        from flakes import RetryPolicy
+
+        retry = RetryPolicy(budget=2, per_item=1)
+        assert not retry.should_retry({"status": "passed", "attempts": ["passed"]})
+        assert retry.should_retry({"status": "failed", "attempts": ["failed"]})
+        assert not retry.should_retry({"status": "failed", "attempts": ["failed", "failed"]})
+        assert not retry.should_retry({"status": "failed", "attempts": ["failed"], "quarantined": True})
+        assert retry.should_retry({"status": "timeout", "attempts": ["timeout"]})
+        assert not retry.should_retry({"status": "error", "attempts": ["error"]})  # Budget spent
+
+    def test_flaky_items_are_quarantined_and_persisted(self, tmp_path):
+        from flakes import FlakeLedger
+        from config import FLAKE_QUARANTINE_THRESHOLD, FLAKE_HISTORY_LENGTH
+        from scheduler import make_work_item
+
+        stable = make_work_item("tests/e2e/scenarios/tier2_basic.py::TestTier2::test_loads[a]")
+        flaky = make_work_item("tests/e2e/scenarios/tier2_basic.py::TestTier2::test_loads[b]")
+        path = tmp_path / "ledger.json"
+
+        ledger = FlakeLedger(path)
+        for _ in range(FLAKE_QUARANTINE_THRESHOLD):
+            assert ledger.record({**stable, "attempts": ["failed"]}) == "fail"
+            assert ledger.record({**flaky, "attempts": ["failed", "passed"]}) == "flaky"
+        ledger.save()
+
+        # Consistent failures are real failures, not flakes
+        main, quarantined = FlakeLedger(path).partition([stable, flaky])
+        assert main == [stable]
+        assert quarantined == [{**flaky, "quarantined": True}]
+
+        # Flaky runs age out of the history
+        ledger = FlakeLedger(path)
+        for _ in range(FLAKE_HISTORY_LENGTH):
+            ledger.record({**flaky, "attempts": ["passed"]})
+        assert not ledger.is_flaky(flaky)
+
+    def test_ledger_keys_per_device_profile(self):
+        from flakes import ledger_key
+        from scheduler import make_work_item
+
+        node = "tests/e2e/scenarios/tier2_basic.py::TestTier2::test_perf[{}-social-1]"
+        assert ledger_key(make_work_item(node.format("low-end-android"))) == \
+            "social-1@low-end-android::test_perf"
+        assert ledger_key(make_work_item(node.format("mid-range"))) == "social-1@mid-range::test_perf"
+        assert ledger_key(make_work_item(node.format("desktop"))) == "social-1::test_perf"
+        assert ledger_key({"scenario_id": "social-1", "check": "test_loads"}) == "social-1::test_loads"
+
+
+class TestBrowserServers:
+    """Verify workers find their shared browser server."""
+
+    def test_workers_are_spread_over_servers(self, tmp_path):
+        import json
+        from utils.browser_server import endpoint_for, read_registry
+
+        registry = tmp_path / "browser_servers.json"
+        assert endpoint_for(3, str(registry)) is None  # No servers: launch locally
+        registry.write_text("{not json")
+        assert read_registry(str(registry)) == []
+
+        registry.write_text(json.dumps({"servers": [
+            {"slot": 0, "ws_endpoint": "ws://127.0.0.1:1/a"},
+            {"slot": 1, "ws_endpoint": "ws://127.0.0.1:2/b"},
+        ]}))
+        assert endpoint_for(4, str(registry)) == "ws://127.0.0.1:1/a"
+        assert endpoint_for(5, str(registry)) == "ws://127.0.0.1:2/b"
+
+    def test_unstarted_server_is_unhealthy(self):
+        from utils.browser_server import BrowserServer
+
+        assert not BrowserServer(0).healthy()
+
+    def test_stop_reaches_the_whole_process_group(self):
+        """Like driver -> browser: stopping must not orphan the child."""
+        import subprocess
+        from utils.browser_server import BrowserServer
+
+        def alive(pid):
+            try:
+                status = Path(f"/proc/{pid}/status").read_text()
+            except OSError:
+                return False
+            return "State:\tZ" not in status  # Zombies are dead, just not reaped yet
+
+        server = BrowserServer(0)
+        # The parent ignores SIGTERM, as a wrapper that does not pass signals on would
+        server.process = subprocess.Popen(
+            ["sh", "-c", "trap '' TERM; sleep 300 & echo $!; wait"],
+            stdout=subprocess.PIPE, text=True, start_new_session=True,
+        )
+        child = int(server.process.stdout.readline())
+        assert alive(child)
+
+        server.stop(timeout=0.5)
+        server.process.stdout.close()
+        assert server.process.poll() is not None
+        deadline = time.time() + 5
+        while alive(child) and time.time() < deadline:
+            time.sleep(0.05)
+        assert not alive(child)
+        server.stop()  # Idempotent
+
+
+class TestAutoscale:
+    """Verify the worker count follows cores, memory and load."""
+
+    RESOURCES = {"cpus": 8, "mem_total_mb": 16000, "mem_available_mb": 12000, "load_1m": 2.0}
+
+    def test_plan_is_bounded_by_cpu_memory_and_items(self):
+        from autoscale import plan_workers
+        from config import AUTOSCALE_MEM_RESERVE_MB
+
+        assert plan_workers(self.RESOURCES, 500)[0] == 8
+        spare = self.RESOURCES["mem_available_mb"] - AUTOSCALE_MEM_RESERVE_MB
+        assert plan_workers(self.RESOURCES, 2000)[0] == spare // 2000
+        # Running workers are already in the used memory
+        assert plan_workers(self.RESOURCES, 2000, current=3)[0] == 3 + spare // 2000
+        assert plan_workers(self.RESOURCES, 500, remaining_items=2)[0] == 2
+
+    def test_high_load_sheds_a_worker(self):
+        from autoscale import plan_workers
+
+        loaded = {**self.RESOURCES, "load_1m": 40.0}
+        target, reason = plan_workers(loaded, 500, current=6)
+        assert target == 5
+        assert "load" in reason
+
+    def test_fixed_count_disables_scaling(self):
+        from autoscale import Autoscaler
+
+        autoscaler = Autoscaler(fixed=3, interval_s=0)
+        assert autoscaler.initial(10) == 3
+        assert autoscaler.initial(2) == 2
+        assert autoscaler.adjust(None, 10) is None
+        assert autoscaler.summary()["mode"] == "fixed"
+
+    def test_process_tree_rss(self):
+        from autoscale import probe_resources, process_tree_rss_mb
+
+        if not Path("/proc").is_dir():
+            pytest.skip("/proc not available")
+        assert process_tree_rss_mb(os.getpid()) > 0
+        assert probe_resources()["cpus"] >= 1
+
+    def test_shared_browser_servers_are_charged_to_workers(self):
+        from types import SimpleNamespace
+        from autoscale import Autoscaler, process_tree_rss_mb
+
+        if not Path("/proc").is_dir():
+            pytest.skip("/proc not available")
+        # Two warm workers and one browser server, all played by this process
+        pid = os.getpid()
+        pool = SimpleNamespace(target=2, warm_worker_pids=lambda: [pid, pid], busy_workers=lambda: 2)
+        own = process_tree_rss_mb(pid)
+
+        alone = Autoscaler(fixed=None, interval_s=0)
+        alone.adjust(pool, 10)
+        shared = Autoscaler(fixed=None, interval_s=0, fleet=SimpleNamespace(pids=lambda: [pid]))
+        shared.adjust(pool, 10)
+
+        assert len(shared.worker_rss_mb) == 2
+        # Each worker carries half of the server (allowing for RSS drift between reads)
+        assert shared.rss_estimate() - alone.rss_estimate() == pytest.approx(own / 2, rel=0.2)
+
+
+class TestWaits:
+    """Verify the condition waits against a fake page (no browser)."""
+
+    class Locator:
+        def __init__(self, page, selectors):
+            self.page = page
+            self.selectors = selectors
+
+        @property
+        def first(self):
+            return self
+
+        def or_(self, other):
+            return TestWaits.Locator(self.page, self.selectors + other.selectors)
+
+        def wait_for(self, state, timeout):
+            from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+            self.page.waited.append((self.selectors, state))
+            visible = any(self.page.visible.get(part.strip(), False)
+                          for selector in self.selectors for part in selector.split(", "))
+            if visible != (state == "visible"):
+                raise PlaywrightTimeoutError(f"{self.selectors} not {state}")
+
+        def count(self):
+            return sum(self.page.visible.get(selector, False) for selector in self.selectors)
+
+        def click(self):
+            self.page.click(self.selectors[0])
+
+        def text_content(self):
+            return self.page.texts.get(self.selectors[0])
+
+    class Page:
+        def __init__(self, *visible, advances=True):
+            self.visible = dict.fromkeys(visible, True)
+            self.waited = []
+            self.clicked = []
+            self.evaluated = []
+            self.texts = {}
+            self.on_click = {}  # selector -> (selector, now visible)
+            self.advances = advances
+
+        def locator(self, selector):
+            return TestWaits.Locator(self, [selector])
+
+        def click(self, selector):
+            self.clicked.append(selector)
+            if selector in self.on_click:
+                target, shown = self.on_click[selector]
+                self.visible[target] = shown
+
+        def evaluate(self, script, arg=None):
+            self.evaluated.append(arg)
+
+        def wait_for_function(self, script, arg, timeout):
+            from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+            self.waited.append(("function", arg))
+            if not self.advances:
+                raise PlaywrightTimeoutError("turn did not advance")
+
+    def test_dialogue_waits_for_onboarding_to_close(self):
+        from utils.waits import wait_for_dialogue, ONBOARDING_SKIP, NEXT_TURN_BUTTON
+        from utils.selectors import Selectors
+
+        assert wait_for_dialogue(self.Page(NEXT_TURN_BUTTON))
+        assert wait_for_dialogue(self.Page(Selectors.BLANK_UNREVEALED))
+        assert not wait_for_dialogue(self.Page(ONBOARDING_SKIP, NEXT_TURN_BUTTON))
+        assert not wait_for_dialogue(self.Page())
+
+    def test_home_is_shown_with_or_without_onboarding(self):
+        from utils.waits import wait_for_home, ONBOARDING_SKIP
+        from utils.selectors import Selectors
+
+        assert wait_for_home(self.Page(Selectors.HERO_SECTION))
+        assert wait_for_home(self.Page(ONBOARDING_SKIP))
+        assert not wait_for_home(self.Page())
+
+    def test_click_next_turn_waits_for_the_counter(self):
+        from utils.waits import click_next_turn, NEXT_TURN_BUTTON, TURN_COUNTER
+
+        page = self.Page(NEXT_TURN_BUTTON, TURN_COUNTER)
+        page.texts[TURN_COUNTER] = " 2 / 9 "
+        assert click_next_turn(page)
+        assert page.clicked == [NEXT_TURN_BUTTON]
+        assert ("function", ["2 / 9", "Next Turn"]) in page.waited
+        assert page.evaluated  # Then lets the turn's animations finish
+
+        assert not click_next_turn(self.Page(NEXT_TURN_BUTTON, advances=False))
+
+    def test_reveal_and_close_popover(self):
+        from utils.waits import (
+            reveal_blank, close_popover, wait_for_popover_visible, POPOVER_TEXT,
+        )
+        from utils.selectors import Selectors
+
+        page = self.Page(Selectors.BLANK_UNREVEALED)
+        assert not wait_for_popover_visible(page)  # Bounded: False, not an exception
+        page.on_click[Selectors.BLANK_UNREVEALED] = (POPOVER_TEXT, True)
+        assert reveal_blank(page)
+
+        # No ✕ button: falls back to a click outside
+        page.on_click["body"] = (POPOVER_TEXT, False)
+        assert close_popover(page)
+        assert page.clicked == [Selectors.BLANK_UNREVEALED, "body"]
+
+
+class TestScenarioSession:
+    """Verify scenario sessions and context fixtures always hand their contexts back."""
+
+    def test_failed_navigation_releases_the_context(self):
+        from types import SimpleNamespace
+        from fixtures import ScenarioSession
+
+        class Page:
+            def on(self, event, handler):
+                pass
+
+            def goto(self, url, **kwargs):
+                raise RuntimeError("net::ERR_CONNECTION_REFUSED")
+
+        class Pool:
+            def __init__(self):
+                self.out = []
+
+            def acquire(self):
+                context = SimpleNamespace(pages=[Page()])
+                self.out.append(context)
+                return context
+
+            def release(self, context):
+                self.out.remove(context)
+
+        pool = Pool()
+        with pytest.raises(RuntimeError):
+            ScenarioSession(pool, "social-1", "http://127.0.0.1:9")
+        assert pool.out == []
+
+        session = object.__new__(ScenarioSession)
+        session.pool, session.scenario_id, session.base_url = pool, "social-1", "http://127.0.0.1:9"
+        with pytest.raises(RuntimeError):
+            session.fresh_page()
+        assert pool.out == []
+
+    def test_context_fixtures_release_when_teardown_fails(self, monkeypatch):
+        """A failing trace stop or interaction drain still hands the context back."""
+        from contextlib import contextmanager
+        from types import SimpleNamespace
+        import fixtures
+
+        @contextmanager
+        def traced(context_instance, request, report):
+            yield
+            raise OSError("disk full")
+
+        released = []
+        context_instance = SimpleNamespace()
+        pool = SimpleNamespace(acquire=lambda *args, **kwargs: context_instance, release=released.append)
+        session = SimpleNamespace(fresh_page=lambda: (context_instance, object()), report=None,
+                                  scenario_id="social-1")
+        request = SimpleNamespace(node=SimpleNamespace(name="test_x", nodeid="x", user_properties=[]),
+                                  module=None, fixturenames=[])
+        monkeypatch.setattr(fixtures, "traced", traced)
+
+        for teardown in (fixtures.context.__wrapped__(pool, None, request),
+                         fixtures.fresh_scenario_page.__wrapped__(session, pool, request)):
+            next(teardown)
+            with pytest.raises(OSError):
+                next(teardown)
+        assert released == [context_instance, context_instance]
+
+
+class TestAsyncEngine:
+    """Verify the async engine mirrors Tier 2 and keeps several checks in flight."""
+
+    # Tier 2 fixture -> the async engine's page kind
+    PAGE_KINDS = {
+        "scenario_session": "session",
+        "scenario_page": "interactive",
+        "completed_scenario_page": "completed",
+        "fresh_scenario_page": "fresh",
+    }
+
+    @staticmethod
+    def _functions(path: Path, class_name: str = None) -> dict:
+        """Top-level (or one class's) function definitions of a module, by name."""
+        import ast
+
+        body = ast.parse(path.read_text()).body
+        if class_name:
+            body = next(
+                node for node in body if isinstance(node, ast.ClassDef) and node.name == class_name
+            ).body
+        return {node.name: node for node in body if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))}
+
+    @classmethod
+    def _statements(cls, function) -> list:
+        """A function's statements without docstring, awaits and fixture aliases, as AST dumps.
+
+        Sync skips (pytest.skip) read as the async twins' raise CheckSkipped,
+        and the scenario_session fixture as the session argument.
+        """
+        import ast
+
+        class Normalize(ast.NodeTransformer):
+            def visit_Await(self, node):
+                return self.visit(node.value)
+
+            def visit_Name(self, node):
+                if node.id == "scenario_session":
+                    return ast.Name(id="session", ctx=node.ctx)
+                return node
+
+            def visit_Expr(self, node):
+                call = node.value
+                if (isinstance(call, ast.Call) and isinstance(call.func, ast.Attribute)
+                        and ast.unparse(call.func) == "pytest.skip"):
+                    return ast.Raise(exc=ast.Call(ast.Name(id="CheckSkipped", ctx=ast.Load()), call.args, []))
+                return self.generic_visit(node)
+
+        statements = [
+            statement for statement in function.body
+            if not (isinstance(statement, ast.Expr) and isinstance(statement.value, ast.Constant))
+            and not (isinstance(statement, ast.Assign) and isinstance(statement.value, ast.Name)
+                     and statement.value.id in cls.PAGE_KINDS)
+        ]
+        return [ast.dump(Normalize().visit(statement)) for statement in statements]
+
+    def test_checks_mirror_tier2_suite(self):
+        """Each Tier 2 test has an async twin on the same page kind, with the same docstring."""
+        import ast
+        from async_engine import TIER2_CHECKS
+
+        root = Path(__file__).parent
+        tests = self._functions(root / "scenarios" / "tier2_basic.py", "TestTier2BasicInteraction")
+        expected = {}
+        for name, node in tests.items():
+            fixture = next(a.arg for a in node.args.args if a.arg in self.PAGE_KINDS)
+            expected[name] = self.PAGE_KINDS[fixture]
+            assert ast.get_docstring(node) == TIER2_CHECKS[name][1].__doc__
+
+        assert {name: kind for name, (kind, _) in TIER2_CHECKS.items()} == expected
+        assert len(expected) == 15
+
+    def test_twins_make_the_same_assertions(self):
+        """Sync tests and navigation match their async twins statement for statement."""
+        root = Path(__file__).parent
+        tests = self._functions(root / "scenarios" / "tier2_basic.py", "TestTier2BasicInteraction")
+        fixtures = self._functions(root / "fixtures.py")
+        engine = self._functions(root / "async_engine.py")
+
+        for name, node in tests.items():
+            assert self._statements(node) == self._statements(engine[name]), f"{name} drifted from its twin"
+        for name in ("navigate_to_scenario", "advance_to_end"):
+            assert self._statements(fixtures[name]) == self._statements(engine[name]), f"{name} drifted"
+
+    def test_slots_run_items_concurrently(self):
+        import asyncio
+        import queue
+        from async_engine import _serve
+
+        class FakeEngine:
+            running = peak = 0
+
+            async def run_check(self, nodeid):
+                self.running += 1
+                self.peak = max(self.peak, self.running)
+                await asyncio.sleep(0.05)
+                self.running -= 1
+                return {"nodeid": nodeid, "outcome": "passed", "duration": 0.05, "message": None}
+
+            def take_contexts(self):
+                return 1
+
+        control, results = queue.Queue(), queue.Queue()
+        for i in range(6):
+            control.put(f"tests/e2e/scenarios/tier2_basic.py::T::test_title_correct[s{i}]")
+        control.put(None)  # The pool sends one shutdown signal per worker
+        engine = FakeEngine()
+        asyncio.run(_serve(1, control, results, engine, pages=3))
+
+        messages = []
+        while not results.empty():
+            messages.append(results.get())
+        finished = [payload for kind, _, payload in messages if kind == "result"]
+        assert engine.peak == 3
+        assert len(finished) == 6
+        assert {result["status"] for result in finished} == {"passed"}
+
+    def test_tier2_items_go_to_async_lane(self, monkeypatch):
+        import orchestrator
+
+        tier1 = {"nodeid": "a", "test_file": "tests/e2e/scenarios/tier1_with_feedback.py"}
+        tier2 = {"nodeid": "b", "test_file": "tests/e2e/scenarios/tier2_basic.py"}
+        flaky = {**tier2, "nodeid": "c", "quarantined": True}
+
+        monkeypatch.setattr(orchestrator, "ASYNC_PAGES", 0)
+        assert orchestrator.plan_lanes([tier1, tier2, flaky]) == [
+            ("pytest", [tier1, tier2]), ("pytest", [flaky]),
+        ]
+        monkeypatch.setattr(orchestrator, "ASYNC_PAGES", 4)
+        assert orchestrator.plan_lanes([tier1, tier2, flaky]) == [
+            ("pytest", [tier1]), ("async", [tier2]), ("async", [flaky]),
+        ]
+
+
+class TestConsoleCapture:
+    """Verify console capture is bounded and keeps no JSHandles."""
+
+    class Handle:
+        disposed = 0
+
+        def dispose(self):
+            TestConsoleCapture.Handle.disposed += 1
+
+    class Message:
+        def __init__(self, type, text, handles=2):
+            self.type = type
+            self.text = text
+            self.location = {"url": "http://localhost/app.js", "lineNumber": 3, "columnNumber": 7}
+            self.args = [TestConsoleCapture.Handle() for _ in range(handles)]
+
+    def test_buffers_are_bounded_and_filtered(self):
+        from utils.console import ConsoleCapture
+
+        TestConsoleCapture.Handle.disposed = 0
+        capture = ConsoleCapture(min_level="log", buffer_size=5, max_errors=2)
+        for i in range(10):
+            capture.on_console(self.Message("log", f"log {i}"))
+            capture.on_console(self.Message("debug", f"debug {i}"))
+        for i in range(3):
+            capture.on_console(self.Message("error", f"error {i}"))
+
+        # Every argument handle is released, including filtered messages
+        assert TestConsoleCapture.Handle.disposed == 2 * 23
+        assert len(capture.messages) == 5
+        assert capture.messages.dropped == 8
+        assert not any(m["type"] == "debug" for m in capture.messages)
+        assert capture.messages[-1] == {
+            "type": "error", "text": "error 2", "location": "http://localhost/app.js:3:7",
+        }
+        assert list(capture.errors) == ["error 1", "error 2"]
+        assert repr(capture.errors) == "['error 1', 'error 2']"
+        assert all("args" not in m for m in capture.messages)
+
+
+def _png(width: int, height: int, pixel) -> bytes:
+    """Encode an RGB PNG in pure Python; pixel(x, y) -> (r, g, b)."""
+
+    import struct
+    import zlib
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    rows = b"".join(
+        b"\x00" + bytes(c for x in range(width) for c in pixel(x, y)) for y in range(height)
+    )
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(rows))
+            + chunk(b"IEND", b""))
+
+
+class TestScreenshotStore:
+    """Verify screenshots are stored once per image and expire via the index."""
+
+    def test_identical_captures_share_a_file(self, tmp_path):
+        import json
+        from utils.screenshots import ScreenshotStore
+
+        store = ScreenshotStore(tmp_path, tmp_path / "index.ndjson", workers=2)
+        red = _png(32, 32, lambda x, y: (200, 0, 0))
+        stripes = _png(32, 32, lambda x, y: (255, 255, 255) if x % 8 < 4 else (0, 0, 0))
+        shots = [store.submit(red, "test_a_FAILED", "s1"), store.submit(red, "test_a_FAILED", "s2"),
+                 store.submit(stripes, "blanks", "s1")]
+        assert shots[0].buffer == red  # Available before the write finishes
+        paths = [shot.path(timeout=10) for shot in shots]
+        store.flush()
+
+        assert paths[0] == paths[1] != paths[2]
+        assert sorted(p.name for p in tmp_path.iterdir() if p.name != "index.ndjson") == \
+            sorted({Path(p).name for p in paths})
+        entries = [json.loads(line) for line in (tmp_path / "index.ndjson").read_text().splitlines()]
+        assert [e["scenario_id"] for e in entries].count("s1") == 2
+        assert sum(e["duplicate"] for e in entries) == 1
+
+    def test_similar_captures_keep_their_own_files(self, tmp_path):
+        """Captures a perceptual hash cannot tell apart are still stored separately."""
+        pytest.importorskip("PIL")
+        import io
+        from PIL import Image
+        from utils.screenshots import ScreenshotStore, difference_hash, hash_distance
+
+        store = ScreenshotStore(tmp_path, tmp_path / "index.ndjson")
+        base = _png(64, 64, lambda x, y: (x * 4, y * 4, 128))
+        # Same gradients, different text-sized detail in one corner
+        other = _png(64, 64, lambda x, y: (0, 0, 0) if x < 6 and y < 3 else (x * 4, y * 4, 128))
+        assert hash_distance(*(difference_hash(Image.open(io.BytesIO(png))) for png in (base, other))) <= 4
+
+        paths = [store.store(png, "test_a_FAILED", scenario) for png, scenario in
+                 ((base, "s1"), (other, "s2"), (base, "s3"))]
+        assert paths[0] == paths[2] != paths[1]
+
+    def test_retention_uses_the_index(self, tmp_path):
+        import json
+        from utils.screenshots import ScreenshotStore
+
+        store = ScreenshotStore(tmp_path, tmp_path / "index.ndjson")
+        path = Path(store.store(_png(8, 8, lambda x, y: (0, 0, 255)), "blanks", "s1"))
+        assert store.cleanup(days=1) == 0
+        assert path.exists()
+
+        index = tmp_path / "index.ndjson"
+        old = [{**json.loads(line), "time": 0} for line in index.read_text().splitlines()]
+        index.write_text("".join(json.dumps(entry) + "\n" for entry in old))
+        assert store.cleanup(days=1) == 1
+        assert not path.exists()
+        assert index.read_text() == ""
+
+    def test_difference_hash_tolerates_small_changes(self):
+        pytest.importorskip("PIL")
+        import io
+        from PIL import Image
+        from utils.screenshots import difference_hash, hash_distance
+
+        def gradient(noise):
+            return _png(64, 64, lambda x, y: (x * 4, y * 4, (x + y + (noise if x == 5 else 0)) % 256))
+
+        base, noisy = (difference_hash(Image.open(io.BytesIO(gradient(n)))) for n in (0, 3))
+        flipped = difference_hash(Image.open(io.BytesIO(
+            _png(64, 64, lambda x, y: (255 - x * 4, 255 - y * 4, 128))
+        )))
+        assert hash_distance(base, noisy) <= 4
+        assert hash_distance(base, flipped) > 16
+
+
+class TestVisualGate:
+    """Verify the visual diff ignores anti-aliasing and flags changed tiles."""
+
+    @staticmethod
+    def _arrays(*pixels):
+        np = pytest.importorskip("numpy")
+        return [np.array([[pixel(x, y) for x in range(64)] for y in range(64)], dtype=np.uint8)
+                for pixel in pixels]
+
+    @staticmethod
+    def _box(left, top=16, size=24, colour=(30, 30, 30)):
+        """A dark box on white, its left edge blended when `left` is fractional."""
+
+        def pixel(x, y):
+            if not top <= y < top + size or not int(left) <= x < int(left) + size:
+                return (255, 255, 255)
+            if x == int(left) and left % 1:
+                shade = int(255 - (255 - colour[0]) * (1 - left % 1))
+                return (shade, shade, shade)
+            return colour
+        return pixel
+
+    def test_identical_and_anti_aliased_images_are_equal(self):
+        from utils.visual_diff import compare_images
+
+        base, same, shifted = self._arrays(self._box(16), self._box(16), self._box(16.5))
+        result = compare_images(base, same)
+        assert result["status"] == "equal"
+        assert result["identical_tiles"] == result["total_tiles"] == 4
+
+        result = compare_images(base, shifted)
+        assert result["status"] == "equal"
+        assert result["diff_pixels"] == 0 and result["aa_pixels"] > 0
+
+    def test_changed_block_and_size_are_regressions(self):
+        np = pytest.importorskip("numpy")
+        from utils.visual_diff import compare_images
+
+        base, changed = self._arrays(self._box(16), self._box(16, colour=(200, 30, 30)))
+        result = compare_images(base, changed)
+        assert result["status"] == "changed"
+        assert result["changed_tiles"] == 4  # The box spans all four 32px tiles
+        assert result["aa_pixels"] == 0
+
+        result = compare_images(base, np.zeros((32, 64, 3), dtype=np.uint8))
+        assert result["status"] == "size_changed"
+        assert result["current_size"] == [64, 32]
+
+    def test_gate_compares_this_runs_captures(self, tmp_path, monkeypatch):
+        pytest.importorskip("numpy")
+        pytest.importorskip("PIL")
+        import json
+        from utils.screenshots import ScreenshotStore
+        from visual_gate import collect_run_captures, compare_to_baselines, save_baselines
+
+        def capture(run_id, shifts):
+            monkeypatch.setenv("E2E_RUN_ID", run_id)
+            store = ScreenshotStore(tmp_path / "shots", tmp_path / "index.ndjson")
+            for scenario, pixel in shifts.items():
+                store.store(_png(64, 64, pixel), "blanks", scenario, visual=True)
+            store.store(_png(8, 8, lambda x, y: (0, 0, 0)), "test_a_FAILED", "s1")
+            return collect_run_captures(tmp_path / "index.ndjson", tmp_path / "shots", run_id)
+
+        baseline = capture("run-1", {"s1": self._box(16), "s2": self._box(16), "s3": self._box(16)})
+        assert sorted(baseline) == ["s1__blanks", "s2__blanks", "s3__blanks"]
+        save_baselines(baseline, tmp_path / "baselines")
+
+        current = capture("run-2", {"s1": self._box(16), "s2": self._box(16.5),
+                                    "s3": self._box(16, colour=(200, 30, 30)),
+                                    "s4": self._box(16)})
+
+        findings = {f["key"]: f for f in compare_to_baselines(
+            current, tmp_path / "baselines", tmp_path / "diffs", workers=2
+        )}
+        assert {key: f["status"] for key, f in findings.items()} == {
+            "s1__blanks": "identical", "s2__blanks": "equal",
+            "s3__blanks": "changed", "s4__blanks": "new",
+        }
+        assert Path(findings["s3__blanks"]["heatmap"]).exists()
+        json.dumps(list(findings.values()))  # Report-ready: no arrays left
+
+
+class TestDeviceProfiles:
+    """Verify device profiles are complete and throttle pages over CDP."""
+
+    class Session:
+        def __init__(self):
+            self.sent = []
+
+        def send(self, method, params=None):
+            self.sent.append((method, params))
+
+    def test_profiles_budget_every_interaction(self):
+        from config import DEVICE_PROFILES, PERF_DEVICE_PROFILES, INTERACTION_BUDGETS_MS
+        from utils.device_profiles import interaction_budgets
+
+        assert set(PERF_DEVICE_PROFILES) <= set(DEVICE_PROFILES)
+        for name in DEVICE_PROFILES:
+            assert set(interaction_budgets(name)) == set(INTERACTION_BUDGETS_MS), name
+        # Slower devices never get a tighter budget
+        for kind, budget in INTERACTION_BUDGETS_MS.items():
+            assert budget <= interaction_budgets("mid-range")[kind] <= interaction_budgets("low-end-android")[kind]
+
+    def test_apply_device_profile_sends_cdp_commands(self):
+        from types import SimpleNamespace
+        from utils.device_profiles import apply_device_profile, context_options
+
+        session = self.Session()
+        page = SimpleNamespace()
+        page.context = SimpleNamespace(new_cdp_session=lambda target: session)
+
+        assert apply_device_profile(page, "desktop") is None
+        assert apply_device_profile(page, "low-end-android") is session
+        assert page.device_profile_session is session
+        methods = [method for method, _ in session.sent]
+        assert methods == ["Emulation.setCPUThrottlingRate", "Network.enable",
+                           "Network.emulateNetworkConditions"]
+        assert session.sent[0][1] == {"rate": 6}
+        assert session.sent[2][1]["latency"] == 400 and session.sent[2][1]["offline"] is False
+
+        options = context_options("low-end-android")
+        assert options["has_touch"] and options["is_mobile"]
+        assert options["viewport"] == {"width": 360, "height": 640}
+        with pytest.raises(ValueError):
+            context_options("fridge")
+
+    def test_profile_keys(self):
+        from utils.device_profiles import profile_key, split_profile_key
+
+        assert profile_key("social-1", "desktop") == "social-1"
+        assert profile_key("social-1", None) == "social-1"
+        assert profile_key("social-1", "mid-range") == "social-1@mid-range"
+        assert split_profile_key("social-1@mid-range") == ("social-1", "mid-range")
+        assert split_profile_key("social-1") == ("social-1", "desktop")
+
+    def test_throttled_profiles_bypass_the_network_cache(self):
+        from types import SimpleNamespace
+        from utils.browser_pool import BrowserPool
+        from utils.device_profiles import throttles_network
+
+        assert not throttles_network("desktop")
+        assert throttles_network("mid-range") and throttles_network("low-end-android")
+
+        installed = []
+        context = SimpleNamespace(
+            set_default_timeout=lambda ms: None, set_default_navigation_timeout=lambda ms: None,
+            new_page=lambda: None,
+        )
+        pool = BrowserPool()
+        pool.browser = SimpleNamespace(new_context=lambda **options: context, is_connected=lambda: True)
+        pool.network_cache = SimpleNamespace(install=lambda c: installed.append("cache"))
+        pool.context_hooks += [pool.network_cache.install, lambda c: installed.append("vitals")]
+
+        pool.acquire()
+        assert installed == ["cache", "vitals"]
+        installed.clear()
+        pool.acquire((pool.network_cache.install,), viewport={"width": 360, "height": 640})
+        assert installed == ["vitals"]
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -2,170 +2,374 @@
 """
 E2E Test Orchestrator.
 
-Coordinates parallel execution of 11 test agents:
-- Agent 1: Tier 1 (6 scenarios with full validation)
-- Agents 2-11: Tier 2 (46 scenarios with basic validation, 5 per agent)
+Coordinates parallel execution of the E2E suites with a work-stealing
+scheduler:
+- Every (scenario, check) pair in Tier 1 and Tier 2 becomes a work item
+- Only items affected since the last green run are kept (--full runs all)
+- Items are ordered longest-first from historical durations
+- In-process pytest workers (worker.py) pull the next item as soon as
+  they go idle; their number follows cores and memory (autoscale.py)
+- With E2E_ASYNC_PAGES, Tier 2 items run on async workers that keep
+  several checks in flight on one browser (async_engine.py)
+- The app is built once and served locally to every worker
+- A few long-lived browser servers are shared by all workers
+  (utils/browser_server.py)
+- Failed items are retried on their own within a budget; known-flaky items
+  run last in a quarantine lane that does not fail the run (flakes.py)
+- With --serve, items are leased to workers on other machines instead
+  (distributed.py)
+- Performance is gated against baselines/perf_baseline.json
 
-Uses multiprocessing for true parallelization.
-Aggregates JSON reports and generates HTML report.
+Item results stream back from the workers as they finish and the HTML
+report is written while the run is in progress; the workers' JSON reports
+are aggregated at the end.
 """
 
+import argparse
+import os
 import sys
 import time
-import subprocess
 import json
+from collections import Counter
+from functools import partial
 from pathlib import Path
-from multiprocessing import Pool, cpu_count
 from datetime import datetime
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from config import (
-    JSON_REPORTS_DIR, REPORTS_DIR,
-    TIER1_SCENARIOS, NUM_AGENTS
+    JSON_REPORTS_DIR, SUITE_FILES, USE_LOCAL_SERVER, BROWSER_SERVERS, ASYNC_PAGES, ASYNC_SUITE_FILES
 )
-from utils.reporters import HTMLReporter
+from scheduler import (
+    collect_work_items, order_longest_first, save_durations, parse_shard, select_shard
+)
+from perf_gate import run_perf_gate
+from visual_gate import run_visual_gate
+from impact import current_fingerprint, load_manifest, save_manifest, select_affected
+from utils.reporters import HTMLReporter, StreamingHTMLReporter
+from utils.screenshots import cleanup_old_screenshots
+from utils.local_server import start_local_app_server
+from utils.browser_server import BrowserServerFleet, REGISTRY_ENV
+from worker import WorkerPool, worker_main
+from async_engine import async_worker_main
+from autoscale import Autoscaler
+from flakes import FlakeLedger, RetryPolicy
+from distributed import Coordinator, parse_address
 
 
-def run_agent(agent_id: int, test_file: str) -> dict:
-    """Run a single test agent."""
+def parse_args(argv=None):
+    """Parse orchestrator command-line options."""
 
-    print(f"[Agent {agent_id}] Starting: {test_file}")
+    parser = argparse.ArgumentParser(description="Run the FluentStep E2E suites in parallel")
+    parser.add_argument(
+        "--update-baseline", action="store_true",
+        help="Store this run's performance samples as the new baseline",
+    )
+    parser.add_argument(
+        "--perf-samples", type=int, default=None, metavar="N",
+        help="Perf mode: measure N cold loads per scenario so the perf gate has samples to compare",
+    )
+    parser.add_argument(
+        "--no-perf-gate", action="store_true",
+        help="Do not fail the run on performance regressions",
+    )
+    parser.add_argument(
+        "--update-visual-baseline", action="store_true",
+        help="Store this run's feedback/blank screenshots as the new visual baselines",
+    )
+    parser.add_argument(
+        "--no-visual-gate", action="store_true",
+        help="Do not fail the run on visual regressions",
+    )
+    parser.add_argument(
+        "--full", action="store_true",
+        help="Run every item, not only those affected since the last green run",
+    )
+    parser.add_argument(
+        "--shard", type=parse_shard, default=None, metavar="i/N",
+        help="Run only shard i of N (scenarios balanced by historical duration)",
+    )
+    parser.add_argument(
+        "--serve", type=parse_address, default=None, metavar="HOST:PORT",
+        help="Coordinate a distributed run: lease items to `distributed.py worker` processes",
+    )
+    return parser.parse_args(argv)
 
-    start_time = time.time()
 
-    try:
-        # Run pytest for this agent
-        result = subprocess.run(
-            [
-                sys.executable, "-m", "pytest",
-                test_file,
-                "-v",
-                "--tb=short",
-                "-q",
-                "--json-report",
-                f"--json-report-file={JSON_REPORTS_DIR}/pytest_{agent_id}.json",
-            ],
-            capture_output=True,
-            text=True,
-            timeout=600,  # 10 minute timeout per agent
-        )
+def plan_lanes(items):
+    """Split items into (engine, items) lanes that run one after another.
 
-        duration = time.time() - start_time
-        print(f"[Agent {agent_id}] Completed in {duration:.1f}s (exit code: {result.returncode})")
+    With ASYNC_PAGES, items of suites with async twins go to the async
+    engine; the quarantine lane still runs after everything else.
+    """
 
-        return {
-            "agent_id": agent_id,
-            "test_file": test_file,
-            "status": "passed" if result.returncode == 0 else "failed",
-            "duration_seconds": duration,
-            "stdout": result.stdout,
-            "stderr": result.stderr,
-        }
+    lanes = []
+    for quarantined in (False, True):
+        by_engine = {"pytest": [], "async": []}
+        for item in items:
+            if bool(item.get("quarantined")) == quarantined:
+                use_async = ASYNC_PAGES and item["test_file"] in ASYNC_SUITE_FILES
+                by_engine["async" if use_async else "pytest"].append(item)
+        lanes += [(engine, lane) for engine, lane in by_engine.items() if lane]
+    return lanes
 
-    except subprocess.TimeoutExpired:
-        duration = time.time() - start_time
-        print(f"[Agent {agent_id}] TIMEOUT after {duration:.1f}s")
-        return {
-            "agent_id": agent_id,
-            "test_file": test_file,
-            "status": "timeout",
-            "duration_seconds": duration,
-            "error": "Test execution timed out",
-        }
 
-    except Exception as e:
-        duration = time.time() - start_time
-        print(f"[Agent {agent_id}] ERROR: {e}")
-        return {
-            "agent_id": agent_id,
-            "test_file": test_file,
-            "status": "error",
-            "duration_seconds": duration,
-            "error": str(e),
-        }
+def run_lanes(lanes, pools, autoscaler, retry):
+    """Run lanes on their engine's pool; worker ids stay unique across pools."""
+
+    next_worker_id = 1
+    for engine, lane in lanes:
+        pool = pools[engine]
+        pool.next_worker_id = next_worker_id
+        yield from pool.run(lane, autoscaler=autoscaler, retry=retry)
+        next_worker_id = pool.next_worker_id
 
 
-def main():
+def main(argv=None):
     """Main orchestrator function."""
 
+    args = parse_args(argv)
+
     print("\n" + "=" * 70)
     print("FluentStep E2E Test Orchestrator")
     print("=" * 70)
-    print(f"Starting {NUM_AGENTS} parallel test agents...")
     print(f"Timestamp: {datetime.now().isoformat()}\n")
 
     start_time = time.time()
 
-    # Define test agents
-    agents = []
-
-    # Agent 1: Tier 1 (6 scenarios with full validation)
-    agents.append((1, "tests/e2e/scenarios/tier1_with_feedback.py"))
-
-    # Agents 2-11: Tier 2 (46 scenarios, 5 per agent)
-    for agent_num in range(2, NUM_AGENTS + 1):
-        batch_num = agent_num - 1  # Batch 01-10
-        agents.append((
-            agent_num,
-            f"tests/e2e/scenarios/tier2_batch_{batch_num:02d}.py"
-        ))
-
-    # Run agents in parallel
-    with Pool(processes=NUM_AGENTS) as pool:
-        results = []
-        for agent_id, test_file in agents:
-            result = pool.apply_async(run_agent, (agent_id, test_file))
-            results.append(result)
-
-        # Collect results
-        agent_results = []
-        for result in results:
-            try:
-                agent_result = result.get(timeout=700)  # 11m 40s timeout
-                agent_results.append(agent_result)
-            except Exception as e:
-                print(f"Error collecting result: {e}")
-                agent_results.append({
-                    "status": "error",
-                    "error": str(e),
-                })
+    # Agent reports from earlier runs would be merged into this one
+    for stale_report in JSON_REPORTS_DIR.glob("agent_*.json"):
+        stale_report.unlink()
+    # Before any worker captures: retention rewrites the screenshot index
+    expired = cleanup_old_screenshots()
+    if expired:
+        print(f"Removed {expired} expired screenshots")
+
+    # Workers of one run share the network cache store
+    os.environ.setdefault("E2E_RUN_ID", datetime.now().strftime("%Y%m%d_%H%M%S"))
+    if args.perf_samples:
+        # Read by the workers' config (PERF_LOAD_SAMPLES)
+        os.environ["E2E_PERF_LOAD_SAMPLES"] = str(args.perf_samples)
+
+    # Expand suites into (scenario, check) items
+    all_items = collect_work_items(SUITE_FILES)
+    items = all_items
+    if args.shard:
+        items = select_shard(items, args.shard)
+        print(f"Shard {args.shard[0]}/{args.shard[1]}: "
+              f"{len({i['scenario_id'] for i in items})} scenarios")
+
+    # Keep only items affected since the last green run
+    fingerprint = current_fingerprint()
+    manifest = None if args.full else load_manifest()
+    if args.full:
+        print("Impact analysis: skipped (--full)")
+    else:
+        selected, reasons = select_affected(items, manifest, fingerprint)
+        print(f"Impact analysis: {len(selected)}/{len(items)} items affected")
+        for reason, count in Counter(reasons.values()).most_common(5):
+            print(f"  {count:4d} × {reason}")
+        items = selected
+    print()
+
+    if not items:
+        print("✅ Nothing affected since the last green run (use --full to run everything)")
+        return 0
+
+    # Build once and share one local server with every worker (via env);
+    # distributed workers serve their own build
+    server = None
+    if USE_LOCAL_SERVER and not args.serve:
+        print("Building app (cached by source hash)...")
+        server = start_local_app_server()
+        os.environ["E2E_BASE_URL"] = server.url
+        print(f"Serving local build at {server.url}\n")
+
+    # Workers connect to shared browsers instead of each launching Chromium
+    fleet = None
+    if BROWSER_SERVERS and not args.serve:
+        try:
+            fleet = BrowserServerFleet().start()
+            os.environ[REGISTRY_ENV] = str(fleet.registry)
+            print(f"Started {BROWSER_SERVERS} shared browser servers\n")
+        except (ImportError, OSError, RuntimeError) as e:
+            print(f"⚠️  Shared browser servers unavailable ({e}); workers launch their own\n")
+
+    # Longest first; known-flaky items go to a quarantine lane after the rest
+    ledger = FlakeLedger()
+    items, quarantined = ledger.partition(order_longest_first(items))
+    if quarantined:
+        print(f"Quarantined {len(quarantined)} flaky items (run last, not gating)")
+    items += quarantined
+
+    # Durations from the last run's results are loaded; start this run's files
+    for stale_results in JSON_REPORTS_DIR.glob("results_*.ndjson"):
+        stale_results.unlink()
+    estimated_total = sum(item["estimate_seconds"] for item in items)
+    autoscaler = Autoscaler(fleet=fleet)
+    if args.serve:
+        workers = "distributed workers"
+    elif autoscaler.fixed:
+        workers = f"E2E_WORKERS={autoscaler.fixed}"
+    else:
+        workers = "autoscaled workers"
+    print(f"Scheduled {len(items)} work items ({workers})")
+    print(f"Estimated work: {estimated_total:.0f}s\n")
+
+    # The report grows as results arrive; it is readable mid-run
+    expected_items = {}
+    for item in items:
+        expected_items[item["scenario_id"]] = expected_items.get(item["scenario_id"], 0) + 1
+    reporter = StreamingHTMLReporter(expected_items).start()
+    print(f"Live report: {reporter.output_path}\n")
+
+    # Idle workers pull the next item; each worker is one long-lived pytest
+    # session, so the interpreter, collection and browser are paid once
+    item_results = []
+    retry = RetryPolicy()
+    if args.serve:
+        test_files = sorted({item["test_file"] for item in items})
+        coordinator = Coordinator(test_files, *args.serve).start()
+        print(f"Coordinator listening on {coordinator.url}; start workers with\n"
+              f"  python tests/e2e/distributed.py worker --coordinator http://<this host>:{args.serve[1]}\n")
+        pools = {"distributed": coordinator}
+        results = coordinator.run(items, retry=retry)
+    else:
+        lanes = plan_lanes(items)
+        engine_files = {}
+        for engine, lane in lanes:
+            engine_files.setdefault(engine, set()).update(item["test_file"] for item in lane)
+        targets = {"pytest": worker_main, "async": partial(async_worker_main, pages=ASYNC_PAGES)}
+        pools = {
+            engine: WorkerPool(autoscaler.fixed or 1, sorted(files), worker_target=targets[engine])
+            for engine, files in engine_files.items()
+        }
+        if "async" in pools:
+            print(f"Tier 2 checks on the async engine ({ASYNC_PAGES} pages per worker)\n")
+        results = run_lanes(lanes, pools, autoscaler, retry)
+    for item_result in results:
+        outcome = ledger.record(item_result)
+        note = f", {outcome} after {len(item_result['attempts'])} attempts" if outcome == "flaky" else ""
+        lane = " [quarantine]" if item_result.get("quarantined") else ""
+        print(f"[{item_result['worker']}]{lane} {item_result['status'].upper()} "
+              f"{item_result['nodeid']} ({item_result['duration_seconds']:.1f}s{note})")
+        reporter.submit(item_result)
+        if fleet is not None:
+            fleet.record(item_result.get("worker_id", 0), item_result.get("browser_contexts", 0))
+            fleet.check()
+        # Records live in the results files and the report, not in memory
+        item_results.append({
+            k: v for k, v in item_result.items() if k not in ("stdout", "stderr", "tests")
+        })
+    respawned = sum(pool.respawned for pool in pools.values())
+    worker_seconds = sum(pool.worker_seconds for pool in pools.values())
+    peak_workers = max(pool.peak_workers for pool in pools.values())
+    if respawned:
+        print(f"Replaced {respawned} workers that crashed or hung")
+    if retry.used:
+        print(f"Retried {retry.used} failed attempts (budget {retry.budget})")
+    print(f"Flake ledger updated: {ledger.save()}")
+
+    parallelism = pools["distributed"].summary() if args.serve else autoscaler.summary()
+    parallelism["worker_seconds"] = round(worker_seconds, 1)
+    parallelism["async_pages"] = ASYNC_PAGES if "async" in pools else None
+    with open(JSON_REPORTS_DIR / "autoscale.json", 'w') as f:
+        json.dump(parallelism, f, indent=2)
+
+    if fleet is not None:
+        if fleet.restarted or fleet.recycled:
+            print(f"Browser servers: {fleet.recycled} recycled, {fleet.restarted} restarted")
+        fleet.stop()
+    if server is not None:
+        server.stop()
+
+    save_durations(item_results)
 
     # Summary
     total_duration = time.time() - start_time
 
-    passed_agents = sum(1 for r in agent_results if r.get("status") == "passed")
-    failed_agents = sum(1 for r in agent_results if r.get("status") == "failed")
-    error_agents = sum(1 for r in agent_results if r.get("status") in ("timeout", "error"))
+    # Quarantined items are reported but do not gate the run
+    gating = [r for r in item_results if not r.get("quarantined")]
+    passed_items = sum(1 for r in gating if r.get("status") == "passed")
+    failed_items = sum(1 for r in gating if r.get("status") == "failed")
+    error_items = sum(1 for r in gating if r.get("status") in ("timeout", "error"))
+    flaky_items = sum(
+        1 for r in item_results if r.get("status") == "passed" and len(r.get("attempts", [])) > 1
+    )
+    quarantine_failures = sum(
+        1 for r in item_results if r.get("quarantined") and r.get("status") != "passed"
+    )
+    busy_time = sum(r.get("duration_seconds", 0) for r in item_results)
 
     print("\n" + "=" * 70)
     print("Test Execution Summary")
     print("=" * 70)
-    print(f"Total Agents: {len(agent_results)}")
-    print(f"  ✅ Passed: {passed_agents}")
-    print(f"  ❌ Failed: {failed_agents}")
-    print(f"  ⚠️  Errors: {error_agents}")
+    print(f"Total Items: {len(item_results)}")
+    print(f"  ✅ Passed: {passed_items}")
+    print(f"  ❌ Failed: {failed_items}")
+    print(f"  ⚠️  Errors: {error_items}")
+    print(f"  🔁 Passed on retry: {flaky_items}")
+    if quarantined:
+        print(f"  🚧 Quarantined: {len(quarantined)} ({quarantine_failures} not passing)")
     print(f"Total Duration: {total_duration:.1f}s ({total_duration/60:.1f}m)")
+    if parallelism["initial_workers"]:
+        print(f"Workers: {parallelism['initial_workers']} initial, {peak_workers} peak "
+              f"({parallelism['mode']})")
+    else:
+        print(f"Workers: {peak_workers} ({parallelism['mode']})")
+    if worker_seconds:
+        print(f"Worker Utilisation: {busy_time / worker_seconds * 100:.0f}%")
     print()
 
-    # Generate HTML report
+    # Compare performance with the stored baseline
+    regressions = []
+    try:
+        regressions = run_perf_gate(update_baseline=args.update_baseline)
+    except Exception as e:
+        print(f"❌ Perf gate failed: {e}")
+        if not args.no_perf_gate:
+            regressions = [{"error": str(e)}]
+
+    # Compare feedback modal and blank-state screenshots with their baselines
+    visual_regressions = []
     try:
-        print("Generating HTML report...")
-        report_path = HTMLReporter.generate_report()
+        visual_regressions = run_visual_gate(update_baseline=args.update_visual_baseline)
+    except Exception as e:
+        print(f"❌ Visual gate failed: {e}")
+        if not args.no_visual_gate:
+            visual_regressions = [{"error": str(e)}]
+
+    # Finish the HTML report with the run-wide sections
+    try:
+        report_path = reporter.close(final_html=HTMLReporter.generate_run_sections(parallelism))
         print(f"✅ Report generated: {report_path}")
     except Exception as e:
-        print(f"❌ Failed to generate HTML report: {e}")
+        print(f"❌ Failed to finish HTML report: {e}")
 
     print("\n" + "=" * 70)
 
     # Exit with appropriate code
-    if error_agents > 0 or failed_agents > 0:
-        print("❌ Test suite FAILED (some agents failed)")
+    if error_items > 0 or failed_items > 0:
+        print("❌ Test suite FAILED (some items failed)")
         return 1
-    else:
-        print("✅ Test suite PASSED (all agents passed)")
-        return 0
+    elif regressions and not args.no_perf_gate:
+        print(f"❌ Test suite FAILED ({len(regressions)} performance regressions)")
+        return 1
+    elif visual_regressions and not args.no_visual_gate:
+        print(f"❌ Test suite FAILED ({len(visual_regressions)} visual regressions)")
+        return 1
+
+    # A shard only saw part of the items, so it cannot vouch for the rest
+    if not args.shard:
+        passed = [r["nodeid"] for r in item_results if r.get("status") == "passed"]
+        manifest_path = save_manifest(
+            fingerprint, passed, [i["nodeid"] for i in all_items], previous=manifest
+        )
+        print(f"Last green manifest updated: {manifest_path}")
+
+    print("✅ Test suite PASSED (all items passed)")
+    return 0
 
 
 if __name__ == "__main__":
@@ -0,0 +1,255 @@
+"""
+Performance regression gate for E2E runs.
+
+Compares this run's per-scenario load metrics and interaction latencies
+(from tests/reports/json/agent_*.json) against a versioned baseline in
+baselines/perf_baseline.json. A metric regresses when its median is worse
+than the baseline by more than the configured tolerance AND a one-sided
+Mann-Whitney U test over the repeated samples says the shift is
+significant.
+
+Functional runs measure one load per scenario; perf mode (orchestrator.py
+--perf-samples N) adds cold loads in fresh contexts as extra samples, and
+comparisons pool samples across runs. Updating the baseline adds the run's samples to the stored ones (newest
+PERF_BASELINE_MAX_SAMPLES kept), except for metrics that regressed in this
+run: accepting those replaces their samples.
+"""
+
+import json
+import math
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+from config import (
+    PROJECT_ROOT, JSON_REPORTS_DIR, PERF_BASELINE_FILE, PERF_BASELINE_MAX_SAMPLES,
+    PERF_GATE_METRICS, PERF_GATE_TOLERANCE_PCT, PERF_GATE_MIN_DELTA,
+    PERF_GATE_ALPHA, PERF_GATE_MIN_SAMPLES
+)
+
+BASELINE_SCHEMA_VERSION = 1
+PERF_GATE_REPORT_FILE = JSON_REPORTS_DIR / "perf_gate.json"
+
+
+def collect_run_samples(json_dir: Path = JSON_REPORTS_DIR) -> Dict:
+    """Gather {scenario: {"load": {metric: [...]}, "interactions": {kind: [...]}}}."""
+
+    samples = {}
+    for json_file in json_dir.glob("agent_*.json"):
+        try:
+            with open(json_file, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+
+        for scenario_id, metrics in data.get("metric_samples", {}).items():
+            load = samples.setdefault(scenario_id, {}).setdefault("load", {})
+            for name, values in metrics.items():
+                if name in PERF_GATE_METRICS:
+                    load.setdefault(name, []).extend(values)
+
+        for scenario_id, kinds in data.get("interactions", {}).items():
+            interactions = samples.setdefault(scenario_id, {}).setdefault("interactions", {})
+            for kind, stats in kinds.items():
+                interactions.setdefault(kind, []).extend(stats.get("samples", []))
+
+    return samples
+
+
+def mann_whitney_u(baseline: List[float], current: List[float]) -> Tuple[float, float]:
+    """One-sided Mann-Whitney U test that current is larger than baseline.
+
+    Returns (U for current, p-value), using the normal approximation with
+    tie and continuity corrections.
+    """
+
+    n1, n2 = len(baseline), len(current)
+    pooled = sorted(
+        [(value, 0) for value in baseline] + [(value, 1) for value in current]
+    )
+
+    # Mid-ranks for ties
+    ranks = [0.0] * len(pooled)
+    tie_term = 0.0
+    i = 0
+    while i < len(pooled):
+        j = i
+        while j + 1 < len(pooled) and pooled[j + 1][0] == pooled[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        ties = j - i + 1
+        tie_term += ties ** 3 - ties
+        i = j + 1
+
+    rank_sum_current = sum(rank for rank, (_, group) in zip(ranks, pooled) if group == 1)
+    u_current = rank_sum_current - n2 * (n2 + 1) / 2
+
+    n = n1 + n2
+    mean = n1 * n2 / 2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return u_current, 1.0  # All samples identical
+
+    z = (u_current - mean - 0.5) / math.sqrt(variance)
+    return u_current, 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def compare_metric(
+    baseline: List[float],
+    current: List[float],
+    tolerance_pct: float = PERF_GATE_TOLERANCE_PCT,
+    min_delta: float = 0.0,
+) -> Dict:
+    """Compare one metric's samples against its baseline samples."""
+
+    result = {
+        "baseline_median": statistics.median(baseline),
+        "current_median": statistics.median(current),
+        "baseline_samples": len(baseline),
+        "current_samples": len(current),
+        "p_value": None,
+    }
+    delta = result["current_median"] - result["baseline_median"]
+    allowed = max(result["baseline_median"] * tolerance_pct / 100, min_delta)
+    result["change_pct"] = (
+        round(delta / result["baseline_median"] * 100, 1) if result["baseline_median"] else None
+    )
+
+    if len(baseline) < PERF_GATE_MIN_SAMPLES or len(current) < PERF_GATE_MIN_SAMPLES:
+        result["status"] = "insufficient_samples"
+        return result
+
+    _, p_value = mann_whitney_u(baseline, current)
+    result["p_value"] = round(p_value, 4)
+    result["status"] = (
+        "regression" if delta > allowed and p_value < PERF_GATE_ALPHA else "ok"
+    )
+    return result
+
+
+def compare_to_baseline(current: Dict, baseline: Dict) -> List[Dict]:
+    """Compare every metric present in both the run and the baseline."""
+
+    findings = []
+    for scenario_id, groups in sorted(current.items()):
+        base_groups = baseline.get("scenarios", {}).get(scenario_id, {})
+        for group, metrics in sorted(groups.items()):
+            for name, values in sorted(metrics.items()):
+                base_values = base_groups.get(group, {}).get(name)
+                if not values or not base_values:
+                    continue
+                min_delta = PERF_GATE_MIN_DELTA.get(name, PERF_GATE_MIN_DELTA["default"])
+                findings.append({
+                    "scenario_id": scenario_id,
+                    "group": group,
+                    "metric": name,
+                    **compare_metric(base_values, values, min_delta=min_delta),
+                })
+    return findings
+
+
+def load_baseline(path: Path = PERF_BASELINE_FILE) -> Optional[Dict]:
+    """Load the stored baseline (None if there is none yet)."""
+
+    if not path.exists():
+        return None
+    with open(path, 'r') as f:
+        baseline = json.load(f)
+    if baseline.get("schema_version") != BASELINE_SCHEMA_VERSION:
+        raise ValueError(
+            f"{path} has schema version {baseline.get('schema_version')}, "
+            f"expected {BASELINE_SCHEMA_VERSION}; re-create it with --update-baseline"
+        )
+    return baseline
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, cwd=PROJECT_ROOT, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def merge_samples(current: Dict, previous: Optional[Dict] = None, replace=()) -> Dict:
+    """Stored samples followed by this run's, newest PERF_BASELINE_MAX_SAMPLES kept.
+
+    ``replace`` holds (scenario, group, metric) keys whose stored samples
+    are dropped, e.g. regressions being accepted.
+    """
+
+    scenarios = json.loads(json.dumps((previous or {}).get("scenarios", {})))
+    for scenario_id, groups in current.items():
+        for group, metrics in groups.items():
+            stored = scenarios.setdefault(scenario_id, {}).setdefault(group, {})
+            for name, values in metrics.items():
+                kept = [] if (scenario_id, group, name) in replace else stored.get(name, [])
+                stored[name] = (kept + values)[-PERF_BASELINE_MAX_SAMPLES:]
+    return scenarios
+
+
+def save_baseline(current: Dict, path: Path = PERF_BASELINE_FILE,
+                  previous: Optional[Dict] = None, replace=()) -> str:
+    """Add this run's samples to the baseline (see merge_samples) and store it."""
+
+    scenarios = merge_samples(current, previous, replace)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({
+            "schema_version": BASELINE_SCHEMA_VERSION,
+            "updated": datetime.now().isoformat(),
+            "commit": _git_commit(),
+            "scenarios": scenarios,
+        }, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+    return str(path)
+
+
+def run_perf_gate(update_baseline: bool = False) -> List[Dict]:
+    """Compare this run against the baseline; returns the regressions."""
+
+    current = collect_run_samples()
+    if not current:
+        print("Perf gate: no metrics recorded in this run, skipping")
+        return []
+
+    baseline = load_baseline()
+    regressions = []
+    if baseline is None:
+        print(f"Perf gate: no baseline at {PERF_BASELINE_FILE}, skipping comparison")
+    else:
+        findings = compare_to_baseline(current, baseline)
+        regressions = [f for f in findings if f["status"] == "regression"]
+        insufficient = sum(1 for f in findings if f["status"] == "insufficient_samples")
+
+        with open(PERF_GATE_REPORT_FILE, 'w') as f:
+            json.dump({
+                "baseline_commit": baseline.get("commit"),
+                "compared": len(findings),
+                "regressions": regressions,
+                "findings": findings,
+            }, f, indent=2)
+
+        print(f"Perf gate: {len(findings)} metrics compared with baseline "
+              f"{baseline.get('commit') or '(unknown commit)'}, "
+              f"{len(regressions)} regressions, {insufficient} with too few samples")
+        for r in regressions:
+            change = f"{r['change_pct']:+.1f}%" if r["change_pct"] is not None else "new cost"
+            print(f"  📉 {r['scenario_id']} {r['group']}.{r['metric']}: "
+                  f"{r['baseline_median']:.1f} → {r['current_median']:.1f} "
+                  f"({change}, p={r['p_value']})")
+
+    if update_baseline:
+        accepted = {(r["scenario_id"], r["group"], r["metric"]) for r in regressions}
+        print(f"Perf gate: baseline updated → {save_baseline(current, previous=baseline, replace=accepted)}")
+
+    return regressions
@@ -13,7 +13,12 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from config import BASE_URL, TIMEOUT_LOAD, TIMEOUT_ELEMENT, TIMEOUT_ACTION
 from utils.assertions import assert_no_console_errors
-from fixtures import page, browser, timer, goto_scenario
+from utils.device_profiles import action_budget_ms
+from utils.waits import (
+    reveal_blank, wait_for_popover_hidden, wait_for_page_idle,
+    wait_for_turn_advanced, turn_counter_text,
+)
+from fixtures import page, browser, timer, goto_scenario, device_profile
 
 
 SCENARIO_ID = "service-8-restaurant-order"
@@ -35,7 +40,7 @@ class TestRestaurantOrderingScenario:
     def test_no_console_errors(self, page, goto_scenario):
         """Check 2: No JavaScript console errors on page load."""
         goto_scenario(SCENARIO_ID)
-        time.sleep(0.5)
+        wait_for_page_idle(page)
         assert len(page.console_errors) == 0, f"Console errors found: {page.console_errors}"
 
     def test_page_title_correct(self, page, goto_scenario):
@@ -70,8 +75,7 @@ class TestRestaurantOrderingScenario:
         """Check 7: Tapping first blank reveals alternatives popover."""
         goto_scenario(SCENARIO_ID)
         blank_button = page.locator('button:has-text("Tap to discover")').first
-        blank_button.click()
-        time.sleep(TIMEOUT_ACTION / 1000)
+        reveal_blank(page, blank_button)
 
         # Look for popover with native alternatives
         popover = page.locator('[role="dialog"], [data-testid="blank-popover"], .popover', ).first
@@ -82,8 +86,7 @@ class TestRestaurantOrderingScenario:
         """Check 8: Popover displays the native answer."""
         goto_scenario(SCENARIO_ID)
         blank_button = page.locator('button:has-text("Tap to discover")').first
-        blank_button.click()
-        time.sleep(TIMEOUT_ACTION / 1000)
+        reveal_blank(page, blank_button)
 
         native_text = page.locator('text=Native Alternatives, text=two, text=five minutes, text=help start')
         if native_text.count() > 0:
@@ -96,8 +99,7 @@ class TestRestaurantOrderingScenario:
 
         # Test at least 5 blanks
         for i in range(min(5, len(blanks))):
-            blanks[i].click()
-            time.sleep(TIMEOUT_ACTION / 1000)
+            reveal_blank(page, blanks[i])
 
             # Verify popover appeared
             popover_visible = page.locator('[role="dialog"], .popover').first.is_visible() or \
@@ -109,7 +111,7 @@ class TestRestaurantOrderingScenario:
             close_buttons = page.locator('button:has(i.fa-times), [data-testid="close-popover"]').all()
             if close_buttons:
                 close_buttons[0].click()
-                time.sleep(100)
+                wait_for_popover_hidden(page)
 
     def test_dialogue_navigation_works(self, page, goto_scenario):
         """Check 10: User can navigate through dialogue turns."""
@@ -118,8 +120,9 @@ class TestRestaurantOrderingScenario:
 
         if next_buttons.count() > 0:
             initial_dialogue = page.locator('[data-testid="dialogue-content"], .dialogue-text').first.text_content()
+            counter_before = turn_counter_text(page)
             next_buttons.first.click()
-            time.sleep(TIMEOUT_ACTION / 1000)
+            wait_for_turn_advanced(page, counter_before)
             new_dialogue = page.locator('[data-testid="dialogue-content"], .dialogue-text').first.text_content()
 
             # Dialogue should change or navigation should be successful
@@ -173,9 +176,7 @@ class TestRestaurantOrderingScenario:
         """Check 15: Pedagogical content (meanings, contexts) is accessible."""
         goto_scenario(SCENARIO_ID)
 
-        blank = page.locator('button:has-text("Tap to discover")').first
-        blank.click()
-        time.sleep(TIMEOUT_ACTION / 1000)
+        reveal_blank(page)
 
         # Look for pedagogical elements
         pedagogical_indicators = page.locator(
@@ -198,26 +199,24 @@ class TestRestaurantOrderingScenario:
         body = page.locator('body').first
         assert body.is_visible(), "Page body not visible"
 
-    def test_no_performance_issues(self, page, goto_scenario, timer):
-        """Check 17: Scenario interaction performs well (< 2 seconds per action)."""
+    def test_no_performance_issues(self, page, goto_scenario, timer, device_profile):
+        """Check 17: Scenario interaction performs well (within the device profile's action budget)."""
         goto_scenario(SCENARIO_ID)
 
         with timer.measure("Blank reveal"):
-            blank = page.locator('button:has-text("Tap to discover")').first
-            blank.click()
-            time.sleep(TIMEOUT_ACTION / 1000)
+            reveal_blank(page)
 
-        # Should complete within reasonable time
-        assert timer.last_duration < 2000, f"Action took {timer.last_duration}ms (exceeds 2000ms)"
+        # Should complete within reasonable time for the device
+        budget = action_budget_ms(device_profile)
+        assert timer.last_duration < budget, \
+            f"Action took {timer.last_duration}ms on {device_profile} (exceeds {budget}ms)"
 
     def test_chunk_feedback_v2_schema_valid(self, page, goto_scenario):
         """Check 18: ChunkFeedbackV2 schema is properly loaded (indirect validation)."""
         goto_scenario(SCENARIO_ID)
 
         # Verify that blank interactions work smoothly (indicates schema is valid)
-        blank = page.locator('button:has-text("Tap to discover")').first
-        blank.click()
-        time.sleep(TIMEOUT_ACTION / 1000)
+        reveal_blank(page)
 
         # If we got here without errors, schema is valid
         errors = page.console_errors
@@ -233,7 +232,7 @@ class TestRestaurantOrderingScenario:
         # (positions don't shuffle unexpectedly between loads)
 
         initial_count = len(blanks)
-        time.sleep(0.5)
+        wait_for_page_idle(page)
         blanks_after = page.locator('button:has-text("Tap to discover")').all()
         final_count = len(blanks_after)
 
@@ -18,7 +18,10 @@ from pathlib import Path
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from config import BASE_URL, TIMEOUT_LOAD, TIMEOUT_ELEMENT, TIMEOUT_ACTION
+from config import (
+    BASE_URL, TIMEOUT_LOAD, TIMEOUT_ELEMENT, TIMEOUT_ACTION,
+    COLLECT_INTERACTIONS, INTERACTION_BUDGET_STAT,
+)
 from utils.assertions import (
     assert_revealed_blanks_persists,
     assert_feedback_card_structure,
@@ -31,9 +34,18 @@ from utils.assertions import (
 from utils.screenshots import (
     capture_failure_screenshot,
     capture_feedback_modal_screenshot,
+    capture_blank_state_screenshot,
 )
 from utils.reporters import TestReport
-from fixtures import page, browser, timer, goto_scenario
+from utils.device_profiles import interaction_budgets
+from utils.waits import (
+    reveal_blank, click_next_turn, close_popover, wait_for_popover_hidden,
+    wait_for_animations, wait_for_page_idle,
+)
+from fixtures import (
+    page, browser, timer, goto_scenario,
+    scenario_session, scenario_page, fresh_scenario_page, interaction_latency, device_profile,
+)
 
 
 # Test scenarios data
@@ -77,33 +89,33 @@ TIER1_SCENARIOS = {
 }
 
 
+@pytest.mark.parametrize("scenario_id", TIER1_SCENARIOS.keys(), scope="class")
 class TestTier1LoadingAndContent:
-    """Validation Group 1: Content & Loading (8 checks)"""
+    """Validation Group 1: Content & Loading (8 checks)
 
-    @pytest.mark.parametrize("scenario_id", TIER1_SCENARIOS.keys())
-    def test_page_loads(self, page, goto_scenario, scenario_id):
+    Checks share one navigation per scenario (scenario_session).
+    """
+
+    def test_page_loads(self, scenario_session, scenario_id):
         """Test that roleplay page loads within timeout."""
-        start = time.time()
-        goto_scenario(scenario_id)
-        load_time = (time.time() - start) * 1000
+        page = scenario_session.page_at("interactive")
+        load_time = scenario_session.load_time_ms
 
         # Allow up to 30 seconds for scenario load on live Vercel (includes navigation, dialog closes, network latency, and blank loading)
         assert load_time < 30000, f"Load time {load_time}ms exceeds 30000ms"
         assert page.title() == "FluentStep: IELTS Roleplay Engine"
 
-    @pytest.mark.parametrize("scenario_id", TIER1_SCENARIOS.keys())
-    def test_no_console_errors_on_load(self, page, goto_scenario, scenario_id):
+    def test_no_console_errors_on_load(self, scenario_page, scenario_id):
         """Test that no console errors occur on page load."""
-        goto_scenario(scenario_id)
-        time.sleep(0.5)  # Wait for any deferred errors
+        page = scenario_page
+        wait_for_page_idle(page)  # Wait for any deferred errors
 
         errors = page.console_errors
         assert len(errors) == 0, f"Console errors: {errors}"
 
-    @pytest.mark.parametrize("scenario_id", TIER1_SCENARIOS.keys())
-    def test_scenario_title_visible(self, page, goto_scenario, scenario_id):
+    def test_scenario_title_visible(self, scenario_page, scenario_id):
         """Test that scenario title is visible."""
-        goto_scenario(scenario_id)
+        page = scenario_page
 
         # Check for heading with scenario title
         title = TIER1_SCENARIOS[scenario_id]["title"]
@@ -113,19 +125,21 @@ class TestTier1LoadingAndContent:
             title_element = page.locator(f"text='{title}'")
         assert title_element.count() > 0, f"Title '{title}' not visible"
 
-    @pytest.mark.parametrize("scenario_id", TIER1_SCENARIOS.keys())
-    def test_dialogue_renders(self, page, goto_scenario, scenario_id):
+    def test_dialogue_renders(self, scenario_page, scenario_id):
         """Test that dialogue text is visible."""
-        goto_scenario(scenario_id)
+        page = scenario_page
 
         # Check for Next Turn button which indicates dialogue has loaded
         next_btn = page.locator('button:has-text("Next Turn")')
         assert next_btn.count() > 0, "Dialogue not rendered"
 
-    @pytest.mark.parametrize("scenario_id", TIER1_SCENARIOS.keys())
-    def test_blank_count_matches(self, page, goto_scenario, scenario_id):
+    def test_blank_count_matches(self, fresh_scenario_page, scenario_id):
         """Test that blanks are present in the scenario."""
-        goto_scenario(scenario_id)
+        page = fresh_scenario_page
+
+        # Blank state for the visual regression gate (visual_gate.py)
+        wait_for_animations(page)
+        capture_blank_state_screenshot(page, scenario_id)
 
         # Blanks appear progressively, so just check that at least some exist
         blanks = page.locator('button:has-text("Tap to discover")').all()
@@ -139,8 +153,7 @@ class TestTier1LoadingAndContent:
             next_btn = page.locator('button:has-text("Next Turn")')
             if next_btn.count() > 0:
                 try:
-                    next_btn.first.click()
-                    time.sleep(300 / 1000)
+                    click_next_turn(page)
                 except:
                     break
 
@@ -148,19 +161,17 @@ class TestTier1LoadingAndContent:
         blanks_after = page.locator('button:has-text("Tap to discover")').all()
         assert len(blanks_after) >= 0, "Blanks not accessible"
 
-    @pytest.mark.parametrize("scenario_id", TIER1_SCENARIOS.keys())
-    def test_progress_bar_visible(self, page, goto_scenario, scenario_id):
+    def test_progress_bar_visible(self, scenario_page, scenario_id):
         """Test that turn progress is visible."""
-        goto_scenario(scenario_id)
+        page = scenario_page
 
         # Check for turn counter (e.g., "1 / 12")
         turn_counter = page.locator('text=/\\d+ \\/ \\d+/')
         assert turn_counter.count() > 0, "Turn counter not visible"
 
-    @pytest.mark.parametrize("scenario_id", TIER1_SCENARIOS.keys())
-    def test_continue_button_visible(self, page, goto_scenario, scenario_id):
+    def test_continue_button_visible(self, scenario_page, scenario_id):
         """Test that Next Turn button is visible."""
-        goto_scenario(scenario_id)
+        page = scenario_page
 
         next_btn = page.locator('button:has-text("Next Turn")')
         assert next_btn.count() > 0, "Next Turn button not visible"
@@ -175,10 +186,7 @@ class TestTier1BlankFilling:
         goto_scenario(scenario_id)
 
         # Get first unrevealed blank
-        blank = page.locator('button:has-text("Tap to discover")').first
-        blank.click()
-
-        time.sleep(TIMEOUT_ACTION / 1000)
+        reveal_blank(page)
 
         # Verify popover appears
         popover = page.locator('text=Native Alternatives')
@@ -189,10 +197,7 @@ class TestTier1BlankFilling:
         """Test that popover shows alternative answers."""
         goto_scenario(scenario_id)
 
-        blank = page.locator('button:has-text("Tap to discover")').first
-        blank.click()
-
-        time.sleep(TIMEOUT_ACTION / 1000)
+        reveal_blank(page)
 
         popover = page.locator('text=Native Alternatives')
         assert popover.is_visible()
@@ -207,10 +212,7 @@ class TestTier1BlankFilling:
         """Test that popover close button (X) works."""
         goto_scenario(scenario_id)
 
-        blank = page.locator('button:has-text("Tap to discover")').first
-        blank.click()
-
-        time.sleep(TIMEOUT_ACTION / 1000)
+        reveal_blank(page)
 
         popover = page.locator('text=Native Alternatives')
         assert popover.is_visible()
@@ -219,7 +221,7 @@ class TestTier1BlankFilling:
         close_btn = page.locator('button:has(i.fa-times)').first
         if close_btn.count() > 0:
             close_btn.click()
-            time.sleep(TIMEOUT_ACTION / 1000)
+            wait_for_popover_hidden(page)
 
             # Verify popover closed
             assert not popover.is_visible(), "Popover still visible after close"
@@ -227,7 +229,7 @@ class TestTier1BlankFilling:
             # If close button not found, verify popover can be hidden via click-outside
             # Click on the page background
             page.click('body')
-            time.sleep(TIMEOUT_ACTION / 1000)
+            wait_for_popover_hidden(page)
             assert not popover.is_visible(), "Popover should be hidden after click outside"
 
     @pytest.mark.parametrize("scenario_id", list(TIER1_SCENARIOS.keys())[:2])
@@ -243,8 +245,7 @@ class TestTier1BlankFilling:
             return
 
         # Reveal first blank
-        blanks[0].click()
-        time.sleep(TIMEOUT_ACTION / 1000)
+        reveal_blank(page, blanks[0])
 
         # Verify it's revealed
         popover1 = page.locator('text=Native Alternatives')
@@ -257,11 +258,10 @@ class TestTier1BlankFilling:
         else:
             # Click outside to close popover
             page.click('body')
-        time.sleep(TIMEOUT_ACTION / 1000)
+        wait_for_popover_hidden(page)
 
         # Reveal second blank
-        blanks[1].click()
-        time.sleep(TIMEOUT_ACTION / 1000)
+        reveal_blank(page, blanks[1])
 
         # Verify popover appears for second blank
         popover2 = page.locator('text=Native Alternatives')
@@ -291,8 +291,7 @@ class TestTier1ChunkFeedbackModal:
         assert next_btn.count() > 0, "Cannot navigate scenario"
 
         # Click next turn to advance
-        next_btn.first.click()
-        time.sleep(TIMEOUT_ACTION / 1000)
+        click_next_turn(page)
 
         # Verify we're still in the scenario
         next_btn_after = page.locator('button:has-text("Next Turn")')
@@ -312,14 +311,13 @@ class TestTier1ChunkFeedbackModal:
 
         if len(blanks) > 0:
             # Click the first blank if available
-            blanks[0].click()
-            time.sleep(TIMEOUT_ACTION / 1000)
+            reveal_blank(page, blanks[0])
 
             # Verify popover appears with alternatives
             alternatives = page.locator('text=Native Alternatives')
             assert alternatives.count() >= 0, "Blank interaction failed"
 
-        time.sleep(TIMEOUT_ACTION / 1000)
+        wait_for_animations(page)
 
     @pytest.mark.parametrize("scenario_id", list(TIER1_SCENARIOS.keys())[:2])
     def test_feedback_cards_filtered_by_revealed(self, page, goto_scenario, scenario_id):
@@ -327,10 +325,7 @@ class TestTier1ChunkFeedbackModal:
         goto_scenario(scenario_id)
 
         # Reveal first blank
-        blank = page.locator('button:has-text("Tap to discover")').first
-        blank.click()
-
-        time.sleep(TIMEOUT_ACTION / 1000)
+        reveal_blank(page)
 
         # Verify popover appeared with alternatives
         alternatives = page.locator('text=Native Alternatives')
@@ -340,7 +335,7 @@ class TestTier1ChunkFeedbackModal:
         close_btn = page.locator('button:has-text("✕")').first
         if close_btn.count() > 0:
             close_btn.click()
-            time.sleep(TIMEOUT_ACTION / 1000)
+            wait_for_popover_hidden(page)
 
     @pytest.mark.parametrize("scenario_id", list(TIER1_SCENARIOS.keys())[:2])
     def test_modal_close_button_works(self, page, goto_scenario, scenario_id):
@@ -348,10 +343,7 @@ class TestTier1ChunkFeedbackModal:
         goto_scenario(scenario_id)
 
         # Reveal a blank first
-        blank = page.locator('button:has-text("Tap to discover")').first
-        blank.click()
-
-        time.sleep(TIMEOUT_ACTION / 1000)
+        reveal_blank(page)
 
         # Verify popover is visible
         popover = page.locator('text=Native Alternatives')
@@ -361,7 +353,7 @@ class TestTier1ChunkFeedbackModal:
         close_btn = page.locator('button:has-text("✕")').first
         if close_btn.count() > 0:
             close_btn.click()
-            time.sleep(TIMEOUT_ACTION / 1000)
+            wait_for_popover_hidden(page)
 
 
 class TestTier1FeedbackCardContent:
@@ -373,20 +365,20 @@ class TestTier1FeedbackCardContent:
         goto_scenario(scenario_id)
 
         # Reveal a blank
-        blank = page.locator('button:has-text("Tap to discover")').first
-        blank.click()
-
-        time.sleep(TIMEOUT_ACTION / 1000)
+        reveal_blank(page)
 
         # Verify popover appears with alternatives
         alternatives = page.locator('text=Native Alternatives')
         assert alternatives.count() >= 0, "Blank reveal failed"
 
+        # reveal_blank waited for the popover to settle
+        capture_feedback_modal_screenshot(page, scenario_id, 0)
+
         # Close popover if button exists
         close_btn = page.locator('button:has-text("✕")').first
         if close_btn.count() > 0:
             close_btn.click()
-            time.sleep(TIMEOUT_ACTION / 1000)
+            wait_for_popover_hidden(page)
 
 
 class TestTier1Completion:
@@ -405,46 +397,76 @@ class TestTier1Completion:
                 break
 
             try:
-                next_btn.first.click()
-                time.sleep(500 / 1000)  # 500ms per step
+                click_next_turn(page)
             except:
                 break
 
 
 class TestTier1Performance:
-    """Validation Group 6: Performance (5 checks)"""
+    """Validation Group 6: Interaction latency (click -> DOM mutation -> next paint)
 
-    @pytest.mark.parametrize("scenario_id", list(TIER1_SCENARIOS.keys())[:3])
-    def test_blank_reveal_animation_speed(self, page, goto_scenario, scenario_id):
-        """Test that blank reveal animation completes within reasonable time."""
-        goto_scenario(scenario_id)
+    Every test runs once per device profile (PERF_DEVICE_PROFILES), against
+    that profile's budgets.
+    """
 
-        blank = page.locator('button:has-text("Tap to discover")').first
+    SAMPLES = 5  # Repetitions of each interaction per test
 
-        start = time.time()
-        blank.click()
-        # Measure popover visibility rather than just click time
-        page.wait_for_selector('text=Native Alternatives', timeout=5000)
-        duration = (time.time() - start) * 1000
+    def _reveal_and_close_blanks(self, page):
+        """Reveal a blank and close its popover SAMPLES times.
 
-        # Should complete within 5 seconds (including wait time)
-        assert duration < 5000, f"Reveal took {duration}ms, expected < 5000ms"
+        Closing un-reveals the blank, so repeats may hit the same blank.
+        """
+        for _ in range(self.SAMPLES):
+            if page.locator('button:has-text("Tap to discover")').count() == 0:
+                break
+            reveal_blank(page)
+            close_popover(page)
 
-    @pytest.mark.parametrize("scenario_id", list(TIER1_SCENARIOS.keys())[:2])
-    def test_modal_open_speed(self, page, goto_scenario, scenario_id):
-        """Test that popover opens within reasonable time."""
+    def _assert_within_budget(self, latency, kind, device_profile):
+        """Assert the budgeted statistic for one interaction type under a device profile."""
+        if not COLLECT_INTERACTIONS:
+            pytest.skip("Interaction probes disabled (COLLECT_INTERACTIONS)")
+
+        stats = latency.get(kind)
+        assert stats, f"No {kind} samples recorded"
+
+        budget = interaction_budgets(device_profile)[kind]
+        value = stats[INTERACTION_BUDGET_STAT]
+        assert value <= budget, (
+            f"{kind} {INTERACTION_BUDGET_STAT} {value}ms over {budget}ms {device_profile} budget "
+            f"(p50 {stats['p50']}ms, max {stats['max']}ms, n={stats['count']})"
+        )
+
+    @pytest.mark.parametrize("scenario_id", list(TIER1_SCENARIOS.keys())[:3])
+    def test_blank_reveal_animation_speed(self, page, goto_scenario, interaction_latency, device_profile, scenario_id):
+        """Test that a blank reveal paints within the interaction budget."""
         goto_scenario(scenario_id)
+        self._reveal_and_close_blanks(page)
+        self._assert_within_budget(interaction_latency(), "blank_reveal", device_profile)
 
-        blank = page.locator('button:has-text("Tap to discover")').first
+    @pytest.mark.parametrize("scenario_id", list(TIER1_SCENARIOS.keys())[:2])
+    def test_modal_open_speed(self, page, goto_scenario, interaction_latency, device_profile, scenario_id):
+        """Test that the alternatives popover paints within the interaction budget."""
+        goto_scenario(scenario_id)
+        self._reveal_and_close_blanks(page)
+        self._assert_within_budget(interaction_latency(), "modal_open", device_profile)
 
-        start = time.time()
-        blank.click()
-        # Wait for popover to appear
-        page.wait_for_selector('text=Native Alternatives', timeout=5000)
-        duration = (time.time() - start) * 1000
+    @pytest.mark.parametrize("scenario_id", list(TIER1_SCENARIOS.keys())[:2])
+    def test_popover_close_speed(self, page, goto_scenario, interaction_latency, device_profile, scenario_id):
+        """Test that closing the popover paints within the interaction budget."""
+        goto_scenario(scenario_id)
+        self._reveal_and_close_blanks(page)
+        self._assert_within_budget(interaction_latency(), "popover_close", device_profile)
 
-        # Popover should appear within 5 seconds
-        assert duration < 5000, f"Popover open took {duration}ms, expected < 5000ms"
+    @pytest.mark.parametrize("scenario_id", list(TIER1_SCENARIOS.keys())[:2])
+    def test_next_turn_speed(self, page, goto_scenario, interaction_latency, device_profile, scenario_id):
+        """Test that Next Turn paints the next turn within the interaction budget."""
+        goto_scenario(scenario_id)
+        for _ in range(self.SAMPLES):
+            if not page.locator('button:has-text("Next Turn")').is_visible():
+                break
+            click_next_turn(page)
+        self._assert_within_budget(interaction_latency(), "next_turn", device_profile)
 
 
 if __name__ == "__main__":
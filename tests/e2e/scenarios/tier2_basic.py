@@ -0,0 +1,158 @@
+"""
+Tier 2 E2E Tests: basic 15-check validation.
+
+Parametrised at collection time with every scenario in staticData.ts that
+is not covered by Tier 1 (see catalogue.py). Run a slice of it with
+``--shard i/N``.
+"""
+
+import pytest
+import time
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import BASE_URL, TIMEOUT_LOAD, TIMEOUT_ELEMENT, TIMEOUT_ACTION
+from catalogue import tier2_scenario_ids
+from utils.assertions import assert_no_console_errors
+from utils.waits import (
+    reveal_blank, click_next_turn, wait_for_popover_hidden, wait_for_page_idle,
+)
+from fixtures import (
+    page, browser, timer, goto_scenario,
+    scenario_session, scenario_page, completed_scenario_page, fresh_scenario_page,
+)
+
+
+TIER2_SCENARIOS = tier2_scenario_ids()
+
+
+@pytest.mark.parametrize("scenario_id", TIER2_SCENARIOS, scope="class")
+class TestTier2BasicInteraction:
+    """Tier 2 Basic Interaction Tests (15 checks per scenario)
+
+    All checks of one scenario share a single navigation (scenario_session).
+    Read-only checks use the shared page; mutating checks get a fresh page
+    restored from the session's storage state.
+    """
+
+    def test_page_loads(self, scenario_session, scenario_id):
+        """Check 1: Page loads successfully."""
+        load_time = scenario_session.load_time_ms
+        assert load_time < 5000, f"Load time {load_time}ms exceeds 5000ms"
+
+    def test_no_console_errors(self, scenario_page, scenario_id):
+        """Check 2: No console errors on load."""
+        page = scenario_page
+        wait_for_page_idle(page)
+        assert len(page.console_errors) == 0, f"Console errors: {page.console_errors}"
+
+    def test_title_correct(self, scenario_page, scenario_id):
+        """Check 3: Page title is correct."""
+        page = scenario_page
+        assert page.title() == "FluentStep: IELTS Roleplay Engine"
+
+    def test_dialogue_renders(self, scenario_page, scenario_id):
+        """Check 4: Dialogue renders without errors."""
+        page = scenario_page
+        next_btn = page.locator('button:has-text("Next Turn")')
+        assert next_btn.count() > 0, "Dialogue not found"
+
+    def test_blanks_visible(self, scenario_page, scenario_id):
+        """Check 5: At least one blank is visible."""
+        page = scenario_page
+        blanks = page.locator('button:has-text("Tap to discover")').all()
+        assert len(blanks) > 0, "No blanks found"
+
+    def test_reveal_blank(self, fresh_scenario_page, scenario_id):
+        """Check 6: Revealing a blank shows alternatives."""
+        page = fresh_scenario_page
+        reveal_blank(page)
+
+        popover = page.locator('text=Native Alternatives')
+        assert popover.is_visible(), "Popover not visible after reveal"
+
+    def test_popover_has_options(self, fresh_scenario_page, scenario_id):
+        """Check 7: Popover shows multiple alternatives."""
+        page = fresh_scenario_page
+        reveal_blank(page)
+
+        options = page.locator('text=Other ways to say')
+        assert options.count() > 0, "No alternatives shown"
+
+    def test_close_popover(self, fresh_scenario_page, scenario_id):
+        """Check 8: Closing popover works."""
+        page = fresh_scenario_page
+        reveal_blank(page)
+
+        close_btn = page.locator('button:has(i.fa-times)').first
+        close_btn.click()
+        wait_for_popover_hidden(page)
+
+        popover = page.locator('text=Native Alternatives')
+        if close_btn.count() > 0: assert not popover.is_visible(), "Popover not closed"
+
+    def test_continue_button_works(self, fresh_scenario_page, scenario_id):
+        """Check 9: Continue button advances dialogue."""
+        page = fresh_scenario_page
+
+        next_turn_btn = page.locator('button:has-text("Next Turn")')
+        assert next_turn_btn.is_visible(), "Next Turn button not visible"
+
+        click_next_turn(page)
+
+        # Button should either still be visible or we're at the end
+        completion = page.locator('text=Return to Library')
+        if completion.count() > 0: assert completion.is_visible(), "Completion modal not visible"
+
+    def test_reveal_second_blank(self, fresh_scenario_page, scenario_id):
+        """Check 10: Can reveal multiple blanks independently."""
+        page = fresh_scenario_page
+
+        blanks = page.locator('button:has-text("Tap to discover")').all()
+        if len(blanks) < 2:
+            pytest.skip(f"Scenario has only {len(blanks)} blank(s)")
+
+        reveal_blank(page, blanks[0])
+
+        close_btn = page.locator('button:has(i.fa-times)').first
+        close_btn.click()
+        wait_for_popover_hidden(page)
+
+        reveal_blank(page, blanks[1])
+
+        popover = page.locator('text=Native Alternatives')
+        assert popover.is_visible(), "Second blank not revealed"
+
+    def test_navigate_to_end(self, completed_scenario_page, scenario_id):
+        """Check 11: Can navigate to end of scenario."""
+        page = completed_scenario_page
+        next_turn_btn = page.locator('button:has-text("Next Turn")')
+        assert not next_turn_btn.is_visible(), "Still mid-scenario after 50 turns"
+
+    def test_completion_modal_appears(self, completed_scenario_page, scenario_id):
+        """Check 12: Completion modal appears at end."""
+        page = completed_scenario_page
+        completion = page.locator('text=Return to Library')
+        assert completion.is_visible(), "Completion modal not visible"
+
+    def test_return_to_library_works(self, completed_scenario_page, scenario_id):
+        """Check 13: Return to Library button works."""
+        page = completed_scenario_page
+        return_btn = page.locator('button:has-text("Return to Library")')
+        assert return_btn.is_visible(), "Return to Library button not visible"
+
+    def test_progress_saved(self, completed_scenario_page, scenario_id):
+        """Check 14: Scenario progress is saved."""
+        page = completed_scenario_page
+        final_value = page.evaluate('localStorage.getItem("fluentstep:progress")')
+        assert final_value is not None, "Progress not saved to localStorage"
+
+    def test_no_final_errors(self, completed_scenario_page, scenario_id):
+        """Check 15: No console errors during full scenario."""
+        page = completed_scenario_page
+        assert len(page.console_errors) == 0, f"Errors occurred: {page.console_errors}"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,261 @@
+"""
+Work-stealing scheduler for E2E runs.
+
+Expands every (scenario, check) pair into a work item and orders the
+queue by scenario, longest scenario first, using durations from earlier
+runs. Workers pull the next item as soon as they go idle, so wall time
+tracks total work divided by workers instead of the slowest batch file.
+
+A scenario's checks share one navigation (ScenarioSession), so the
+scenario is the unit of scheduling: its items stay contiguous in the
+queue, and ScenarioAffinity keeps them on the worker that started it.
+"""
+
+import heapq
+import json
+import re
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+from config import (
+    PROJECT_ROOT, JSON_REPORTS_DIR, DEFAULT_ITEM_DURATION_S
+)
+from utils.result_stream import read_results
+from utils.work_items import make_work_item  # Re-exported: callers build items from the scheduler
+
+WORK_HISTORY_FILE = JSON_REPORTS_DIR / "work_items.json"
+
+
+def collect_work_items(test_files: List[str]) -> List[Dict]:
+    """Collect the (scenario, check) work items contained in test files."""
+
+    result = subprocess.run(
+        [
+            sys.executable, "-m", "pytest",
+            "--collect-only",
+            "-q",
+            "-o", "addopts=",
+            *test_files,
+        ],
+        capture_output=True,
+        text=True,
+        cwd=PROJECT_ROOT,
+    )
+
+    items = []
+    for line in result.stdout.splitlines():
+        line = line.strip()
+        if "::" in line and not line.startswith(("ERROR", "FAILED")):
+            items.append(make_work_item(line))
+
+    if not items:
+        raise RuntimeError(
+            f"No work items collected from {test_files}:\n{result.stdout}{result.stderr}"
+        )
+
+    return items
+
+
+def load_historical_durations() -> Dict[str, float]:
+    """Load per-item durations (seconds) from earlier runs."""
+
+    durations = {}
+
+    # Per-test records from the last run
+    for results_file in JSON_REPORTS_DIR.glob("results_*.ndjson"):
+        for record in read_results(results_file):
+            if "duration" in record:
+                durations[record["nodeid"]] = record["duration"]
+
+    # Scheduler history takes precedence (measured per item, end to end)
+    if WORK_HISTORY_FILE.exists():
+        try:
+            with open(WORK_HISTORY_FILE, 'r') as f:
+                durations.update(json.load(f).get("durations", {}))
+        except (OSError, ValueError):
+            pass
+
+    return durations
+
+
+def _durations_by_check(durations: Dict[str, float]) -> Dict[str, List[float]]:
+    """Group historical durations by check name."""
+
+    by_check = {}
+    for nodeid, duration in durations.items():
+        by_check.setdefault(make_work_item(nodeid)["check"], []).append(duration)
+    return by_check
+
+
+def estimate_duration(
+    item: Dict,
+    durations: Dict[str, float],
+    by_check: Optional[Dict[str, List[float]]] = None,
+) -> float:
+    """Estimate how long a work item will take."""
+
+    if item["nodeid"] in durations:
+        return durations[item["nodeid"]]
+
+    # Same check on other scenarios is the best predictor for a new item
+    if by_check is None:
+        by_check = _durations_by_check(durations)
+    if item["check"] in by_check:
+        return statistics.median(by_check[item["check"]])
+
+    if durations:
+        return statistics.median(durations.values())
+
+    return DEFAULT_ITEM_DURATION_S
+
+
+def order_longest_first(
+    items: List[Dict],
+    durations: Optional[Dict[str, float]] = None,
+) -> List[Dict]:
+    """Annotate items with estimates and group them by scenario, longest scenario first.
+
+    Within a scenario items keep their collection order, which is the
+    order pytest sets up and tears down the scenario's fixtures in.
+    """
+
+    if durations is None:
+        durations = load_historical_durations()
+    by_check = _durations_by_check(durations)
+
+    costs = {}
+    for item in items:
+        item["estimate_seconds"] = estimate_duration(item, durations, by_check)
+        costs[item["scenario_id"]] = costs.get(item["scenario_id"], 0.0) + item["estimate_seconds"]
+
+    # Longest-processing-time first per scenario; the id keeps the order deterministic
+    position = {item["nodeid"]: index for index, item in enumerate(items)}
+    return sorted(items, key=lambda i: (-costs[i["scenario_id"]], i["scenario_id"], position[i["nodeid"]]))
+
+
+class ScenarioAffinity:
+    """Hands out queued items so each scenario stays on the worker that started it.
+
+    A worker finishes the scenario it claimed before claiming the next
+    unclaimed one; it never takes a scenario another live worker holds.
+    """
+
+    def __init__(self):
+        """Initialize with no claims."""
+        self.claims = {}  # worker -> scenario id it is working through
+
+    def _claimed_elsewhere(self, worker, pending: List[Dict]) -> set:
+        remaining = {item["scenario_id"] for item in pending}
+        return {s for w, s in self.claims.items() if w != worker and s in remaining}
+
+    def next_item(self, worker, pending: List[Dict]) -> Optional[Dict]:
+        """Pop the worker's next item from `pending` (None if nothing is free for it)."""
+
+        own = self.claims.get(worker)
+        for index, item in enumerate(pending):
+            if item["scenario_id"] == own:
+                return pending.pop(index)
+
+        taken = self._claimed_elsewhere(worker, pending)
+        for index, item in enumerate(pending):
+            if item["scenario_id"] not in taken:
+                self.claims[worker] = item["scenario_id"]
+                return pending.pop(index)
+        self.claims.pop(worker, None)
+        return None
+
+    def free_scenarios(self, pending: List[Dict]) -> int:
+        """Queued scenarios no worker holds (what new workers could start on)."""
+
+        taken = self._claimed_elsewhere(None, pending)
+        return len({item["scenario_id"] for item in pending} - taken)
+
+    def release(self, worker) -> None:
+        """Drop a worker's claim (it exited or was lost)."""
+
+        self.claims.pop(worker, None)
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """Parse an "i/N" shard spec (1-based) into (i, N)."""
+
+    match = re.fullmatch(r"\s*(\d+)\s*/\s*(\d+)\s*", spec or "")
+    if match is None:
+        raise ValueError(f"Invalid shard {spec!r}, expected i/N (e.g. 2/4)")
+    index, count = int(match.group(1)), int(match.group(2))
+    if not 1 <= index <= count:
+        raise ValueError(f"Invalid shard {spec!r}: i must be between 1 and N")
+    return index, count
+
+
+def assign_shards(
+    items: List[Dict],
+    num_shards: int,
+    durations: Optional[Dict[str, float]] = None,
+) -> Dict[str, int]:
+    """Assign scenarios to shards (1-based), balancing estimated cost.
+
+    A scenario's checks stay together so they keep sharing one session.
+    Scenarios are placed longest-first on the least loaded shard; every
+    machine that sees the same items and durations computes the same
+    assignment.
+    """
+
+    if durations is None:
+        durations = load_historical_durations()
+    by_check = _durations_by_check(durations)
+
+    costs = {}
+    for item in items:
+        costs[item["scenario_id"]] = (
+            costs.get(item["scenario_id"], 0.0) + estimate_duration(item, durations, by_check)
+        )
+
+    loads = [(0.0, shard) for shard in range(1, num_shards + 1)]
+    assignment = {}
+    for scenario_id, cost in sorted(costs.items(), key=lambda c: (-c[1], c[0])):
+        load, shard = heapq.heappop(loads)
+        assignment[scenario_id] = shard
+        heapq.heappush(loads, (load + cost, shard))
+    return assignment
+
+
+def select_shard(
+    items: List[Dict],
+    shard: Tuple[int, int],
+    durations: Optional[Dict[str, float]] = None,
+) -> List[Dict]:
+    """Items belonging to one shard (see assign_shards)."""
+
+    index, count = shard
+    assignment = assign_shards(items, count, durations)
+    return [item for item in items if assignment[item["scenario_id"]] == index]
+
+
+def save_durations(results: List[Dict]) -> str:
+    """Merge measured item durations into the scheduler history."""
+
+    durations = {}
+    if WORK_HISTORY_FILE.exists():
+        try:
+            with open(WORK_HISTORY_FILE, 'r') as f:
+                durations = json.load(f).get("durations", {})
+        except (OSError, ValueError):
+            durations = {}
+
+    for result in results:
+        if "nodeid" in result and "duration_seconds" in result:
+            durations[result["nodeid"]] = result["duration_seconds"]
+
+    with open(WORK_HISTORY_FILE, 'w') as f:
+        json.dump({
+            "updated": datetime.now().isoformat(),
+            "durations": durations,
+        }, f, indent=2)
+
+    return str(WORK_HISTORY_FILE)
@@ -11,6 +11,7 @@ from .screenshots import (
     capture_feedback_modal_screenshot,
 )
 from .reporters import TestReport, HTMLReporter
+from .browser_pool import BrowserPool, get_browser_pool
 
 __all__ = [
     'Selectors',
@@ -22,4 +23,6 @@ __all__ = [
     'capture_feedback_modal_screenshot',
     'TestReport',
     'HTMLReporter',
+    'BrowserPool',
+    'get_browser_pool',
 ]
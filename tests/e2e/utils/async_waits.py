@@ -0,0 +1,111 @@
+"""
+Event-driven wait helpers for the async engine (async_engine.py).
+
+Awaitable twins of utils/waits.py for Playwright's async API: same
+conditions, same scripts, same bounds, same True/False contract.
+"""
+
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import TIMEOUT_UI_EVENT, TIMEOUT_ANIMATION, TIMEOUT_LOAD
+from .selectors import Selectors
+from .waits import (
+    POPOVER_TEXT, TURN_COUNTER, NEXT_TURN_BUTTON, ONBOARDING_SKIP, DIALOGUE_READY,
+    _ANIMATIONS_FINISHED_JS, _IDLE_JS, _TURN_ADVANCED_JS,
+)
+
+
+async def _met(wait) -> bool:
+    """Await a Playwright wait; False if it timed out."""
+
+    from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+    try:
+        await wait
+        return True
+    except PlaywrightTimeoutError:
+        return False
+
+
+async def wait_for_animations(page, selector: str = None, timeout_ms: int = TIMEOUT_ANIMATION) -> None:
+    """Wait until running (finite) animations have finished."""
+
+    await page.evaluate(_ANIMATIONS_FINISHED_JS, [selector, timeout_ms])
+
+
+async def wait_for_page_idle(page, timeout_ms: int = TIMEOUT_UI_EVENT) -> None:
+    """Wait until deferred work (effects, timers, late errors) has run."""
+
+    await wait_for_animations(page)
+    await page.evaluate(_IDLE_JS, [timeout_ms])
+
+
+async def wait_for_popover_visible(page, timeout_ms: int = TIMEOUT_UI_EVENT) -> bool:
+    """Wait until the Native Alternatives popover is shown and settled."""
+
+    popover = page.locator(POPOVER_TEXT).first
+    if not await _met(popover.wait_for(state="visible", timeout=timeout_ms)):
+        return False
+    await wait_for_animations(page)
+    return True
+
+
+async def wait_for_popover_hidden(page, timeout_ms: int = TIMEOUT_UI_EVENT) -> bool:
+    """Wait until the Native Alternatives popover is gone."""
+
+    popover = page.locator(POPOVER_TEXT).first
+    return await _met(popover.wait_for(state="hidden", timeout=timeout_ms))
+
+
+async def wait_for_modal_closed(page, selector: str = Selectors.FEEDBACK_MODAL,
+                                timeout_ms: int = TIMEOUT_UI_EVENT) -> bool:
+    """Wait until a modal is hidden or removed."""
+
+    modal = page.locator(selector).first
+    return await _met(modal.wait_for(state="hidden", timeout=timeout_ms))
+
+
+async def wait_for_dialogue(page, timeout_ms: int = TIMEOUT_LOAD) -> bool:
+    """Wait until onboarding is gone and the dialogue shows Next Turn or a blank."""
+
+    if not await wait_for_modal_closed(page, ONBOARDING_SKIP, timeout_ms):
+        return False
+    ready = page.locator(DIALOGUE_READY).first
+    return await _met(ready.wait_for(state="visible", timeout=timeout_ms))
+
+
+async def wait_for_turn_advanced(page, counter_before: str, timeout_ms: int = TIMEOUT_UI_EVENT) -> bool:
+    """Wait until the turn counter changes (or Next Turn disappears at the end)."""
+
+    met = await _met(page.wait_for_function(
+        _TURN_ADVANCED_JS,
+        arg=[counter_before, "Next Turn"],
+        timeout=timeout_ms,
+    ))
+    await wait_for_animations(page)
+    return met
+
+
+async def turn_counter_text(page) -> str:
+    """Current "n / total" turn counter text ('' when not shown)."""
+
+    counter = page.locator(TURN_COUNTER).first
+    return (await counter.text_content() or "").strip() if await counter.count() > 0 else ""
+
+
+async def click_next_turn(page, timeout_ms: int = TIMEOUT_UI_EVENT) -> bool:
+    """Click Next Turn and wait for the dialogue to advance."""
+
+    before = await turn_counter_text(page)
+    await page.locator(NEXT_TURN_BUTTON).first.click()
+    return await wait_for_turn_advanced(page, before, timeout_ms)
+
+
+async def reveal_blank(page, blank=None, timeout_ms: int = TIMEOUT_UI_EVENT) -> bool:
+    """Click a blank (default: first unrevealed) and wait for its popover."""
+
+    if blank is None:
+        blank = page.locator(Selectors.BLANK_UNREVEALED).first
+    await blank.click()
+    return await wait_for_popover_visible(page, timeout_ms)
@@ -0,0 +1,182 @@
+"""
+Browser pool for E2E tests.
+
+Connects to the orchestrator's shared browser server for this worker
+(utils/browser_server.py), or launches a browser once per worker process
+when there is none, and hands out a fresh, isolated BrowserContext per
+test. The next context (with its first page) is pre-warmed while the
+previous test tears down, and every release verifies that no contexts
+leaked. When the orchestrator replaces a server, the pool moves to the
+new one between tests.
+"""
+
+import atexit
+import warnings
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import (
+    BROWSER, HEADLESS, SLOW_MO, VIEWPORT, AGENT_ID,
+    TIMEOUT_ELEMENT, TIMEOUT_LOAD, BROWSER_POOL_PREWARM, BROWSER_SERVER_CONNECT_TIMEOUT_MS
+)
+from utils.browser_server import endpoint_for
+
+
+class BrowserPool:
+    """One browser per worker process, one context per test."""
+
+    def __init__(self, context_options: dict = None):
+        """Initialize pool; the browser is launched lazily."""
+        self.context_options = context_options or {}
+        self.context_hooks = []  # Called with every new context (e.g. routing)
+        self.network_cache = None  # NetworkCache whose install() is a hook, if any
+        self.browser = None
+        self.endpoint = None  # Shared browser server, if connected to one
+        self.contexts_created = 0
+        self.leaked_contexts = 0
+        self._playwright = None
+        self._spare = None
+        self._in_use = []
+
+    def start(self):
+        """Connect to the shared browser server, or launch a browser (again after a crash)."""
+
+        if self.browser is not None and self.browser.is_connected():
+            return self.browser
+
+        if self._playwright is None:
+            from playwright.sync_api import sync_playwright
+            self._playwright = sync_playwright().start()
+
+        self._spare = None
+        self._in_use = []
+        browser_type = getattr(self._playwright, BROWSER)
+        self.browser = None
+        self.endpoint = endpoint_for(AGENT_ID)
+        if self.endpoint:
+            try:
+                self.browser = browser_type.connect(
+                    self.endpoint, slow_mo=SLOW_MO, timeout=BROWSER_SERVER_CONNECT_TIMEOUT_MS
+                )
+            except Exception as e:
+                warnings.warn(f"BrowserPool: cannot reach {self.endpoint} ({e}); launching locally")
+                self.endpoint = None
+        if self.browser is None:
+            self.browser = browser_type.launch(
+                headless=HEADLESS,
+                slow_mo=SLOW_MO,
+            )
+        return self.browser
+
+    def _disconnect(self) -> None:
+        """Leave a replaced browser server; start() connects to its successor."""
+
+        try:
+            # On a connected browser this closes our contexts and disconnects
+            self.browser.close()
+        except Exception:
+            pass
+        self.browser = None
+        self.endpoint = None
+        self._spare = None
+
+    def _new_context(self, skip_hooks=(), **options):
+        """Create a context with its first page already open."""
+
+        # Options (e.g. a device profile's viewport) override the pool defaults
+        context = self.browser.new_context(
+            **{"viewport": VIEWPORT, **self.context_options, **options},
+        )
+        context.set_default_timeout(TIMEOUT_ELEMENT)
+        context.set_default_navigation_timeout(TIMEOUT_LOAD)
+        for hook in self.context_hooks:
+            if hook not in skip_hooks:
+                hook(context)
+        context.new_page()
+        self.contexts_created += 1
+        return context
+
+    def prewarm(self) -> None:
+        """Prepare the next context so the next test starts immediately."""
+
+        if self._spare is None and self.browser is not None and self.browser.is_connected():
+            self._spare = self._new_context()
+
+    def acquire(self, skip_hooks=(), **options):
+        """Hand out a fresh, isolated context.
+
+        Extra context options (e.g. ``storage_state``) and hooks to leave
+        out bypass the pre-warmed spare, which uses the pool defaults.
+        """
+
+        self.start()
+        if options or skip_hooks:
+            context = self._new_context(skip_hooks, **options)
+        else:
+            context = self._spare or self._new_context()
+            self._spare = None
+
+        self._in_use.append(context)
+        return context
+
+    def release(self, context) -> None:
+        """Close a context, verify nothing leaked and pre-warm the next one."""
+
+        if context in self._in_use:
+            self._in_use.remove(context)
+        try:
+            context.close()
+        except Exception:
+            pass  # Browser may already be gone; start() relaunches it
+
+        if self.browser is None or not self.browser.is_connected():
+            return
+
+        # Anything not handed out and not the spare should be gone by now
+        leaked = [
+            c for c in self.browser.contexts
+            if c is not self._spare and c not in self._in_use
+        ]
+        if leaked:
+            self.leaked_contexts += len(leaked)
+            warnings.warn(
+                f"BrowserPool: {len(leaked)} context(s) still open after release; closing them"
+            )
+            for stale in leaked:
+                stale.close()
+
+        # Between tests is the only safe moment to move to a replacement server
+        if self.endpoint and not self._in_use and endpoint_for(AGENT_ID) != self.endpoint:
+            self._disconnect()
+            return
+
+        if BROWSER_POOL_PREWARM:
+            self.prewarm()
+
+    def close(self) -> None:
+        """Close the browser and stop Playwright."""
+
+        if self.browser is not None:
+            try:
+                self.browser.close()
+            except Exception:
+                pass
+            self.browser = None
+        if self._playwright is not None:
+            self._playwright.stop()
+            self._playwright = None
+        self._spare = None
+        self._in_use = []
+
+
+_POOL = None
+
+
+def get_browser_pool() -> BrowserPool:
+    """Return the process-wide browser pool."""
+
+    global _POOL
+    if _POOL is None:
+        _POOL = BrowserPool()
+        atexit.register(_POOL.close)
+    return _POOL
@@ -0,0 +1,256 @@
+"""
+Long-lived browser servers shared by E2E workers.
+
+The orchestrator starts BROWSER_SERVERS browsers with Playwright's
+``launch-server`` (the Python package's bundled node driver, run directly
+in its own process group so stopping it also stops Chromium) and
+publishes their websocket endpoints in a small registry file. Workers
+connect to the server for their slot (agent id modulo the number of
+servers) and open isolated contexts on it, so no test waits for Chromium
+to start.
+
+The orchestrator health-checks the servers as results arrive and
+restarts any that died. A server that has served
+BROWSER_SERVER_RECYCLE_CONTEXTS contexts is replaced: the new endpoint is
+published, workers move over between tests, and the old browser is
+stopped once BROWSER_SERVER_RETIRE_GRACE_S has passed.
+"""
+
+import json
+import os
+import select
+import signal
+import socket
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import (
+    REPORTS_DIR, BROWSER, HEADLESS, BROWSER_SERVERS, BROWSER_SERVER_RECYCLE_CONTEXTS,
+    BROWSER_SERVER_START_TIMEOUT_S, BROWSER_SERVER_RETIRE_GRACE_S
+)
+
+REGISTRY_FILE = REPORTS_DIR / "browser_servers.json"
+REGISTRY_ENV = "E2E_BROWSER_SERVERS_FILE"  # Set for workers by the orchestrator
+
+
+def read_registry(path: Optional[str] = None) -> List[Dict]:
+    """Live servers from the registry (empty if there is none)."""
+
+    path = path or os.environ.get(REGISTRY_ENV)
+    if not path:
+        return []
+    try:
+        with open(path, 'r') as f:
+            return json.load(f).get("servers", [])
+    except (OSError, ValueError):
+        return []
+
+
+def endpoint_for(agent_id: int, path: Optional[str] = None) -> Optional[str]:
+    """Websocket endpoint of the server a worker should use."""
+
+    servers = read_registry(path)
+    if not servers:
+        return None
+    return servers[agent_id % len(servers)]["ws_endpoint"]
+
+
+def _driver_command():
+    """Command line of Playwright's node driver and its environment.
+
+    ``python -m playwright`` would add a Python wrapper that runs node as a
+    child and does not pass signals on.
+    """
+
+    from playwright._impl._driver import compute_driver_executable, get_driver_env
+
+    driver = compute_driver_executable()
+    command = [str(part) for part in driver] if isinstance(driver, tuple) else [str(driver)]
+    return command, get_driver_env()
+
+
+class BrowserServer:
+    """One ``playwright launch-server`` process group (node driver + browser)."""
+
+    def __init__(self, slot: int):
+        """Initialize server for a registry slot; start() launches it."""
+        self.slot = slot
+        self.process = None
+        self.ws_endpoint = None
+        self.contexts = 0
+        self.started = None
+        self._config = None
+        self._stopped = False
+
+    def start(self, timeout: float = BROWSER_SERVER_START_TIMEOUT_S) -> "BrowserServer":
+        """Launch the browser and wait for its websocket endpoint."""
+
+        with tempfile.NamedTemporaryFile('w', suffix=".json", delete=False) as f:
+            json.dump({"headless": HEADLESS}, f)
+            self._config = f.name
+
+        command, env = _driver_command()
+        self.process = subprocess.Popen(
+            [*command, "launch-server", "--browser", BROWSER, "--config", self._config],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, env=env,
+            start_new_session=True,  # Own process group: stop() reaches the browser too
+        )
+
+        # The driver prints the endpoint once the browser is up
+        deadline = time.time() + timeout
+        while time.time() < deadline and self.process.poll() is None:
+            ready, _, _ = select.select([self.process.stdout], [], [], 0.5)
+            if ready:
+                line = self.process.stdout.readline().strip()
+                if line.startswith("ws://"):
+                    self.ws_endpoint = line
+                    self.started = datetime.now().isoformat(timespec="seconds")
+                    return self
+
+        exit_code = self.process.poll()
+        self.stop()
+        if exit_code is not None:
+            raise RuntimeError(f"Browser server {self.slot} exited with code {exit_code}")
+        raise RuntimeError(f"Browser server {self.slot} did not start within {timeout:.0f}s")
+
+    def healthy(self) -> bool:
+        """Process alive and its websocket port accepting connections."""
+
+        if self.process is None or self.process.poll() is not None or not self.ws_endpoint:
+            return False
+        url = urlparse(self.ws_endpoint)
+        try:
+            with socket.create_connection((url.hostname, url.port), timeout=1.0):
+                return True
+        except OSError:
+            return False
+
+    def _signal_group(self, sig) -> None:
+        try:
+            os.killpg(self.process.pid, sig)
+        except ProcessLookupError:
+            pass  # Whole group already gone
+
+    def stop(self, timeout: float = 10) -> None:
+        """Stop the driver and browser (clients still connected are disconnected)."""
+
+        if self.process is not None and not self._stopped:
+            self._stopped = True
+            # Even if the driver already exited, its browser may still be running
+            self._signal_group(signal.SIGTERM)
+            try:
+                self.process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                pass
+            self._signal_group(signal.SIGKILL)  # Stragglers of the group
+            self.process.wait()
+        if self._config:
+            Path(self._config).unlink(missing_ok=True)
+            self._config = None
+
+    def describe(self) -> Dict:
+        return {
+            "slot": self.slot,
+            "ws_endpoint": self.ws_endpoint,
+            "pid": self.process.pid if self.process else None,
+            "contexts": self.contexts,
+            "started": self.started,
+        }
+
+
+class BrowserServerFleet:
+    """A few browser servers shared by all workers of a run."""
+
+    def __init__(self, count: int = BROWSER_SERVERS, registry: Path = REGISTRY_FILE,
+                 recycle_after: int = BROWSER_SERVER_RECYCLE_CONTEXTS):
+        """Initialize fleet; start() launches the servers."""
+        self.count = count
+        self.registry = Path(registry)
+        self.recycle_after = recycle_after
+        self.servers = []
+        self.restarted = 0
+        self.recycled = 0
+        self._retired = []  # (server, stop after)
+
+    def start(self) -> "BrowserServerFleet":
+        """Launch every server and publish the registry."""
+
+        self.servers = [BrowserServer(slot).start() for slot in range(self.count)]
+        self._publish()
+        return self
+
+    def _publish(self) -> None:
+        # Replace atomically: workers read the registry between tests
+        self.registry.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.registry.with_suffix(".tmp")
+        with open(tmp, 'w') as f:
+            json.dump({
+                "updated": datetime.now().isoformat(),
+                "servers": [server.describe() for server in self.servers],
+            }, f, indent=2)
+        os.replace(tmp, self.registry)
+
+    def _replace(self, slot: int, retire: bool) -> None:
+        old = self.servers[slot]
+        try:
+            self.servers[slot] = BrowserServer(slot).start()
+        except RuntimeError as e:
+            # Workers of this slot launch their own browser until the next check;
+            # a server due for recycling keeps serving until it is due again
+            print(f"⚠️  {e}")
+            old.contexts = 0
+            return
+        self._publish()
+        if retire:
+            self._retired.append((old, time.time() + BROWSER_SERVER_RETIRE_GRACE_S))
+        else:
+            old.stop()
+
+    def record(self, worker_id: int, contexts: int) -> None:
+        """Count contexts a worker opened; recycle a server that served enough."""
+
+        if not self.servers or not contexts:
+            return
+        slot = worker_id % len(self.servers)
+        self.servers[slot].contexts += contexts
+        if self.servers[slot].contexts >= self.recycle_after:
+            self.recycled += 1
+            self._replace(slot, retire=True)
+
+    def check(self) -> None:
+        """Restart dead servers and stop retired ones whose grace period is over."""
+
+        for slot, server in enumerate(self.servers):
+            if not server.healthy():
+                self.restarted += 1
+                self._replace(slot, retire=False)
+
+        now = time.time()
+        for entry in list(self._retired):
+            server, stop_after = entry
+            if now >= stop_after:
+                server.stop()
+                self._retired.remove(entry)
+
+    def pids(self) -> List[int]:
+        """Driver pids of running servers, retired ones included."""
+
+        return [
+            server.process.pid for server in self.servers + [server for server, _ in self._retired]
+            if server.process is not None and server.process.poll() is None
+        ]
+
+    def stop(self) -> None:
+        """Stop every server and remove the registry."""
+
+        for server in self.servers + [server for server, _ in self._retired]:
+            server.stop()
+        self.servers = []
+        self._retired = []
+        self.registry.unlink(missing_ok=True)
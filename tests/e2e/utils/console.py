@@ -0,0 +1,110 @@
+"""
+Bounded console capture for E2E pages.
+
+Playwright hands every console message over with its arguments as
+JSHandles; keeping them pins the logged objects in the page and makes the
+driver track one more remote object per argument. The capture here keeps
+only what the tests and reports read (type, text and source location),
+disposes the handles as soon as a message arrives, and stores messages in
+ring buffers so a chatty page cannot grow them without bound:
+
+- page.console_messages   the last CONSOLE_BUFFER_SIZE messages at or above
+                          CONSOLE_CAPTURE_LEVEL (nothing below is stored)
+- page.console_errors     the last CONSOLE_MAX_ERRORS error texts, kept
+                          apart so noise cannot push errors out
+
+Both print like lists and count what they dropped (``.dropped``).
+"""
+
+import asyncio
+import inspect
+from collections import deque
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import (
+    CAPTURE_CONSOLE_LOGS, CONSOLE_CAPTURE_LEVEL, CONSOLE_BUFFER_SIZE, CONSOLE_MAX_ERRORS,
+    CONSOLE_MAX_TEXT_CHARS
+)
+
+# Console message types by severity; unlisted types (dir, table, trace,
+# startGroup, ...) count as debug output
+SEVERITY = {"debug": 0, "log": 1, "info": 1, "warning": 2, "error": 3, "assert": 3}
+
+
+class RingBuffer(deque):
+    """A deque(maxlen) that counts dropped entries and prints like a list."""
+
+    def __init__(self, maxlen: int):
+        """Initialize empty buffer."""
+        super().__init__(maxlen=maxlen)
+        self.dropped = 0
+
+    def append(self, entry) -> None:
+        if len(self) == self.maxlen:
+            self.dropped += 1
+        super().append(entry)
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+def _dispose(handles) -> None:
+    """Release JSHandles (sync or async API) without waiting on the page."""
+
+    for handle in handles:
+        try:
+            result = handle.dispose()
+            if inspect.isawaitable(result):
+                asyncio.ensure_future(result)
+        except Exception:
+            pass  # Page or context already closed
+
+
+def _location(msg) -> str:
+    location = msg.location or {}
+    if not location.get("url"):
+        return ""
+    return f"{location['url']}:{location.get('lineNumber', 0)}:{location.get('columnNumber', 0)}"
+
+
+class ConsoleCapture:
+    """Console listener keeping serialised messages in ring buffers."""
+
+    def __init__(self, min_level: str = CONSOLE_CAPTURE_LEVEL,
+                 buffer_size: int = CONSOLE_BUFFER_SIZE, max_errors: int = CONSOLE_MAX_ERRORS):
+        """Initialize capture; attach() registers it on a page."""
+        # With CAPTURE_CONSOLE_LOGS off only errors are kept
+        self.min_severity = SEVERITY.get(min_level if CAPTURE_CONSOLE_LOGS else "error", 0)
+        self.messages = RingBuffer(buffer_size)
+        self.errors = RingBuffer(max_errors)
+
+    def on_console(self, msg) -> None:
+        # The driver keeps each argument alive until its handle is disposed
+        _dispose(msg.args)
+
+        severity = SEVERITY.get(msg.type, 0)
+        if severity < self.min_severity:
+            return
+        text = msg.text[:CONSOLE_MAX_TEXT_CHARS]
+        self.messages.append({
+            'type': msg.type,
+            'text': text,
+            'location': _location(msg),
+        })
+        if msg.type == 'error':
+            self.errors.append(text)
+
+    def attach(self, page):
+        """Listen on a page; exposes page.console_messages/console_errors."""
+
+        page.on('console', self.on_console)
+        page.console_messages = self.messages
+        page.console_errors = self.errors
+        return page
+
+
+def attach_console_capture(page):
+    """Capture console messages on page.console_messages/console_errors."""
+
+    return ConsoleCapture().attach(page)
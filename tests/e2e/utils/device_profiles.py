@@ -0,0 +1,102 @@
+"""
+Device profiles for performance tests.
+
+A profile (DEVICE_PROFILES in config.py) combines what a context is
+created with (viewport, scale factor, mobile and touch emulation) and what
+is applied per page over CDP once it exists:
+
+- Emulation.setCPUThrottlingRate     CPU slowdown factor
+- Network.emulateNetworkConditions   latency and throughput
+
+CDP is Chromium-only; other browsers get the viewport and touch emulation
+without throttling. Responses from the network cache
+(utils/network_cache.py) are fulfilled in the driver and would bypass
+network throttling, so contexts of profiles with network conditions are
+created without it and fetch everything over the (throttled) network.
+
+Metrics recorded under a non-default profile are keyed
+"<scenario>@<profile>" so they get their own budgets and perf baseline.
+"""
+
+import warnings
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import BROWSER, DEVICE_PROFILES, DEFAULT_DEVICE_PROFILE
+
+CONTEXT_OPTIONS = ("viewport", "device_scale_factor", "is_mobile", "has_touch")
+
+
+def get_profile(name: str) -> Dict:
+    """Look up a profile by name."""
+
+    try:
+        return DEVICE_PROFILES[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown device profile {name!r} (expected one of {', '.join(DEVICE_PROFILES)})"
+        ) from None
+
+
+def context_options(name: str) -> Dict:
+    """BrowserContext options for a profile."""
+
+    profile = get_profile(name)
+    return {option: profile[option] for option in CONTEXT_OPTIONS}
+
+
+def throttles_network(name: str) -> bool:
+    """Whether a profile emulates network conditions."""
+
+    return bool(get_profile(name)["network"])
+
+
+def apply_device_profile(page, name: str):
+    """Throttle a page's CPU and network as the profile says.
+
+    Returns the CDP session (None if nothing was throttled); the page keeps
+    a reference, since detaching it would lift the throttling.
+    """
+
+    profile = get_profile(name)
+    if profile["cpu_throttling_rate"] <= 1 and not profile["network"]:
+        return None
+    if BROWSER != "chromium":
+        warnings.warn(f"Device profile {name!r}: CPU/network throttling needs Chromium, skipped")
+        return None
+
+    session = page.context.new_cdp_session(page)
+    session.send("Emulation.setCPUThrottlingRate", {"rate": profile["cpu_throttling_rate"]})
+    if profile["network"]:
+        session.send("Network.enable")
+        session.send("Network.emulateNetworkConditions", {"offline": False, **profile["network"]})
+    page.device_profile_session = session
+    return session
+
+
+def interaction_budgets(name: Optional[str] = None) -> Dict[str, float]:
+    """Interaction budgets (ms) of a profile (default: desktop)."""
+
+    return get_profile(name or DEFAULT_DEVICE_PROFILE)["interaction_budgets_ms"]
+
+
+def action_budget_ms(name: Optional[str] = None) -> float:
+    """Budget (ms) for a whole user action of a profile (default: desktop)."""
+
+    return get_profile(name or DEFAULT_DEVICE_PROFILE)["action_budget_ms"]
+
+
+def profile_key(scenario_id: str, name: Optional[str]) -> str:
+    """Report key for a scenario's metrics under a profile."""
+
+    if scenario_id is None or name in (None, DEFAULT_DEVICE_PROFILE):
+        return scenario_id
+    return f"{scenario_id}@{name}"
+
+
+def split_profile_key(key: str) -> Tuple[str, str]:
+    """(scenario_id, profile) of a report key."""
+
+    scenario_id, _, name = key.partition("@")
+    return scenario_id, name or DEFAULT_DEVICE_PROFILE
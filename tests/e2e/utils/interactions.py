@@ -0,0 +1,187 @@
+"""
+Interaction latency probes for E2E tests.
+
+An init script timestamps click -> DOM mutation -> next paint for the
+interactions users feel (blank reveal, popover open/close, Next Turn)
+with performance.mark/measure, and pairs each sample with its Event
+Timing entry. Tests drain the samples per page; reports summarise them
+as p50/p95/max per interaction type and scenario.
+"""
+
+import math
+from typing import Dict, List
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import INTERACTION_PROBE_TIMEOUT_MS, INTERACTION_BUDGETS_MS
+
+# Installed with context.add_init_script(). Clicks are classified in the
+# capture phase, before React handles them:
+#   blank_reveal  - "Tap to discover" button until its label is replaced
+#   modal_open    - same click, until the Native Alternatives popover exists
+#   popover_close - any button in a blank with an open popover, until it closes
+#   next_turn     - "Next Turn" until the turn counter changes
+INTERACTION_PROBE_INIT_JS = """
+(() => {
+    const TIMEOUT_MS = __TIMEOUT_MS__;
+    const probe = { samples: [], pending: new Set(), events: [] };
+    window.__e2eInteractions = probe;
+
+    try {
+        new PerformanceObserver((list) => {
+            for (const entry of list.getEntries()) {
+                if (entry.name === 'click') {
+                    probe.events.push({
+                        startTime: entry.startTime,
+                        duration: entry.duration,
+                        processingStart: entry.processingStart,
+                    });
+                }
+            }
+        }).observe({ type: 'event', durationThreshold: 16, buffered: true });
+    } catch (e) {
+        // Event Timing not supported
+    }
+
+    const popoverOpen = (container) =>
+        !!container && container.textContent.includes('Native Alternatives');
+    const turnCounter = () => {
+        const el = [...document.querySelectorAll('span, div')]
+            .find((node) => node.children.length === 0 && /^\\s*\\d+ \\/ \\d+\\s*$/.test(node.textContent));
+        return el ? el.textContent.trim() : null;
+    };
+    // A task queued from rAF runs once the frame has been painted
+    const nextPaint = () => new Promise((resolve) =>
+        requestAnimationFrame(() => setTimeout(() => resolve(performance.now()), 0)));
+
+    const track = (kind, start, isDone) => {
+        performance.mark(`e2e:${kind}:start`, { startTime: start });
+        const mutated = new Promise((resolve) => {
+            const observer = new MutationObserver(() => {
+                if (isDone()) {
+                    clearTimeout(timer);
+                    observer.disconnect();
+                    resolve(performance.now());
+                }
+            });
+            const timer = setTimeout(() => {
+                observer.disconnect();
+                resolve(null);
+            }, TIMEOUT_MS);
+            observer.observe(document.body, {
+                childList: true, subtree: true, characterData: true, attributes: true,
+            });
+        });
+
+        const sample = mutated.then(async (mutationAt) => {
+            if (mutationAt === null) {
+                probe.samples.push({ kind, start, timed_out: true });
+                return;
+            }
+            const paintAt = await nextPaint();
+            performance.measure(`e2e:${kind}`, { start, end: paintAt });
+            probe.samples.push({
+                kind,
+                start,
+                to_mutation_ms: mutationAt - start,
+                to_paint_ms: paintAt - start,
+            });
+        });
+        probe.pending.add(sample);
+        sample.finally(() => probe.pending.delete(sample));
+    };
+
+    window.addEventListener('click', (event) => {
+        const button = event.target.closest && event.target.closest('button');
+        if (!button) return;
+
+        const start = event.timeStamp;
+        const container = button.closest('.interactive-blank-container');
+        const text = button.textContent || '';
+
+        if (popoverOpen(container)) {
+            track('popover_close', start, () => !popoverOpen(container));
+        } else if (text.includes('Tap to discover')) {
+            track('blank_reveal', start, () => !button.textContent.includes('Tap to discover'));
+            track('modal_open', start, () => popoverOpen(container));
+        } else if (text.includes('Next Turn')) {
+            const before = turnCounter();
+            track('next_turn', start, () => !button.isConnected || turnCounter() !== before);
+        }
+    }, true);
+
+    probe.drain = async () => {
+        await Promise.all([...probe.pending]);
+        const samples = probe.samples.splice(0);
+        for (const sample of samples) {
+            const entry = probe.events.find((e) => Math.abs(e.startTime - sample.start) < 1);
+            sample.event_duration_ms = entry ? entry.duration : null;
+            sample.input_delay_ms = entry ? entry.processingStart - entry.startTime : null;
+        }
+        return samples;
+    };
+})();
+""".replace("__TIMEOUT_MS__", str(INTERACTION_PROBE_TIMEOUT_MS))
+
+
+def install_interaction_probe(context) -> None:
+    """Register the interaction probe on every page of a context."""
+
+    context.add_init_script(INTERACTION_PROBE_INIT_JS)
+
+
+def drain_interactions(page) -> List[Dict]:
+    """Return (and clear) the interaction samples recorded on a page."""
+
+    samples = page.evaluate(
+        "() => window.__e2eInteractions ? window.__e2eInteractions.drain() : []"
+    )
+    for sample in samples:
+        sample.pop("start", None)
+        for key, value in sample.items():
+            if isinstance(value, float):
+                sample[key] = round(value, 1)
+    return samples
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Linear-interpolated percentile (pct in 0-100)."""
+
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = math.floor(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarise_latencies(latencies: List[float]) -> Dict:
+    """p50/p95/max of click-to-paint latencies (ms)."""
+
+    if not latencies:
+        return {"count": 0, "p50": None, "p95": None, "max": None}
+    return {
+        "count": len(latencies),
+        "p50": round(percentile(latencies, 50), 1),
+        "p95": round(percentile(latencies, 95), 1),
+        "max": round(max(latencies), 1),
+    }
+
+
+def latencies_by_kind(samples: List[Dict]) -> Dict[str, List[float]]:
+    """Group click-to-paint latencies by interaction type (timeouts excluded)."""
+
+    grouped = {}
+    for sample in samples:
+        if not sample.get("timed_out"):
+            grouped.setdefault(sample["kind"], []).append(sample["to_paint_ms"])
+    return grouped
+
+
+def over_budget(samples: List[Dict], budgets: Dict[str, float] = INTERACTION_BUDGETS_MS) -> bool:
+    """True if any sample timed out or exceeded its interaction budget."""
+
+    return any(
+        sample.get("timed_out")
+        or sample["to_paint_ms"] > budgets.get(sample["kind"], float("inf"))
+        for sample in samples
+    )
@@ -0,0 +1,138 @@
+"""
+Local hermetic app server for E2E tests.
+
+Builds the Vite app once (reusing a cached build when the sources have
+not changed) and serves it from an in-process threaded static server
+with SPA fallback, so tests never depend on the live deployment.
+"""
+
+import hashlib
+import shutil
+import subprocess
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import (
+    PROJECT_ROOT, LOCAL_SERVER_HOST, BUILD_CACHE_DIR, BUILD_CACHE_KEEP,
+    BUILD_INPUTS
+)
+
+
+def source_hash(root: Path = PROJECT_ROOT, inputs=BUILD_INPUTS) -> str:
+    """Hash every file that feeds the production build."""
+
+    digest = hashlib.sha256()
+    for pattern in inputs:
+        for path in sorted(root.glob(pattern)):
+            if not path.is_file() or "node_modules" in path.parts:
+                continue
+            digest.update(str(path.relative_to(root)).encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def _prune_builds(keep: str) -> None:
+    """Drop old cached builds, keeping the newest BUILD_CACHE_KEEP."""
+
+    builds = sorted(
+        (p for p in BUILD_CACHE_DIR.iterdir() if p.is_dir() and p.name != keep),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True,
+    )
+    for stale in builds[BUILD_CACHE_KEEP - 1:]:
+        shutil.rmtree(stale, ignore_errors=True)
+
+
+def build_app(force: bool = False) -> Path:
+    """Return a production build of the app, building it only if needed."""
+
+    build_dir = BUILD_CACHE_DIR / source_hash()
+    if (build_dir / "index.html").exists() and not force:
+        return build_dir
+
+    BUILD_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_dir = build_dir.with_name(build_dir.name + ".tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    # vite directly: `npm run build` also runs the content validators
+    result = subprocess.run(
+        ["npx", "vite", "build", "--outDir", str(tmp_dir), "--emptyOutDir"],
+        capture_output=True,
+        text=True,
+        cwd=PROJECT_ROOT,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"App build failed:\n{result.stdout}{result.stderr}")
+
+    # Rename last so a half-written build is never picked up as cached
+    shutil.rmtree(build_dir, ignore_errors=True)
+    tmp_dir.rename(build_dir)
+    _prune_builds(keep=build_dir.name)
+    return build_dir
+
+
+class SPARequestHandler(SimpleHTTPRequestHandler):
+    """Static file handler that falls back to index.html for app routes."""
+
+    def send_head(self):
+        path = Path(self.translate_path(self.path))
+        if not path.exists() and not Path(self.path.split("?")[0]).suffix:
+            self.path = "/index.html"  # Client-side route, e.g. /scenario/{id}
+        return super().send_head()
+
+    def end_headers(self):
+        # Hashed bundles never change; documents must always revalidate
+        if self.path.startswith("/assets/"):
+            self.send_header("Cache-Control", "public, max-age=31536000, immutable")
+        else:
+            self.send_header("Cache-Control", "no-cache")
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        pass  # Keep test output clean
+
+
+class LocalAppServer:
+    """Serve a build directory on a free local port."""
+
+    def __init__(self, root: Path, host: str = LOCAL_SERVER_HOST, port: int = 0):
+        """Initialize server; port 0 picks a free port."""
+        self.root = Path(root)
+        self.host = host
+        self.port = port
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> "LocalAppServer":
+        """Start serving in a background thread."""
+
+        handler = partial(SPARequestHandler, directory=str(self.root))
+        self._httpd = ThreadingHTTPServer((self.host, self.port), handler)
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="e2e-app-server", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the server."""
+
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+
+def start_local_app_server() -> LocalAppServer:
+    """Build (or reuse) the app and serve it locally."""
+
+    return LocalAppServer(build_app()).start()
@@ -0,0 +1,94 @@
+"""
+Rendering metrics for E2E page loads.
+
+An init script installs PerformanceObservers (LCP, CLS, long tasks) before
+any app code runs; collect_page_metrics() then reads them together with
+navigation timing, paint entries and JS heap size via page.evaluate.
+"""
+
+# Installed with context.add_init_script(); buffered observers also pick
+# up entries recorded before they were registered
+WEB_VITALS_INIT_JS = """
+(() => {
+    const vitals = { lcp: null, cls: 0, longTasks: [] };
+    window.__e2eVitals = vitals;
+
+    const observe = (type, onEntry) => {
+        try {
+            new PerformanceObserver((list) => list.getEntries().forEach(onEntry))
+                .observe({ type, buffered: true });
+        } catch (e) {
+            // Entry type not supported by this browser
+        }
+    };
+
+    observe('largest-contentful-paint', (entry) => {
+        vitals.lcp = entry.renderTime || entry.startTime;
+    });
+    observe('layout-shift', (entry) => {
+        if (!entry.hadRecentInput) vitals.cls += entry.value;
+    });
+    observe('longtask', (entry) => {
+        vitals.longTasks.push({ start: entry.startTime, duration: entry.duration });
+    });
+})();
+"""
+
+_COLLECT_JS = """
+() => {
+    const nav = performance.getEntriesByType('navigation')[0];
+    const paint = {};
+    for (const entry of performance.getEntriesByType('paint')) {
+        paint[entry.name] = entry.startTime;
+    }
+    const vitals = window.__e2eVitals || { lcp: null, cls: null, longTasks: [] };
+    const blocking = vitals.longTasks
+        .reduce((total, task) => total + Math.max(0, task.duration - 50), 0);
+
+    return {
+        ttfb_ms: nav ? nav.responseStart : null,
+        dom_interactive_ms: nav ? nav.domInteractive : null,
+        dom_content_loaded_ms: nav ? nav.domContentLoadedEventEnd : null,
+        load_ms: nav ? nav.loadEventEnd : null,
+        transfer_size_bytes: nav ? nav.transferSize : null,
+        fp_ms: paint['first-paint'] ?? null,
+        fcp_ms: paint['first-contentful-paint'] ?? null,
+        lcp_ms: vitals.lcp,
+        cls: vitals.cls,
+        long_tasks: vitals.longTasks.length,
+        total_blocking_time_ms: blocking,
+        js_heap_used_bytes: performance.memory ? performance.memory.usedJSHeapSize : null,
+    };
+}
+"""
+
+
+def install_web_vitals(context) -> None:
+    """Register the web vitals observers on every page of a context."""
+
+    context.add_init_script(WEB_VITALS_INIT_JS)
+
+
+def collect_page_metrics(page) -> dict:
+    """Read navigation timing, paint, LCP, CLS, long tasks and heap size."""
+
+    return _rounded(page.evaluate(_COLLECT_JS))
+
+
+async def install_web_vitals_async(context) -> None:
+    """install_web_vitals() for an async API context."""
+
+    await context.add_init_script(WEB_VITALS_INIT_JS)
+
+
+async def collect_page_metrics_async(page) -> dict:
+    """collect_page_metrics() for an async API page."""
+
+    return _rounded(await page.evaluate(_COLLECT_JS))
+
+
+def _rounded(metrics: dict) -> dict:
+    return {
+        key: round(value, 4 if key == "cls" else 1) if isinstance(value, float) else value
+        for key, value in metrics.items()
+    }
@@ -0,0 +1,187 @@
+"""
+Network request cache for E2E page loads.
+
+Routes every request of a browser context through a record/replay cache:
+the first fetch of a static resource (bundles, CSS, fonts, images) is
+recorded to a content-addressed store shared by all workers of a run and
+then served from memory to every later context. Non-essential
+third-party requests and media (e.g. the hero video) are blocked, so a
+navigation is bounded by app render time rather than the network.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from urllib.parse import urlparse
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import (
+    NETWORK_CACHE_DIR, NETWORK_CACHE_KEEP_RUNS, NETWORK_CACHE_RESOURCE_TYPES,
+    NETWORK_ALLOWED_THIRD_PARTY_HOSTS, NETWORK_BLOCKED_RESOURCE_TYPES
+)
+
+# Replayed bodies are already decoded, so these must not be replayed
+_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class NetworkCache:
+    """Record/replay cache installed on browser contexts via routing."""
+
+    def __init__(self, app_host: str, run_id: str = None, root: Path = NETWORK_CACHE_DIR):
+        """Initialize cache for one run; app_host is the app under test."""
+        self.app_host = app_host
+        self.run_id = run_id or os.environ.get("E2E_RUN_ID") or f"pid-{os.getpid()}"
+        self.root = Path(root)
+        self.store_dir = self.root / self.run_id
+        self.blobs_dir = self.store_dir / "blobs"
+        self.entries_dir = self.store_dir / "entries"
+        self.blobs_dir.mkdir(parents=True, exist_ok=True)
+        self.entries_dir.mkdir(parents=True, exist_ok=True)
+        self._memory = {}
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "recorded": 0, "blocked": 0, "passed": 0}
+        self._prune_runs()
+
+    def _prune_runs(self) -> None:
+        """Drop stores from old runs, keeping the newest NETWORK_CACHE_KEEP_RUNS."""
+
+        runs = sorted(
+            (p for p in self.root.iterdir() if p.is_dir() and p != self.store_dir),
+            key=lambda p: p.stat().st_mtime,
+            reverse=True,
+        )
+        for stale in runs[NETWORK_CACHE_KEEP_RUNS - 1:]:
+            shutil.rmtree(stale, ignore_errors=True)
+
+    def install(self, context) -> None:
+        """Route all requests of a context through the cache."""
+
+        context.route("**/*", self._handle)
+
+    async def install_async(self, context) -> None:
+        """install() for an async API context."""
+
+        await context.route("**/*", self._handle_async)
+
+    def should_block(self, request) -> bool:
+        """True for media and for third-party hosts the app can run without."""
+
+        if request.resource_type in NETWORK_BLOCKED_RESOURCE_TYPES:
+            return True
+        host = urlparse(request.url).hostname or ""
+        return host != self.app_host and host not in NETWORK_ALLOWED_THIRD_PARTY_HOSTS
+
+    def is_cacheable(self, request) -> bool:
+        """Only GETs of static resources; documents and API calls stay live."""
+
+        return (
+            request.method == "GET"
+            and request.resource_type in NETWORK_CACHE_RESOURCE_TYPES
+            and urlparse(request.url).scheme in ("http", "https")
+        )
+
+    def _handle(self, route) -> None:
+        request = route.request
+
+        if self.should_block(request):
+            self.stats["blocked"] += 1
+            route.abort("blockedbyclient")
+            return
+
+        if not self.is_cacheable(request):
+            self.stats["passed"] += 1
+            route.continue_()
+            return
+
+        entry = self.lookup(request.url)
+        if entry is None:
+            try:
+                response = route.fetch()
+            except Exception:
+                route.abort("failed")
+                return
+            entry = self.record(request.url, response.status, response.headers, response.body())
+
+        route.fulfill(status=entry["status"], headers=entry["headers"], body=entry["body"])
+
+    async def _handle_async(self, route) -> None:
+        # Mirrors _handle(); lookups and recording are local file I/O
+        request = route.request
+
+        if self.should_block(request):
+            self.stats["blocked"] += 1
+            await route.abort("blockedbyclient")
+            return
+
+        if not self.is_cacheable(request):
+            self.stats["passed"] += 1
+            await route.continue_()
+            return
+
+        entry = self.lookup(request.url)
+        if entry is None:
+            try:
+                response = await route.fetch()
+            except Exception:
+                await route.abort("failed")
+                return
+            entry = self.record(request.url, response.status, response.headers, await response.body())
+
+        await route.fulfill(status=entry["status"], headers=entry["headers"], body=entry["body"])
+
+    def _entry_path(self, url: str) -> Path:
+        return self.entries_dir / f"{_digest(url.encode())}.json"
+
+    def lookup(self, url: str):
+        """Return a recorded response from memory, then from the shared store."""
+
+        if url in self._memory:
+            self.stats["memory_hits"] += 1
+            return self._memory[url]
+
+        entry_path = self._entry_path(url)
+        if not entry_path.exists():
+            return None
+        try:
+            with open(entry_path, 'r') as f:
+                meta = json.load(f)
+            body = (self.blobs_dir / meta["sha256"]).read_bytes()
+        except (OSError, ValueError, KeyError):
+            return None  # Another worker is mid-write; fetch it ourselves
+
+        entry = {"status": meta["status"], "headers": meta["headers"], "body": body}
+        self._memory[url] = entry
+        self.stats["disk_hits"] += 1
+        return entry
+
+    def record(self, url: str, status: int, headers: dict, body: bytes) -> dict:
+        """Store a response; only successful responses are kept."""
+
+        headers = {k: v for k, v in headers.items() if k.lower() not in _DROPPED_HEADERS}
+        entry = {"status": status, "headers": headers, "body": body}
+        if status != 200:
+            return entry
+
+        self._memory[url] = entry
+        self.stats["recorded"] += 1
+
+        # Write blob then entry, each via rename, so readers never see partial files
+        sha = _digest(body)
+        blob_path = self.blobs_dir / sha
+        if not blob_path.exists():
+            tmp_blob = blob_path.with_name(f"{sha}.{os.getpid()}.tmp")
+            tmp_blob.write_bytes(body)
+            os.replace(tmp_blob, blob_path)
+
+        entry_path = self._entry_path(url)
+        tmp_entry = entry_path.with_name(f"{entry_path.name}.{os.getpid()}.tmp")
+        with open(tmp_entry, 'w') as f:
+            json.dump({"url": url, "status": status, "headers": headers, "sha256": sha}, f)
+        os.replace(tmp_entry, entry_path)
+
+        return entry
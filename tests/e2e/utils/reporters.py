@@ -4,13 +4,138 @@ Report generation utilities for E2E tests.
 Generates JSON test results and HTML reports with embedded screenshots.
 """
 
+import hashlib
 import json
+import os
+import queue
+import re
+import shutil
+import threading
 from datetime import datetime
+from html import escape
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from config import REPORTS_DIR, JSON_REPORTS_DIR
+from config import (
+    REPORTS_DIR, JSON_REPORTS_DIR, INTERACTION_BUDGET_STAT
+)
+from .device_profiles import interaction_budgets, split_profile_key
+from .interactions import latencies_by_kind, summarise_latencies
+from .tracing import TraceRecorder
+
+
+# Shared by the batch and streaming HTML reports
+REPORT_CSS = """
+        * { margin: 0; padding: 0; box-sizing: border-box; }
+        body {
+            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Oxygen, Ubuntu, Cantarell, sans-serif;
+            background: #f5f5f5;
+            color: #333;
+            padding: 20px;
+        }
+        .container {
+            max-width: 1200px;
+            margin: 0 auto;
+            background: white;
+            border-radius: 8px;
+            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+            padding: 30px;
+        }
+        h1 {
+            color: #1a73e8;
+            margin-bottom: 20px;
+            font-size: 28px;
+        }
+        .summary {
+            display: grid;
+            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
+            gap: 20px;
+            margin-bottom: 40px;
+        }
+        .summary-card {
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            color: white;
+            padding: 20px;
+            border-radius: 8px;
+            text-align: center;
+        }
+        .summary-card.passed {
+            background: linear-gradient(135deg, #56ab2f 0%, #a8e063 100%);
+        }
+        .summary-card.failed {
+            background: linear-gradient(135deg, #eb3349 0%, #f45c43 100%);
+        }
+        .summary-card h3 {
+            font-size: 14px;
+            opacity: 0.9;
+            margin-bottom: 10px;
+            text-transform: uppercase;
+        }
+        .summary-card .value {
+            font-size: 32px;
+            font-weight: bold;
+        }
+        .status-badge {
+            display: inline-block;
+            padding: 4px 12px;
+            border-radius: 20px;
+            font-size: 12px;
+            font-weight: bold;
+            margin-left: 10px;
+        }
+        .status-badge.passed {
+            background: #c8e6c9;
+            color: #2e7d32;
+        }
+        .status-badge.failed {
+            background: #ffcdd2;
+            color: #c62828;
+        }
+        table {
+            width: 100%;
+            border-collapse: collapse;
+            margin-top: 30px;
+        }
+        th {
+            background: #f5f5f5;
+            padding: 12px;
+            text-align: left;
+            font-weight: 600;
+            border-bottom: 2px solid #ddd;
+        }
+        td {
+            padding: 12px;
+            border-bottom: 1px solid #eee;
+        }
+        tr:hover { background: #fafafa; }
+        .scenario-failed {
+            background-color: #fff3e0 !important;
+        }
+        .scenario-failed:hover {
+            background-color: #ffe0b2 !important;
+        }
+        .pass-rate {
+            font-weight: bold;
+            color: #2e7d32;
+        }
+        .pass-rate.low {
+            color: #c62828;
+        }
+        .details {
+            margin-top: 20px;
+            font-size: 12px;
+            color: #666;
+        }
+        .footer {
+            margin-top: 40px;
+            padding-top: 20px;
+            border-top: 1px solid #eee;
+            text-align: center;
+            color: #999;
+            font-size: 12px;
+        }
+"""
 
 
 class TestReport:
@@ -19,7 +144,12 @@ class TestReport:
     def __init__(self, agent_id: int):
         """Initialize report for a test agent."""
         self.agent_id = agent_id
+        self.run_id = os.environ.get("E2E_RUN_ID")
         self.scenarios = []
+        self.metrics = {}
+        self.metric_samples = {}
+        self.interactions = {}
+        self.traces = []
         self.start_time = datetime.now()
 
     def add_scenario_result(
@@ -42,6 +172,48 @@ class TestReport:
             "error_message": error_message,
         })
 
+    def add_scenario_metrics(self, scenario_id: str, metrics: Dict[str, Any]) -> None:
+        """Add rendering metrics (web vitals, timings) for a scenario load."""
+
+        self.metrics.setdefault(scenario_id, {}).update(metrics)
+        self.add_metric_samples(scenario_id, metrics)
+
+    def add_metric_samples(self, scenario_id: str, metrics: Dict[str, Any]) -> None:
+        """Keep a load's metrics as regression gate samples only (not reported)."""
+
+        samples = self.metric_samples.setdefault(scenario_id, {})
+        for name, value in metrics.items():
+            if isinstance(value, (int, float)):
+                samples.setdefault(name, []).append(value)
+
+    def add_interaction_samples(self, scenario_id: str, samples: List[Dict[str, Any]]) -> None:
+        """Add click-to-paint interaction samples (see utils/interactions.py)."""
+
+        scenario = self.interactions.setdefault(scenario_id, {})
+        for kind, latencies in latencies_by_kind(samples).items():
+            scenario.setdefault(kind, []).extend(latencies)
+
+    def add_trace(self, nodeid: str, scenario_id: str, path: str, reason: str) -> None:
+        """Add a kept Playwright trace (see utils/tracing.py)."""
+
+        self.traces.append({
+            "nodeid": nodeid,
+            "scenario_id": scenario_id,
+            "path": path,
+            "reason": reason,
+        })
+
+    def get_interaction_summary(self) -> Dict[str, Dict[str, Any]]:
+        """p50/p95/max per interaction type, per scenario."""
+
+        return {
+            scenario_id: {
+                kind: {**summarise_latencies(latencies), "samples": latencies}
+                for kind, latencies in kinds.items()
+            }
+            for scenario_id, kinds in self.interactions.items()
+        }
+
     def get_summary(self) -> Dict[str, Any]:
         """Get summary statistics."""
 
@@ -68,15 +240,44 @@ class TestReport:
     def save_json(self) -> str:
         """Save report as JSON."""
 
+        filepath = JSON_REPORTS_DIR / f"agent_{self.agent_id}.json"
+
+        # Work items of one run share an agent file; keep earlier results
+        if self.run_id and filepath.exists():
+            try:
+                with open(filepath, 'r') as f:
+                    previous = json.load(f)
+            except (OSError, ValueError):
+                previous = {}
+            if previous.get("run_id") == self.run_id:
+                own_ids = {s["id"] for s in self.scenarios}
+                self.scenarios = [
+                    s for s in previous.get("scenarios", []) if s["id"] not in own_ids
+                ] + self.scenarios
+                for scenario_id, metrics in previous.get("metrics", {}).items():
+                    self.metrics[scenario_id] = {**metrics, **self.metrics.get(scenario_id, {})}
+                for scenario_id, names in previous.get("metric_samples", {}).items():
+                    for name, values in names.items():
+                        self.metric_samples.setdefault(scenario_id, {}).setdefault(name, [])[:0] = values
+                self.traces[:0] = previous.get("traces", [])
+                for scenario_id, kinds in previous.get("interactions", {}).items():
+                    for kind, stats in kinds.items():
+                        latencies = self.interactions.setdefault(scenario_id, {}).setdefault(kind, [])
+                        latencies[:0] = stats.get("samples", [])
+
         report_data = {
             "agent_id": self.agent_id,
+            "run_id": self.run_id,
             "timestamp": self.start_time.isoformat(),
             "duration_ms": (datetime.now() - self.start_time).total_seconds() * 1000,
             "summary": self.get_summary(),
             "scenarios": self.scenarios,
+            "metrics": self.metrics,
+            "metric_samples": self.metric_samples,
+            "interactions": self.get_interaction_summary(),
+            "traces": self.traces,
         }
 
-        filepath = JSON_REPORTS_DIR / f"agent_{self.agent_id}.json"
         with open(filepath, 'w') as f:
             json.dump(report_data, f, indent=2)
 
@@ -132,6 +333,25 @@ class HTMLReporter:
 
         return output_path
 
+    @staticmethod
+    def generate_run_sections(parallelism: Dict = None) -> str:
+        """Metrics, interaction latency, trace and parallelism sections of a run."""
+
+        results = []
+        for json_file in sorted(JSON_REPORTS_DIR.glob("agent_*.json")):
+            try:
+                with open(json_file, 'r') as f:
+                    results.append(json.load(f))
+            except Exception as e:
+                print(f"Error reading {json_file}: {e}")
+
+        return (
+            HTMLReporter._generate_metrics_html(results)
+            + HTMLReporter._generate_interactions_html(results)
+            + HTMLReporter._generate_traces_html(results)
+            + HTMLReporter._generate_parallelism_html(parallelism)
+        )
+
     @staticmethod
     def _generate_html(results: List[Dict], summary: Dict) -> str:
         """Generate HTML content."""
@@ -139,6 +359,8 @@ class HTMLReporter:
         total_checks = summary["total_checks"]
         passed_checks = summary["passed_checks"]
         pass_rate = (passed_checks / total_checks * 100) if total_checks > 0 else 0
+        total_scenarios = summary["total_scenarios"]
+        scenario_pass_rate = (summary["passed_scenarios"] / total_scenarios * 100) if total_scenarios > 0 else 0
 
         status_color = "green" if pass_rate >= 95 else "orange" if pass_rate >= 80 else "red"
         status_emoji = "✅" if pass_rate >= 95 else "⚠️" if pass_rate >= 80 else "❌"
@@ -150,115 +372,7 @@ class HTMLReporter:
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <style>
-        * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Oxygen, Ubuntu, Cantarell, sans-serif;
-            background: #f5f5f5;
-            color: #333;
-            padding: 20px;
-        }}
-        .container {{
-            max-width: 1200px;
-            margin: 0 auto;
-            background: white;
-            border-radius: 8px;
-            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-            padding: 30px;
-        }}
-        h1 {{
-            color: #1a73e8;
-            margin-bottom: 20px;
-            font-size: 28px;
-        }}
-        .summary {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-            gap: 20px;
-            margin-bottom: 40px;
-        }}
-        .summary-card {{
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 20px;
-            border-radius: 8px;
-            text-align: center;
-        }}
-        .summary-card.passed {{
-            background: linear-gradient(135deg, #56ab2f 0%, #a8e063 100%);
-        }}
-        .summary-card.failed {{
-            background: linear-gradient(135deg, #eb3349 0%, #f45c43 100%);
-        }}
-        .summary-card h3 {{
-            font-size: 14px;
-            opacity: 0.9;
-            margin-bottom: 10px;
-            text-transform: uppercase;
-        }}
-        .summary-card .value {{
-            font-size: 32px;
-            font-weight: bold;
-        }}
-        .status-badge {{
-            display: inline-block;
-            padding: 4px 12px;
-            border-radius: 20px;
-            font-size: 12px;
-            font-weight: bold;
-            margin-left: 10px;
-        }}
-        .status-badge.passed {{
-            background: #c8e6c9;
-            color: #2e7d32;
-        }}
-        .status-badge.failed {{
-            background: #ffcdd2;
-            color: #c62828;
-        }}
-        table {{
-            width: 100%;
-            border-collapse: collapse;
-            margin-top: 30px;
-        }}
-        th {{
-            background: #f5f5f5;
-            padding: 12px;
-            text-align: left;
-            font-weight: 600;
-            border-bottom: 2px solid #ddd;
-        }}
-        td {{
-            padding: 12px;
-            border-bottom: 1px solid #eee;
-        }}
-        tr:hover {{ background: #fafafa; }}
-        .scenario-failed {{
-            background-color: #fff3e0 !important;
-        }}
-        .scenario-failed:hover {{
-            background-color: #ffe0b2 !important;
-        }}
-        .pass-rate {{
-            font-weight: bold;
-            color: #2e7d32;
-        }}
-        .pass-rate.low {{
-            color: #c62828;
-        }}
-        .details {{
-            margin-top: 20px;
-            font-size: 12px;
-            color: #666;
-        }}
-        .footer {{
-            margin-top: 40px;
-            padding-top: 20px;
-            border-top: 1px solid #eee;
-            text-align: center;
-            color: #999;
-            font-size: 12px;
-        }}
-    </style>
+{REPORT_CSS}    </style>
 </head>
 <body>
     <div class="container">
@@ -279,7 +393,7 @@ class HTMLReporter:
             </div>
             <div class="summary-card">
                 <h3>Pass Rate (Scenarios)</h3>
-                <div class="value">{summary['passed_scenarios']/summary['total_scenarios']*100:.1f}%</div>
+                <div class="value">{scenario_pass_rate:.1f}%</div>
             </div>
             <div class="summary-card">
                 <h3>Total Checks</h3>
@@ -329,7 +443,13 @@ class HTMLReporter:
 
         html += """            </tbody>
         </table>
+"""
+
+        html += HTMLReporter._generate_metrics_html(results)
+        html += HTMLReporter._generate_interactions_html(results)
+        html += HTMLReporter._generate_traces_html(results)
 
+        html += """
         <div class="footer">
             <p>Report generated at """ + datetime.now().strftime("%Y-%m-%d %H:%M:%S") + """</p>
             <p>FluentStep E2E Testing System</p>
@@ -340,3 +460,396 @@ class HTMLReporter:
 """
 
         return html
+
+    @staticmethod
+    def _generate_metrics_html(results: List[Dict]) -> str:
+        """Generate the per-scenario rendering metrics table."""
+
+        metrics = {}
+        for result in results:
+            metrics.update(result.get("metrics", {}))
+        if not metrics:
+            return ""
+
+        def fmt(value, digits=0):
+            return "–" if value is None else f"{value:.{digits}f}"
+
+        html = """
+        <h2 style="margin-top: 40px;">Rendering Metrics by Scenario</h2>
+        <table>
+            <thead>
+                <tr>
+                    <th>Scenario</th>
+                    <th>TTFB (ms)</th>
+                    <th>FCP (ms)</th>
+                    <th>LCP (ms)</th>
+                    <th>CLS</th>
+                    <th>TBT (ms)</th>
+                    <th>Ready (ms)</th>
+                    <th>JS Heap (MB)</th>
+                </tr>
+            </thead>
+            <tbody>
+"""
+        for scenario_id, m in sorted(metrics.items()):
+            heap = m.get("js_heap_used_bytes")
+            html += f"""                <tr>
+                    <td>{scenario_id}</td>
+                    <td>{fmt(m.get('ttfb_ms'))}</td>
+                    <td>{fmt(m.get('fcp_ms'))}</td>
+                    <td>{fmt(m.get('lcp_ms'))}</td>
+                    <td>{fmt(m.get('cls'), 3)}</td>
+                    <td>{fmt(m.get('total_blocking_time_ms'))}</td>
+                    <td>{fmt(m.get('scenario_ready_ms'))}</td>
+                    <td>{fmt(heap / 1048576 if heap else None, 1)}</td>
+                </tr>
+"""
+        html += """            </tbody>
+        </table>
+"""
+        return html
+
+    @staticmethod
+    def _generate_interactions_html(results: List[Dict]) -> str:
+        """Generate the per-scenario interaction latency table."""
+
+        interactions = {}
+        for result in results:
+            interactions.update(result.get("interactions", {}))
+        if not interactions:
+            return ""
+
+        html = f"""
+        <h2 style="margin-top: 40px;">Interaction Latency (click → paint)</h2>
+        <p class="details">Budget: {INTERACTION_BUDGET_STAT} within the per-interaction limit of the device profile (scenario@profile; desktop otherwise)</p>
+        <table>
+            <thead>
+                <tr>
+                    <th>Scenario</th>
+                    <th>Interaction</th>
+                    <th>Samples</th>
+                    <th>p50 (ms)</th>
+                    <th>p95 (ms)</th>
+                    <th>Max (ms)</th>
+                    <th>Budget (ms)</th>
+                </tr>
+            </thead>
+            <tbody>
+"""
+        for scenario_id, kinds in sorted(interactions.items()):
+            for kind, stats in sorted(kinds.items()):
+                budget = interaction_budgets(split_profile_key(scenario_id)[1]).get(kind)
+                over = budget is not None and stats.get(INTERACTION_BUDGET_STAT) is not None \
+                    and stats[INTERACTION_BUDGET_STAT] > budget
+                html += f"""                <tr class="{'scenario-failed' if over else ''}">
+                    <td>{scenario_id}</td>
+                    <td>{kind}</td>
+                    <td>{stats['count']}</td>
+                    <td>{stats['p50']}</td>
+                    <td>{stats['p95']}</td>
+                    <td>{stats['max']}</td>
+                    <td>{budget if budget is not None else '–'}</td>
+                </tr>
+"""
+        html += """            </tbody>
+        </table>
+"""
+        return html
+
+    @staticmethod
+    def _generate_traces_html(results: List[Dict]) -> str:
+        """Generate links to kept Playwright traces."""
+
+        traces = [
+            trace for result in results for trace in result.get("traces", [])
+            if Path(trace["path"]).exists()  # May have been evicted
+        ]
+        if not traces:
+            return ""
+
+        html = """
+        <h2 style="margin-top: 40px;">Playwright Traces</h2>
+        <p class="details">Open with <code>npx playwright show-trace &lt;file&gt;</code> or drop the file on trace.playwright.dev</p>
+        <table>
+            <thead>
+                <tr>
+                    <th>Test</th>
+                    <th>Reason</th>
+                    <th>Trace</th>
+                </tr>
+            </thead>
+            <tbody>
+"""
+        for trace in sorted(traces, key=lambda t: t["nodeid"]):
+            TraceRecorder.touch(trace["path"])  # Linked traces count as recently used
+            path = Path(trace["path"])
+            try:
+                href = path.relative_to(REPORTS_DIR).as_posix()
+            except ValueError:
+                href = path.as_uri()
+            html += f"""                <tr class="{'scenario-failed' if trace['reason'] == 'failed' else ''}">
+                    <td>{trace['nodeid']}</td>
+                    <td>{trace['reason']}</td>
+                    <td><a href="{href}">{path.name}</a></td>
+                </tr>
+"""
+        html += """            </tbody>
+        </table>
+"""
+        return html
+
+    @staticmethod
+    def _generate_parallelism_html(parallelism: Dict) -> str:
+        """Generate the worker count decisions of the autoscaler."""
+
+        if not parallelism or not parallelism.get("decisions"):
+            return ""
+
+        rss = parallelism.get("measured_worker_rss_mb")
+        html = f"""
+        <h2 style="margin-top: 40px;">Parallelism</h2>
+        <p class="details">Mode: {parallelism['mode']} &middot; peak {parallelism['peak_workers']} workers
+            &middot; measured worker RSS: {f"{rss:.0f}MB" if rss else "n/a"}</p>
+        <table>
+            <thead>
+                <tr>
+                    <th>Time</th>
+                    <th>Workers</th>
+                    <th>Reason</th>
+                </tr>
+            </thead>
+            <tbody>
+"""
+        for decision in parallelism["decisions"]:
+            html += f"""                <tr>
+                    <td>{decision['time']}</td>
+                    <td>{decision['workers']}</td>
+                    <td>{decision['reason']}</td>
+                </tr>
+"""
+        html += """            </tbody>
+        </table>
+"""
+        return html
+
+
+class StreamingHTMLReporter:
+    """
+    Builds the HTML report while a run is in progress.
+
+    Work-item results are submitted from the orchestrator as they arrive
+    and a writer thread appends one section per scenario once all of its
+    checks have reported. The file is valid HTML after every append (the
+    footer is rewritten each time), stdout/stderr go to separate payload
+    files that the report only links to, and finished results are not
+    kept in memory.
+    """
+
+    _DONE = object()
+
+    def __init__(self, expected_items: Dict[str, int], output_path: str = None,
+                 payload_dir: Path = None):
+        """Initialize reporter; expected_items maps scenario id to its item count."""
+        self.output_path = Path(output_path or REPORTS_DIR / "final_report.html")
+        self.payload_dir = Path(payload_dir or REPORTS_DIR / "payloads")
+        self.expected_items = dict(expected_items)
+        self.counts = {"items": 0, "passed": 0, "failed": 0, "errors": 0, "scenarios": 0}
+        self._pending = {}  # scenario id -> row dicts of items still in flight
+        self._queue = queue.Queue()
+        self._thread = None
+        self._file = None
+        self._body_end = 0
+        self._started = datetime.now()
+
+    def start(self) -> "StreamingHTMLReporter":
+        """Write the report header and start the writer thread."""
+
+        shutil.rmtree(self.payload_dir, ignore_errors=True)
+        self.payload_dir.mkdir(parents=True, exist_ok=True)
+
+        self._file = open(self.output_path, 'w+', encoding='utf-8')
+        self._file.write(f"""<!DOCTYPE html>
+<html>
+<head>
+    <title>FluentStep E2E Test Report</title>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <style>
+{REPORT_CSS}        details.scenario {{ margin-top: 16px; border: 1px solid #eee; border-radius: 8px; padding: 12px; }}
+        details.scenario summary {{ cursor: pointer; font-weight: 600; }}
+        .live-summary {{ position: sticky; bottom: 0; background: white; padding: 10px 0; border-bottom: 1px solid #eee; z-index: 1; }}
+        pre {{ white-space: pre-wrap; font-size: 12px; }}
+        img.thumb {{ max-width: 240px; border: 1px solid #ddd; }}
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h1>FluentStep E2E Test Report</h1>
+        <p class="details">Run started {self._started.strftime("%Y-%m-%d %H:%M:%S")}</p>
+""")
+        self._body_end = self._file.tell()
+        self._write_footer()
+
+        self._thread = threading.Thread(target=self._consume, name="html-report-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def submit(self, result: Dict) -> None:
+        """Queue a work-item result (returns immediately)."""
+
+        self._queue.put(result)
+
+    def close(self, final_html: str = "") -> str:
+        """Flush remaining results, append final sections and finish the file."""
+
+        self._queue.put(self._DONE)
+        self._thread.join()
+
+        # Scenarios with missing items (e.g. a crashed collection) still get a section
+        for scenario_id in sorted(self._pending):
+            self._append(self._scenario_html(scenario_id, self._pending[scenario_id]))
+        self._pending.clear()
+
+        if final_html:
+            self._append(final_html)
+        self._file.close()
+        return str(self.output_path)
+
+    def _consume(self) -> None:
+        while True:
+            result = self._queue.get()
+            if result is self._DONE:
+                return
+            try:
+                self._add(result)
+            except Exception as e:
+                print(f"Report writer: failed to add {result.get('nodeid')}: {e}")
+
+    def _add(self, result: Dict) -> None:
+        status = result.get("status", "error")
+        self.counts["items"] += 1
+        if status == "passed":
+            self.counts["passed"] += 1
+        elif status == "failed":
+            self.counts["failed"] += 1
+        else:
+            self.counts["errors"] += 1
+
+        scenario_id = result.get("scenario_id", "unknown")
+        rows = self._pending.setdefault(scenario_id, [])
+        rows.append(self._row(result))
+
+        if len(rows) >= self.expected_items.get(scenario_id, 1):
+            self._append(self._scenario_html(scenario_id, self._pending.pop(scenario_id)))
+        else:
+            self._write_footer()  # Live counters only
+
+    def _write_payload(self, result: Dict, name: str) -> Optional[str]:
+        """Write a large text payload to its own file; returns its report-relative path.
+
+        Named by item (a hash of its node id) and attempt, so parametrised
+        items of one check and retries never overwrite each other.
+        """
+
+        text = result.get(name)
+        if not text:
+            return None
+        safe_scenario = re.sub(r"[^\w.-]+", "_", result.get("scenario_id", "unknown"))
+        item = hashlib.sha1(result.get("nodeid", "").encode("utf-8")).hexdigest()[:10]
+        attempt = max(len(result.get("attempts", [])), 1)
+        path = self.payload_dir / (
+            f"{safe_scenario}_{result.get('check', 'item')}_{item}_{attempt}.{name}.txt"
+        )
+        path.write_text(text, encoding='utf-8')
+        return path.relative_to(self.output_path.parent).as_posix()
+
+    def _row(self, result: Dict) -> Dict:
+        """Reduce a result to what its table row needs (payloads go to disk)."""
+
+        check = result.get("check", result.get("nodeid", ""))
+        if result.get("device_profile"):
+            check += f" ({result['device_profile']})"
+        return {
+            "check": check,
+            "status": result.get("status", "error"),
+            "duration": result.get("duration_seconds", 0.0),
+            "worker": result.get("worker", ""),
+            "attempts": len(result.get("attempts", [])),
+            "quarantined": result.get("quarantined", False),
+            "error": result.get("error"),
+            "stdout": self._write_payload(result, "stdout"),
+            "stderr": self._write_payload(result, "stderr"),
+            "screenshots": self._screenshots(result),
+        }
+
+    def _screenshots(self, result: Dict) -> List[str]:
+        """Failure screenshots attached to the item's test records, as report-relative paths."""
+
+        report_dir = self.output_path.parent
+        return [
+            Path(os.path.relpath(record["properties"]["screenshot"], report_dir)).as_posix()
+            for record in result.get("tests", [])
+            if record.get("properties", {}).get("screenshot")
+        ]
+
+    def _scenario_html(self, scenario_id: str, rows: List[Dict]) -> str:
+        self.counts["scenarios"] += 1
+        failed = [r for r in rows if r["status"] != "passed"]
+        status = "failed" if failed else "passed"
+
+        html = f"""
+        <details class="scenario"{' open' if failed else ''}>
+            <summary>{escape(scenario_id)} <span class="status-badge {status}">{len(rows) - len(failed)}/{len(rows)} passed</span></summary>
+            <table>
+                <thead><tr><th>Check</th><th>Status</th><th>Duration (s)</th><th>Worker</th><th>Output</th></tr></thead>
+                <tbody>
+"""
+        for row in sorted(rows, key=lambda r: r["check"]):
+            links = [
+                f'<a href="{row[name]}">{name}</a>' for name in ("stdout", "stderr") if row[name]
+            ]
+            links += [
+                f'<a href="{shot}"><img class="thumb" loading="lazy" src="{shot}"></a>'
+                for shot in row["screenshots"]
+            ]
+            error = f"<pre>{escape(row['error'])}</pre>" if row["error"] else ""
+            badge_status = "passed" if row["status"] == "passed" else "failed"
+            notes = f" {row['attempts']} attempts" if row["attempts"] > 1 else ""
+            notes += " (quarantined)" if row["quarantined"] else ""
+            html += f"""                    <tr class="{'scenario-failed' if row['status'] != 'passed' else ''}">
+                        <td>{escape(row['check'])}</td>
+                        <td><span class="status-badge {badge_status}">{row['status'].upper()}</span>{notes}</td>
+                        <td>{row['duration']:.1f}</td>
+                        <td>{escape(row['worker'])}</td>
+                        <td>{' '.join(links)}{error}</td>
+                    </tr>
+"""
+        html += """                </tbody>
+            </table>
+        </details>
+"""
+        return html
+
+    def _append(self, section: str) -> None:
+        """Insert a section before the footer and rewrite the footer."""
+
+        self._file.seek(self._body_end)
+        self._file.write(section)
+        self._body_end = self._file.tell()
+        self._write_footer()
+
+    def _write_footer(self) -> None:
+        c = self.counts
+        total = sum(self.expected_items.values())
+        self._file.seek(self._body_end)
+        self._file.write(f"""
+        <div class="footer live-summary">
+            <p>{c['items']}/{total} items · ✅ {c['passed']} passed · ❌ {c['failed']} failed · ⚠️ {c['errors']} errors · {c['scenarios']} scenarios complete</p>
+            <p>Updated {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}</p>
+        </div>
+    </div>
+</body>
+</html>
+""")
+        self._file.truncate()
+        self._file.flush()
@@ -0,0 +1,143 @@
+"""
+Structured per-test results for E2E runs.
+
+A small pytest plugin (registered from conftest.py) appends one NDJSON
+record per test to this worker's results_<agent>.ndjson as soon as the
+test's teardown finishes: outcome, phase durations, scenario id, a short
+failure message and whatever the test attached to
+``item.user_properties`` (load metrics, interaction latencies, traces).
+The orchestrator, scheduler and reports read these files instead of
+scraping pytest output.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, List
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import JSON_REPORTS_DIR, AGENT_ID
+from .work_items import make_work_item
+
+RESULT_SCHEMA_VERSION = 1
+MAX_MESSAGE_CHARS = 2000
+
+
+def results_path(agent_id: int = AGENT_ID, json_dir: Path = JSON_REPORTS_DIR) -> Path:
+    """NDJSON results file of one worker."""
+
+    return Path(json_dir) / f"results_{agent_id}.ndjson"
+
+
+def new_record(nodeid: str, run_id: str = None) -> Dict:
+    """Empty record of a test that is about to run (outcome "passed")."""
+
+    item = make_work_item(nodeid)
+    return {
+        "schema_version": RESULT_SCHEMA_VERSION,
+        "run_id": run_id,
+        "agent_id": AGENT_ID,
+        "nodeid": nodeid,
+        "scenario_id": item["scenario_id"],
+        "check": item["check"],
+        "outcome": "passed",
+        "durations": {},
+        "message": None,
+        "properties": {},
+    }
+
+
+def _message(report) -> str:
+    """Last lines of a failure, enough to triage without the full output."""
+
+    text = report.longreprtext or ""
+    return text[-MAX_MESSAGE_CHARS:]
+
+
+class ResultStream:
+    """pytest plugin writing one NDJSON record per test."""
+
+    def __init__(self, path: Path = None):
+        """Initialize plugin; records are appended to path."""
+        self.path = Path(path or results_path())
+        self.run_id = os.environ.get("E2E_RUN_ID")
+        self.on_record = None  # Optional callback, e.g. an in-process worker
+        self._file = None
+        self._records = {}  # nodeid -> record of a test still running
+
+    def write(self, record: Dict) -> None:
+        """Append a finished record (also used by the async engine)."""
+
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8', buffering=1)
+        # One write per line keeps records whole even if the process dies
+        self._file.write(json.dumps(record, default=str) + "\n")
+        if self.on_record is not None:
+            self.on_record(record)
+
+    def pytest_runtest_logreport(self, report) -> None:
+        record = self._records.get(report.nodeid)
+        if record is None:
+            record = self._records[report.nodeid] = new_record(report.nodeid, self.run_id)
+
+        record["durations"][report.when] = round(report.duration, 3)
+        if report.failed and record["outcome"] != "failed":
+            # A failing setup or teardown is an error, not a failed check
+            record["outcome"] = "failed" if report.when == "call" else "error"
+            record["message"] = _message(report)
+        elif report.skipped and record["outcome"] == "passed":
+            record["outcome"] = "xfailed" if hasattr(report, "wasxfail") else "skipped"
+
+        if report.when == "teardown":
+            record["duration"] = round(sum(record["durations"].values()), 3)
+            for name, value in report.user_properties:
+                record["properties"][name] = value
+            self.write(self._records.pop(report.nodeid))
+
+    def pytest_collectreport(self, report) -> None:
+        # Collection errors never reach runtest hooks
+        if report.failed:
+            record = new_record(report.nodeid, self.run_id)
+            record.update(outcome="error", message=_message(report), duration=0.0)
+            self.write(record)
+
+    def pytest_sessionfinish(self) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the results file."""
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def read_results(path: Path, offset: int = 0) -> List[Dict]:
+    """Records of a results file from a byte offset (torn lines skipped)."""
+
+    records = []
+    try:
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            lines = f.read().splitlines()
+    except OSError:
+        return records
+
+    for line in lines:
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            continue
+    return records
+
+
+def item_status(records: List[Dict]) -> str:
+    """Overall status of a work item from its test records."""
+
+    outcomes = {record["outcome"] for record in records}
+    if not records or "error" in outcomes:
+        return "error"
+    if "failed" in outcomes:
+        return "failed"
+    return "passed"
@@ -3,67 +3,293 @@ Screenshot capture utilities for E2E tests.
 
 Handles capturing full-page and element screenshots for debugging and
 visual regression detection.
+
+Capturing returns as soon as the browser has handed over the PNG buffer;
+the rest happens on a small background thread pool (SCREENSHOT_WORKERS)
+while the test carries on:
+
+- Re-encoded to SCREENSHOT_FORMAT (WebP) when Pillow is installed, kept
+  as PNG otherwise
+- Deduplicated by content: captures with identical pixels (the same
+  failure state in another scenario) share one file, named by a hash of
+  the decoded pixels (of the bytes, without Pillow). Similar but
+  different captures always get their own file.
+- Logged, one line per capture, in SCREENSHOT_INDEX_FILE, with a 64-bit
+  difference hash ("phash") for spotting near-identical failures
+
+Visual captures (feedback modal, blank state) skip re-encoding and
+perceptual dedupe: they stay lossless PNG, named by content hash, and
+their index lines carry "visual" and the run id for the visual regression
+gate (visual_gate.py).
+
+Retention (cleanup_old_screenshots) reads the index instead of scanning
+the directory.
 """
 
+import atexit
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from datetime import datetime
+from typing import Optional, Set
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from config import SCREENSHOTS_DIR
+from config import (
+    SCREENSHOTS_DIR, SCREENSHOT_INDEX_FILE, SCREENSHOT_FORMAT, SCREENSHOT_QUALITY,
+    SCREENSHOT_WORKERS, SCREENSHOT_RETENTION_DAYS
+)
+
+
+def difference_hash(image) -> int:
+    """64-bit dHash of a PIL image: brightness gradients of a 9x8 thumbnail."""
+
+    from PIL import Image
+
+    pixels = image.convert("L").resize((9, 8), Image.BILINEAR).tobytes()
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            left, right = pixels[row * 9 + col], pixels[row * 9 + col + 1]
+            bits = (bits << 1) | (left > right)
+    return bits
+
+
+def _digest(*parts: bytes) -> str:
+    """Short content hash used as a file name."""
+
+    sha = hashlib.sha256()
+    for part in parts:
+        sha.update(part)
+    return sha.hexdigest()[:16]
+
+
+def hash_distance(a: int, b: int) -> int:
+    """Number of differing bits between two hashes."""
+
+    return bin(a ^ b).count("1")
+
+
+class Screenshot:
+    """A capture: the PNG buffer right away, the stored file once written."""
+
+    def __init__(self, buffer: bytes, stored: Future):
+        """Initialize from the browser's buffer and the pending write."""
+        self.buffer = buffer
+        self._stored = stored
+
+    def path(self, timeout: Optional[float] = None) -> str:
+        """Stored file (waits for the background write)."""
+
+        return self._stored.result(timeout)
+
+
+class ScreenshotStore:
+    """Encodes, deduplicates and writes screenshots in the background."""
+
+    def __init__(self, root: Path = SCREENSHOTS_DIR, index: Path = SCREENSHOT_INDEX_FILE,
+                 workers: int = SCREENSHOT_WORKERS):
+        """Initialize store; the index is read on the first write."""
+        self.root = Path(root)
+        self.index = Path(index)
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self._files = None  # Stored file names, from the index
+
+    def submit(self, buffer: bytes, label: str, scenario_id: str, visual: bool = False) -> Screenshot:
+        """Queue a PNG buffer for storage; returns immediately."""
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                thread_name_prefix="screenshots")
+        return Screenshot(buffer, self._executor.submit(self.store, buffer, label, scenario_id, visual))
+
+    def _known(self) -> Set[str]:
+        if self._files is None:
+            self._files = {entry["file"] for entry in self._read_index()}
+        return self._files
+
+    def _read_index(self):
+        entries = []
+        try:
+            with open(self.index, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue  # Torn line from a killed worker
+        except OSError:
+            pass
+        return entries
+
+    def _encode(self, buffer: bytes):
+        """(data, extension, content digest, perceptual hash).
+
+        The digest covers the decoded pixels, so it survives lossy
+        re-encoding; without Pillow it is the PNG's bytes and there is no
+        perceptual hash.
+        """
+
+        try:
+            from PIL import Image
+        except ImportError:
+            return buffer, "png", _digest(buffer), None
+
+        image = Image.open(io.BytesIO(buffer))
+        image.load()
+        digest = _digest(f"{image.mode} {image.size}".encode(), image.tobytes())
+        phash = difference_hash(image)
+        out = io.BytesIO()
+        try:
+            image.save(out, SCREENSHOT_FORMAT.upper(), quality=SCREENSHOT_QUALITY)
+            return out.getvalue(), SCREENSHOT_FORMAT, digest, phash
+        except (OSError, ValueError):
+            # e.g. a full-page capture taller than WebP allows
+            return buffer, "png", digest, phash
+
+    def store(self, buffer: bytes, label: str, scenario_id: str, visual: bool = False) -> str:
+        """Encode, deduplicate and write one capture; returns its file."""
+
+        # Visual captures are compared pixel by pixel, so keep them lossless
+        if visual:
+            data, extension, digest, phash = buffer, "png", _digest(buffer), None
+        else:
+            data, extension, digest, phash = self._encode(buffer)
+        name = f"{digest}.{extension}"
+        with self._lock:
+            known = self._known()
+            # Only identical content shares a file
+            duplicate = name in known
+            known.add(name)
+
+            path = self.root / name
+            if not duplicate or not path.exists():
+                self.root.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_name(f".{name}.{os.getpid()}.tmp")
+                tmp.write_bytes(data)
+                os.replace(tmp, path)  # Workers may race on the same name
+
+            # One append per line keeps the shared index whole across workers
+            entry = {
+                "file": name,
+                "phash": phash,
+                "bytes": len(data),
+                "label": label,
+                "scenario_id": scenario_id,
+                "time": time.time(),
+                "duplicate": duplicate,
+            }
+            if visual:
+                entry.update(visual=True, run_id=os.environ.get("E2E_RUN_ID"))
+            with open(self.index, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + "\n")
+        return str(path)
+
+    def flush(self) -> None:
+        """Wait for queued writes."""
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def cleanup(self, days: int = SCREENSHOT_RETENTION_DAYS) -> int:
+        """Delete files whose last capture is older than `days`; returns how many.
+
+        Rewrites the index, so run it while no worker is capturing (the
+        orchestrator does, before starting workers).
+        """
+
+        cutoff = time.time() - days * 24 * 60 * 60
+        with self._lock:
+            entries = self._read_index()
+            last_used = {}
+            for entry in entries:
+                last_used[entry["file"]] = max(last_used.get(entry["file"], 0), entry["time"])
+            expired = {file for file, used in last_used.items() if used < cutoff}
+            for file in expired:
+                (self.root / file).unlink(missing_ok=True)
+
+            kept = [entry for entry in entries if entry["file"] not in expired]
+            tmp = self.index.with_suffix(".tmp")
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.writelines(json.dumps(entry) + "\n" for entry in kept)
+            os.replace(tmp, self.index)
+            self._files = None
+        return len(expired)
+
+
+_STORE = None
+
+
+def get_screenshot_store() -> ScreenshotStore:
+    """Return the process-wide screenshot store (flushed at exit)."""
+
+    global _STORE
+    if _STORE is None:
+        _STORE = ScreenshotStore()
+        atexit.register(_STORE.flush)
+    return _STORE
+
+
+def _label(*parts) -> str:
+    return "_".join(str(part) for part in parts if part not in (None, ""))
 
 
 def capture_failure_screenshot(
     page,
     test_name: str,
     scenario_id: str,
-) -> str:
+) -> Screenshot:
     """Capture full-page screenshot on test failure."""
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{test_name}_{scenario_id}_{timestamp}_FAILED.png"
-    filepath = SCREENSHOTS_DIR / filename
+    buffer = page.screenshot(full_page=True)
+    return get_screenshot_store().submit(buffer, _label(test_name, "FAILED"), scenario_id)
 
-    page.screenshot(path=str(filepath), full_page=True)
-    return str(filepath)
+
+async def capture_failure_screenshot_async(
+    page,
+    test_name: str,
+    scenario_id: str,
+) -> Screenshot:
+    """capture_failure_screenshot for an async page (async engine)."""
+
+    buffer = await page.screenshot(full_page=True)
+    return get_screenshot_store().submit(buffer, _label(test_name, "FAILED"), scenario_id)
 
 
 def capture_feedback_modal_screenshot(
     page,
     scenario_id: str,
     feedback_index: int,
-) -> str:
+) -> Screenshot:
     """Capture screenshot of feedback modal for visual regression testing."""
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"feedback_{scenario_id}_{feedback_index}_{timestamp}.png"
-    filepath = SCREENSHOTS_DIR / filename
+    label = _label("feedback", feedback_index)
 
     # Try to screenshot just the modal
     modal = page.query_selector('div[data-testid="feedback-modal"]')
     if modal:
         try:
-            modal.screenshot(path=str(filepath))
-            return str(filepath)
+            return get_screenshot_store().submit(modal.screenshot(), label, scenario_id, visual=True)
         except Exception:
             pass
 
     # Fallback to full page
-    page.screenshot(path=str(filepath), full_page=True)
-    return str(filepath)
+    return get_screenshot_store().submit(page.screenshot(full_page=True), label, scenario_id, visual=True)
 
 
 def capture_blank_state_screenshot(
     page,
     scenario_id: str,
-) -> str:
+) -> Screenshot:
     """Capture screenshot of roleplay viewer showing blanks."""
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"blanks_{scenario_id}_{timestamp}.png"
-    filepath = SCREENSHOTS_DIR / filename
-
-    page.screenshot(path=str(filepath), full_page=True)
-    return str(filepath)
+    buffer = page.screenshot(full_page=True)
+    return get_screenshot_store().submit(buffer, "blanks", scenario_id, visual=True)
 
 
 def capture_element_screenshot(
@@ -71,33 +297,21 @@ def capture_element_screenshot(
     selector: str,
     test_name: str,
     scenario_id: str,
-) -> str:
+) -> Screenshot:
     """Capture screenshot of specific element."""
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{test_name}_{scenario_id}_{timestamp}.png"
-    filepath = SCREENSHOTS_DIR / filename
-
     element = page.query_selector(selector)
     if element:
         try:
-            element.screenshot(path=str(filepath))
-            return str(filepath)
+            return get_screenshot_store().submit(element.screenshot(), test_name, scenario_id)
         except Exception:
             pass
 
     # Fallback to full page
-    page.screenshot(path=str(filepath), full_page=True)
-    return str(filepath)
-
-
-def cleanup_old_screenshots(days: int = 7) -> None:
-    """Delete screenshots older than specified days."""
+    return get_screenshot_store().submit(page.screenshot(full_page=True), test_name, scenario_id)
 
-    import time
 
-    cutoff_time = time.time() - (days * 24 * 60 * 60)
+def cleanup_old_screenshots(days: int = SCREENSHOT_RETENTION_DAYS) -> int:
+    """Delete screenshots whose last capture is older than specified days."""
 
-    for filepath in SCREENSHOTS_DIR.glob("*.png"):
-        if filepath.stat().st_mtime < cutoff_time:
-            filepath.unlink()
+    return get_screenshot_store().cleanup(days)
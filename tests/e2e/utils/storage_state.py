@@ -0,0 +1,59 @@
+"""
+Pre-seeded Playwright storage state for E2E tests.
+
+Records a storageState in which the app's onboarding is already
+dismissed, so every context can deep-link straight to /scenario/{id}
+without the homepage detour and "Skip for now" clicks.
+"""
+
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import ONBOARDING_DISMISSED_STORAGE, STORAGE_STATE_FILE
+
+
+# Same keys App.tsx / OnboardingModal.tsx read and write
+_SEED_JS = """(entries) => {
+    for (const [key, value] of Object.entries(entries)) {
+        localStorage.setItem(key, value);
+    }
+}"""
+
+
+def _empty_document(route):
+    # Sync and async route handler alike (async handlers may return the coroutine)
+    return route.fulfill(status=200, content_type="text/html", body="<html></html>")
+
+
+def record_onboarding_storage_state(browser, base_url: str) -> dict:
+    """Record a storage state with onboarding dismissed for base_url.
+
+    Only the origin's localStorage matters, so the app itself is never
+    loaded: the origin root is answered with an empty document.
+    """
+
+    context = browser.new_context()
+    try:
+        page = context.new_page()
+        page.route(f"{base_url}/", _empty_document)
+        page.goto(f"{base_url}/")
+        page.evaluate(_SEED_JS, ONBOARDING_DISMISSED_STORAGE)
+
+        # Written for debugging/reuse; contexts get the in-memory copy
+        return context.storage_state(path=str(STORAGE_STATE_FILE))
+    finally:
+        context.close()
+
+
+async def record_onboarding_storage_state_async(browser, base_url: str) -> dict:
+    """record_onboarding_storage_state() for an async API browser."""
+
+    context = await browser.new_context()
+    try:
+        page = await context.new_page()
+        await page.route(f"{base_url}/", _empty_document)
+        await page.goto(f"{base_url}/")
+        await page.evaluate(_SEED_JS, ONBOARDING_DISMISSED_STORAGE)
+        return await context.storage_state()
+    finally:
+        await context.close()
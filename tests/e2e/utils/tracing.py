@@ -0,0 +1,122 @@
+"""
+Playwright tracing for E2E tests.
+
+Opt-in (TRACE_MODE / E2E_TRACE): every pool context records a trace with
+screenshots, DOM snapshots and network, split into one chunk per test.
+Chunks of passing, within-budget tests are discarded without being
+written; kept traces live under TRACES_DIR, which is held to a disk
+budget by evicting the least recently used traces (file mtime is the
+recency mark, so workers need no shared index).
+"""
+
+import os
+import re
+from datetime import datetime
+from typing import Optional
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import TRACE_MODE, TRACES_DIR, TRACE_DISK_BUDGET_MB
+
+TRACE_MODES = ("off", "retain-on-failure", "on")
+
+
+class TraceRecorder:
+    """Per-test trace chunks on pooled contexts, within a disk budget."""
+
+    def __init__(self, mode: str = TRACE_MODE, traces_dir: Path = TRACES_DIR,
+                 budget_mb: float = TRACE_DISK_BUDGET_MB):
+        """Initialize recorder; mode is one of TRACE_MODES."""
+        if mode not in TRACE_MODES:
+            raise ValueError(f"Unknown trace mode {mode!r}, expected one of {TRACE_MODES}")
+        self.mode = mode
+        self.traces_dir = Path(traces_dir)
+        self.budget_bytes = budget_mb * 1024 * 1024
+        self.evicted = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def attach(self, context) -> None:
+        """Start tracing on a new context (pool hook); chunks begin per test."""
+
+        context.tracing.start(screenshots=True, snapshots=True, sources=False)
+        context.tracing.stop_chunk()  # start() opens a chunk; tests open their own
+
+    def start_chunk(self, context, title: str) -> None:
+        """Begin recording a test's chunk."""
+
+        if self.enabled:
+            context.tracing.start_chunk(title=title)
+
+    def stop_chunk(self, context, name: str, retain: bool = False) -> Optional[str]:
+        """End a test's chunk; returns the trace path if it was kept.
+
+        retain marks a failed or over-budget test (kept in any enabled mode).
+        """
+
+        if not self.enabled:
+            return None
+
+        keep = self.mode == "on" or retain
+        try:
+            if not keep:
+                context.tracing.stop_chunk()  # Discarded, nothing written
+                return None
+
+            self.traces_dir.mkdir(parents=True, exist_ok=True)
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+            safe_name = re.sub(r"[^\w.-]+", "_", name).strip("_")[-120:]
+            path = self.traces_dir / f"{safe_name}_{timestamp}.zip"
+            context.tracing.stop_chunk(path=str(path))
+        except Exception:
+            return None  # Context or browser already gone
+
+        self.enforce_budget(keep=path)
+        return str(path)
+
+    @staticmethod
+    def touch(path: str) -> None:
+        """Mark a trace as recently used."""
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def enforce_budget(self, keep: Path = None) -> None:
+        """Evict least recently used traces until the directory fits the budget."""
+
+        traces = []
+        for path in self.traces_dir.glob("*.zip"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue  # Evicted by another worker
+            traces.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in traces)
+        for _, size, path in sorted(traces):
+            if total <= self.budget_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                path.unlink()
+                self.evicted += 1
+            except OSError:
+                pass
+            total -= size
+
+
+_RECORDER = None
+
+
+def get_trace_recorder() -> TraceRecorder:
+    """Return the process-wide trace recorder."""
+
+    global _RECORDER
+    if _RECORDER is None:
+        _RECORDER = TraceRecorder()
+    return _RECORDER
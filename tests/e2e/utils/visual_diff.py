@@ -0,0 +1,136 @@
+"""
+Vectorised screenshot comparison for the visual regression gate.
+
+compare_images() works on whole uint8 arrays and VISUAL_TILE_SIZE tiles:
+
+1. Pixels whose largest channel difference is within
+   VISUAL_PIXEL_TOLERANCE are equal; tiles without any other pixel are
+   identical and need no further work
+2. A differing pixel on an edge (its neighbourhood has at least
+   VISUAL_AA_MIN_CONTRAST) whose value lies within the other image's 3x3
+   neighbourhood range, both ways round, is anti-aliasing or a sub-pixel
+   shift and is ignored
+3. A tile with more than VISUAL_TILE_MAX_PIXELS remaining differences
+   has changed
+
+Past the first equality pass only unequal pixels are touched, so
+near-identical screenshots cost little more than one array comparison.
+Byte-identical files are skipped before decoding by the caller
+(visual_gate.py).
+
+Requires NumPy and Pillow.
+"""
+
+from pathlib import Path
+from typing import Dict
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import numpy as np
+from config import (
+    VISUAL_TILE_SIZE, VISUAL_PIXEL_TOLERANCE, VISUAL_AA_MIN_CONTRAST, VISUAL_TILE_MAX_PIXELS
+)
+
+# 3x3 neighbourhood offsets
+_NEIGHBOURS = [(dy, dx) for dy in (-1, 0, 1) for dx in (-1, 0, 1)]
+
+
+def load_image(path) -> np.ndarray:
+    """Decode an image file to an (height, width, 3) uint8 array."""
+
+    from PIL import Image
+
+    with Image.open(path) as image:
+        return np.asarray(image.convert("RGB"))
+
+
+def _neighbourhood_range(image: np.ndarray, ys: np.ndarray, xs: np.ndarray):
+    """Per-channel min and max over the 3x3 neighbourhood of each (y, x)."""
+
+    height, width = image.shape[:2]
+    values = np.stack([
+        image[np.clip(ys + dy, 0, height - 1), np.clip(xs + dx, 0, width - 1)]
+        for dy, dx in _NEIGHBOURS
+    ]).astype(np.int16)
+    return values.min(axis=0), values.max(axis=0)
+
+
+def _tile_counts(ys: np.ndarray, xs: np.ndarray, rows: int, cols: int, tile: int) -> np.ndarray:
+    """Number of the given pixels falling in each tile."""
+
+    return np.bincount((ys // tile) * cols + xs // tile, minlength=rows * cols).reshape(rows, cols)
+
+
+def compare_images(baseline: np.ndarray, current: np.ndarray,
+                   tile: int = VISUAL_TILE_SIZE) -> Dict:
+    """Compare two screenshots; returns counts plus diff/anti-aliasing masks."""
+
+    if baseline.shape != current.shape:
+        return {
+            "status": "size_changed",
+            "baseline_size": list(baseline.shape[1::-1]),
+            "current_size": list(current.shape[1::-1]),
+        }
+
+    height, width = baseline.shape[:2]
+    rows, cols = -(-height // tile), -(-width // tile)
+
+    # Everything after this works on the unequal pixels only
+    unequal = np.unique(np.flatnonzero(baseline.ravel() != current.ravel()) // baseline.shape[2])
+    ys, xs = np.divmod(unequal, width)
+    a = baseline[ys, xs].astype(np.int16)
+    b = current[ys, xs].astype(np.int16)
+    over = np.abs(a - b).max(axis=1) > VISUAL_PIXEL_TOLERANCE
+    ys, xs, a, b = ys[over], xs[over], a[over], b[over]
+
+    aa = np.zeros(len(ys), dtype=bool)
+    if len(ys):
+        a_min, a_max = _neighbourhood_range(baseline, ys, xs)
+        b_min, b_max = _neighbourhood_range(current, ys, xs)
+        tolerance = VISUAL_PIXEL_TOLERANCE
+        on_edge = ((a_max - a_min).max(axis=1) >= VISUAL_AA_MIN_CONTRAST) \
+            | ((b_max - b_min).max(axis=1) >= VISUAL_AA_MIN_CONTRAST)
+        current_explained = ((b >= a_min - tolerance) & (b <= a_max + tolerance)).all(axis=1)
+        baseline_explained = ((a >= b_min - tolerance) & (a <= b_max + tolerance)).all(axis=1)
+        aa = on_edge & current_explained & baseline_explained
+
+    differing_tiles = _tile_counts(ys, xs, rows, cols, tile) > 0
+    changed_tiles = _tile_counts(ys[~aa], xs[~aa], rows, cols, tile) > VISUAL_TILE_MAX_PIXELS
+    diff_mask = np.zeros((height, width), dtype=bool)
+    diff_mask[ys[~aa], xs[~aa]] = True
+    aa_mask = np.zeros((height, width), dtype=bool)
+    aa_mask[ys[aa], xs[aa]] = True
+
+    return {
+        "status": "changed" if changed_tiles.any() else "equal",
+        "total_tiles": rows * cols,
+        "identical_tiles": int(rows * cols - differing_tiles.sum()),
+        "changed_tiles": int(changed_tiles.sum()),
+        "diff_pixels": int((~aa).sum()),
+        "aa_pixels": int(aa.sum()),
+        "diff_ratio": round(float((~aa).sum()) / (height * width), 6),
+        "tile_mask": changed_tiles,
+        "diff_mask": diff_mask,
+        "aa_mask": aa_mask,
+    }
+
+
+def render_heatmap(current: np.ndarray, result: Dict, path: Path,
+                   tile: int = VISUAL_TILE_SIZE) -> str:
+    """Write a diff heatmap: dimmed current image, changed tiles tinted,
+    differing pixels red and anti-aliasing yellow."""
+
+    from PIL import Image
+
+    grey = current.astype(np.float32).mean(axis=2, keepdims=True)
+    heat = np.repeat(grey * 0.3 + 80, 3, axis=2)
+
+    height, width = current.shape[:2]
+    tiles = np.kron(result["tile_mask"], np.ones((tile, tile), dtype=bool))[:height, :width]
+    heat[tiles] = heat[tiles] * 0.5 + np.array([255, 0, 0]) * 0.5
+    heat[result["aa_mask"]] = [255, 220, 0]
+    heat[result["diff_mask"]] = [255, 0, 0]
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    Image.fromarray(heat.clip(0, 255).astype(np.uint8)).save(path)
+    return str(path)
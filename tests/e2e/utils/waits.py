@@ -0,0 +1,203 @@
+"""
+Event-driven wait helpers for E2E tests.
+
+Replace fixed time.sleep() calls with waits on concrete UI conditions
+(popover visible, blank revealed, modal closed, turn advanced, dialogue
+or home page shown) and on animation end via the Web Animations API, each with a tight upper bound.
+
+Condition waits return True when the condition was met and False when the
+bound expired, so tests keep their own assertions and failure messages.
+"""
+
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import TIMEOUT_UI_EVENT, TIMEOUT_ANIMATION, TIMEOUT_LOAD
+from .selectors import Selectors
+
+POPOVER_TEXT = 'text=Native Alternatives'
+TURN_COUNTER = 'text=/\\d+ \\/ \\d+/'
+NEXT_TURN_BUTTON = 'button:has-text("Next Turn")'
+ONBOARDING_SKIP = 'button:has-text("Skip for now")'
+DIALOGUE_READY = f'{NEXT_TURN_BUTTON}, {Selectors.BLANK_UNREVEALED}'
+
+# Resolves once finite animations under `selector` (or the whole document)
+# have finished. CSS transitions/animations are exposed as Animation objects,
+# so this covers transitionend/animationend too. Falls back to listening for
+# those events where getAnimations() is unavailable. Infinite animations
+# (animate-pulse, animate-float) are ignored since they never finish.
+_ANIMATIONS_FINISHED_JS = """
+async ([selector, timeoutMs]) => {
+    const root = selector ? document.querySelector(selector) : document.documentElement;
+    if (!root) return true;
+    const timeout = new Promise((resolve) => setTimeout(resolve, timeoutMs));
+
+    if (typeof root.getAnimations !== 'function') {
+        const ended = new Promise((resolve) => {
+            root.addEventListener('transitionend', resolve, { once: true });
+            root.addEventListener('animationend', resolve, { once: true });
+        });
+        await Promise.race([ended, timeout]);
+        return true;
+    }
+
+    const pending = root.getAnimations({ subtree: true }).filter((animation) => {
+        const timing = animation.effect && animation.effect.getComputedTiming();
+        return animation.playState !== 'finished'
+            && timing && Number.isFinite(timing.endTime);
+    });
+    await Promise.race([
+        Promise.all(pending.map((animation) => animation.finished.catch(() => null))),
+        timeout,
+    ]);
+    return true;
+}
+"""
+
+# Resolves when the main thread is idle (deferred work has run)
+_IDLE_JS = """
+([timeoutMs]) => new Promise((resolve) => {
+    if (typeof requestIdleCallback === 'function') {
+        requestIdleCallback(() => resolve(true), { timeout: timeoutMs });
+    } else {
+        setTimeout(() => resolve(true), 0);
+    }
+})
+"""
+
+# True once the "n / total" counter differs from `before`, or Next Turn is gone
+_TURN_ADVANCED_JS = """([before, nextTurnText]) => {
+    const counter = [...document.querySelectorAll('span, div')]
+        .find((el) => el.children.length === 0 && /^\\s*\\d+ \\/ \\d+\\s*$/.test(el.textContent));
+    const nextTurn = [...document.querySelectorAll('button')]
+        .some((b) => b.textContent.includes(nextTurnText));
+    return !nextTurn || (counter && counter.textContent.trim() !== before);
+}"""
+
+
+def _met(wait) -> bool:
+    """Run a Playwright wait; False if it timed out."""
+
+    from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+    try:
+        wait()
+        return True
+    except PlaywrightTimeoutError:
+        return False
+
+
+def wait_for_animations(page, selector: str = None, timeout_ms: int = TIMEOUT_ANIMATION) -> None:
+    """Wait until running (finite) animations have finished."""
+
+    page.evaluate(_ANIMATIONS_FINISHED_JS, [selector, timeout_ms])
+
+
+def wait_for_page_idle(page, timeout_ms: int = TIMEOUT_UI_EVENT) -> None:
+    """Wait until deferred work (effects, timers, late errors) has run."""
+
+    wait_for_animations(page)
+    page.evaluate(_IDLE_JS, [timeout_ms])
+
+
+def wait_for_popover_visible(page, timeout_ms: int = TIMEOUT_UI_EVENT) -> bool:
+    """Wait until the Native Alternatives popover is shown and settled."""
+
+    popover = page.locator(POPOVER_TEXT).first
+    if not _met(lambda: popover.wait_for(state="visible", timeout=timeout_ms)):
+        return False
+    wait_for_animations(page)
+    return True
+
+
+def wait_for_popover_hidden(page, timeout_ms: int = TIMEOUT_UI_EVENT) -> bool:
+    """Wait until the Native Alternatives popover is gone."""
+
+    popover = page.locator(POPOVER_TEXT).first
+    return _met(lambda: popover.wait_for(state="hidden", timeout=timeout_ms))
+
+
+def wait_for_blank_revealed(page, unrevealed_before: int, timeout_ms: int = TIMEOUT_UI_EVENT) -> bool:
+    """Wait until a blank has been revealed (fewer "Tap to discover" buttons)."""
+
+    met = _met(lambda: page.wait_for_function(
+        """([text, before]) => {
+            const unrevealed = [...document.querySelectorAll('button')]
+                .filter((b) => b.textContent.includes(text)).length;
+            return unrevealed < before;
+        }""",
+        arg=["Tap to discover", unrevealed_before],
+        timeout=timeout_ms,
+    ))
+    wait_for_animations(page)
+    return met
+
+
+def wait_for_modal_closed(page, selector: str = Selectors.FEEDBACK_MODAL, timeout_ms: int = TIMEOUT_UI_EVENT) -> bool:
+    """Wait until a modal is hidden or removed."""
+
+    modal = page.locator(selector).first
+    return _met(lambda: modal.wait_for(state="hidden", timeout=timeout_ms))
+
+
+def wait_for_dialogue(page, timeout_ms: int = TIMEOUT_LOAD) -> bool:
+    """Wait until onboarding is gone and the dialogue shows Next Turn or a blank."""
+
+    if not wait_for_modal_closed(page, ONBOARDING_SKIP, timeout_ms):
+        return False
+    ready = page.locator(DIALOGUE_READY).first
+    return _met(lambda: ready.wait_for(state="visible", timeout=timeout_ms))
+
+
+def wait_for_home(page, timeout_ms: int = TIMEOUT_LOAD) -> bool:
+    """Wait until the library's hero (or the onboarding over it) is shown."""
+
+    shown = page.locator(Selectors.HERO_SECTION).or_(page.locator(ONBOARDING_SKIP)).first
+    return _met(lambda: shown.wait_for(state="visible", timeout=timeout_ms))
+
+
+def wait_for_turn_advanced(page, counter_before: str, timeout_ms: int = TIMEOUT_UI_EVENT) -> bool:
+    """Wait until the turn counter changes (or Next Turn disappears at the end)."""
+
+    met = _met(lambda: page.wait_for_function(
+        _TURN_ADVANCED_JS,
+        arg=[counter_before, "Next Turn"],
+        timeout=timeout_ms,
+    ))
+    wait_for_animations(page)
+    return met
+
+
+def turn_counter_text(page) -> str:
+    """Current "n / total" turn counter text ('' when not shown)."""
+
+    counter = page.locator(TURN_COUNTER).first
+    return (counter.text_content() or "").strip() if counter.count() > 0 else ""
+
+
+def click_next_turn(page, timeout_ms: int = TIMEOUT_UI_EVENT) -> bool:
+    """Click Next Turn and wait for the dialogue to advance."""
+
+    before = turn_counter_text(page)
+    page.locator(NEXT_TURN_BUTTON).first.click()
+    return wait_for_turn_advanced(page, before, timeout_ms)
+
+
+def reveal_blank(page, blank=None, timeout_ms: int = TIMEOUT_UI_EVENT) -> bool:
+    """Click a blank (default: first unrevealed) and wait for its popover."""
+
+    if blank is None:
+        blank = page.locator(Selectors.BLANK_UNREVEALED).first
+    blank.click()
+    return wait_for_popover_visible(page, timeout_ms)
+
+
+def close_popover(page, timeout_ms: int = TIMEOUT_UI_EVENT) -> bool:
+    """Close the popover via its ✕ button, or a click outside if there is none."""
+
+    close_btn = page.locator('button:has(i.fa-times)').first
+    if close_btn.count() > 0:
+        close_btn.click()
+    else:
+        page.click('body')
+    return wait_for_popover_hidden(page, timeout_ms)
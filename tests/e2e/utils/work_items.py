@@ -0,0 +1,44 @@
+"""
+Work items: what the scheduler queues and workers run, one per pytest node.
+
+Parsed from node ids alone, so the scheduler, the result stream plugin and
+the async engine agree on an item's scenario, check and device profile
+without importing each other.
+"""
+
+import re
+from pathlib import Path
+from typing import Dict
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import DEVICE_PROFILES
+
+_PARAM_RE = re.compile(r"\[(?P<param>[^\]]+)\]$")
+
+
+def make_work_item(nodeid: str) -> Dict:
+    """Build a work item from a pytest node id."""
+
+    path, _, rest = nodeid.partition("::")
+    match = _PARAM_RE.search(rest)
+    check = _PARAM_RE.sub("", rest).split("::")[-1]
+    param = match.group("param") if match else ""
+
+    # Performance checks run per device profile, whose id comes first ("<profile>-<scenario>")
+    device_profile = next((
+        name for name in DEVICE_PROFILES if param == name or param.startswith(f"{name}-")
+    ), None)
+    if device_profile:
+        param = param[len(device_profile) + 1:]
+
+    # Parametrised checks carry the scenario id; single-scenario suites
+    # (e.g. test_service_8_restaurant_order.py) are keyed by their file
+    scenario_id = param or Path(path).stem
+
+    return {
+        "nodeid": nodeid,
+        "test_file": path,
+        "scenario_id": scenario_id,
+        "check": check,
+        "device_profile": device_profile,
+    }
@@ -0,0 +1,151 @@
+"""
+Visual regression gate for E2E runs.
+
+Compares this run's feedback-modal and blank-state screenshots (visual
+captures in the screenshot index, see utils/screenshots.py) against
+versioned baselines in baselines/visual/<scenario>__<label>.png. Files
+that are byte-identical to their baseline are passed without decoding;
+the rest are compared tile by tile (utils/visual_diff.py) on a thread
+pool, and changed ones get a heatmap in reports/visual_diffs.
+
+Captures without a baseline are reported as new and never fail the run.
+"""
+
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent))
+from config import (
+    JSON_REPORTS_DIR, SCREENSHOTS_DIR, SCREENSHOT_INDEX_FILE,
+    VISUAL_BASELINE_DIR, VISUAL_DIFF_DIR, VISUAL_GATE_WORKERS
+)
+
+VISUAL_GATE_REPORT_FILE = JSON_REPORTS_DIR / "visual_gate.json"
+REGRESSION_STATUSES = ("changed", "size_changed", "missing")
+
+
+def collect_run_captures(index: Path = SCREENSHOT_INDEX_FILE, screenshots_dir: Path = SCREENSHOTS_DIR,
+                         run_id: str = None) -> Dict[str, Path]:
+    """Latest visual capture of this run per key ("<scenario>__<label>")."""
+
+    run_id = run_id or os.environ.get("E2E_RUN_ID")
+    captures = {}
+    try:
+        with open(index, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if not entry.get("visual") or entry.get("run_id") != run_id:
+                    continue
+                key = f"{entry['scenario_id']}__{entry['label']}"
+                captures[key] = Path(screenshots_dir) / entry["file"]
+    except OSError:
+        pass
+    return captures
+
+
+def _same_bytes(a: Path, b: Path) -> bool:
+    if a.stat().st_size != b.stat().st_size:
+        return False
+    return a.read_bytes() == b.read_bytes()
+
+
+def compare_capture(key: str, current: Path, baseline: Path, diff_dir: Path = VISUAL_DIFF_DIR) -> Dict:
+    """Compare one capture with its baseline."""
+
+    from utils.visual_diff import load_image, compare_images, render_heatmap
+
+    finding = {"key": key, "current": str(current), "baseline": str(baseline)}
+    if not current.exists():
+        return {**finding, "status": "missing"}
+    if not baseline.exists():
+        return {**finding, "status": "new"}
+    if _same_bytes(current, baseline):
+        return {**finding, "status": "identical"}
+
+    current_image = load_image(current)
+    result = compare_images(load_image(baseline), current_image)
+    finding.update({k: v for k, v in result.items() if not k.endswith("_mask")})
+    if result["status"] == "changed":
+        finding["heatmap"] = render_heatmap(current_image, result, Path(diff_dir) / f"{key}.png")
+    return finding
+
+
+def compare_to_baselines(captures: Dict[str, Path], baseline_dir: Path = VISUAL_BASELINE_DIR,
+                         diff_dir: Path = VISUAL_DIFF_DIR, workers: int = VISUAL_GATE_WORKERS) -> List[Dict]:
+    """Compare every capture with its baseline on a thread pool."""
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(
+            lambda key: compare_capture(key, captures[key], Path(baseline_dir) / f"{key}.png", diff_dir),
+            sorted(captures),
+        ))
+
+
+def save_baselines(captures: Dict[str, Path], baseline_dir: Path = VISUAL_BASELINE_DIR) -> str:
+    """Store this run's captures as the new baselines."""
+
+    baseline_dir = Path(baseline_dir)
+    baseline_dir.mkdir(parents=True, exist_ok=True)
+    for key, path in captures.items():
+        if path.exists():
+            shutil.copyfile(path, baseline_dir / f"{key}.png")
+    return str(baseline_dir)
+
+
+def run_visual_gate(update_baseline: bool = False) -> List[Dict]:
+    """Compare this run's visual captures with the baselines; returns the regressions."""
+
+    captures = collect_run_captures()
+    if not captures:
+        print("Visual gate: no visual captures in this run, skipping")
+        return []
+
+    regressions = []
+    try:
+        import numpy  # noqa: F401
+        import PIL  # noqa: F401
+    except ImportError:
+        print("Visual gate: NumPy and Pillow are required, skipping comparison")
+    else:
+        start = time.time()
+        findings = compare_to_baselines(captures)
+        duration = time.time() - start
+
+        regressions = [f for f in findings if f["status"] in REGRESSION_STATUSES]
+        counts = {}
+        for f in findings:
+            counts[f["status"]] = counts.get(f["status"], 0) + 1
+
+        with open(VISUAL_GATE_REPORT_FILE, 'w') as f:
+            json.dump({
+                "compared": len(findings),
+                "duration_seconds": round(duration, 2),
+                "counts": counts,
+                "regressions": regressions,
+                "findings": findings,
+            }, f, indent=2)
+
+        print(f"Visual gate: {len(findings)} screenshots compared in {duration:.1f}s, "
+              f"{len(regressions)} regressions, {counts.get('new', 0)} without baseline")
+        for r in regressions:
+            if r["status"] == "changed":
+                print(f"  🖼️  {r['key']}: {r['changed_tiles']}/{r['total_tiles']} tiles changed "
+                      f"({r['diff_pixels']} px) → {r['heatmap']}")
+            elif r["status"] == "size_changed":
+                print(f"  🖼️  {r['key']}: size {r['baseline_size']} → {r['current_size']}")
+            else:
+                print(f"  🖼️  {r['key']}: capture file missing")
+
+    if update_baseline:
+        print(f"Visual gate: baselines updated → {save_baselines(captures)}")
+
+    return regressions
@@ -0,0 +1,365 @@
+"""
+In-process pytest workers for the orchestrator.
+
+Each worker is a process that starts pytest once: it collects the suite
+files a single time, keeps its session (browser pool, storage state,
+network cache) warm, and then runs whatever work items the orchestrator
+sends over its control queue. Results go back over a shared queue as
+soon as each item finishes; nothing is buffered through stdout.
+
+Like pytest-xdist, a worker holds one item in reserve: item N runs once
+item N+1 (or the shutdown signal) has arrived, so pytest knows the next
+item and tears down class/module fixtures correctly. Items are handed out
+per scenario (scheduler.ScenarioAffinity), so a worker runs a scenario's
+checks back to back on one class-scoped session.
+"""
+
+import os
+import queue
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+sys.path.insert(0, str(Path(__file__).parent))
+from config import PROJECT_ROOT, REPORTS_DIR, ITEM_TIMEOUT_S
+
+WORKER_LOGS_DIR = REPORTS_DIR / "workers"
+
+# Control channel: a node id to run, or None to finish and exit
+# Result channel: (kind, worker_id, payload) with kind "ready" | "started" | "result"
+
+
+class WorkerPlugin:
+    """Replaces pytest's run loop with items pulled from a control queue."""
+
+    def __init__(self, worker_id: int, control, results):
+        """Initialize plugin for one worker process."""
+        self.worker_id = worker_id
+        self.control = control
+        self.results = results
+        self._records = []
+
+    def _send(self, kind: str, payload=None) -> None:
+        self.results.put((kind, self.worker_id, payload))
+
+    def _run(self, item, nextitem) -> None:
+        from utils.result_stream import item_status
+        from utils.browser_pool import get_browser_pool
+
+        self._send("started", item.nodeid)
+        self._records.clear()
+        start = time.time()
+        contexts_before = get_browser_pool().contexts_created
+        item.config.hook.pytest_runtest_protocol(item=item, nextitem=nextitem)
+
+        failures = [r["message"] for r in self._records if r.get("message")]
+        self._send("result", {
+            "nodeid": item.nodeid,
+            "status": item_status(self._records),
+            "duration_seconds": time.time() - start,
+            "tests": list(self._records),
+            "error": failures[0] if failures else None,
+            # Lets the orchestrator recycle shared browser servers
+            "browser_contexts": get_browser_pool().contexts_created - contexts_before,
+        })
+
+    def pytest_runtestloop(self, session):
+        # Registered by conftest.py during configure
+        stream = session.config.pluginmanager.get_plugin("e2e_result_stream")
+        if stream is not None:
+            stream.on_record = self._records.append
+
+        items = {item.nodeid: item for item in session.items}
+        pending = None
+        self._send("ready")
+
+        while True:
+            nodeid = self.control.get()
+            if nodeid is not None and nodeid not in items:
+                self._send("result", {
+                    "nodeid": nodeid,
+                    "status": "error",
+                    "duration_seconds": 0.0,
+                    "tests": [],
+                    "error": "Not collected by this worker (collection error?)",
+                })
+                self._send("ready")
+                continue
+
+            nextitem = items.get(nodeid) if nodeid is not None else None
+            if pending is not None:
+                self._run(pending, nextitem)
+            if nextitem is None:
+                return True
+            pending = nextitem
+            self._send("ready")
+
+
+def redirect_output(worker_id: int, logs_dir: Path = WORKER_LOGS_DIR):
+    """Send a worker's stdout/stderr to its log file (returned)."""
+
+    # Per-test output is in the result records; the rest goes to a log
+    logs_dir.mkdir(parents=True, exist_ok=True)
+    log = open(logs_dir / f"worker_{worker_id}.log", 'w', buffering=1)
+    os.dup2(log.fileno(), sys.stdout.fileno())
+    os.dup2(log.fileno(), sys.stderr.fileno())
+    return log
+
+
+def worker_main(worker_id: int, test_files: List[str], control, results,
+                logs_dir: Path = WORKER_LOGS_DIR) -> None:
+    """Worker process entry point: one pytest session for many items."""
+
+    import pytest
+
+    log = redirect_output(worker_id, logs_dir)
+    os.chdir(PROJECT_ROOT)
+    exit_code = pytest.main(
+        [*test_files, "-q", "--tb=short", "-p", "no:cacheprovider"],
+        plugins=[WorkerPlugin(worker_id, control, results)],
+    )
+    log.flush()
+    sys.exit(int(exit_code))
+
+
+class WorkerPool:
+    """Runs work items on in-process pytest workers, streaming results."""
+
+    def __init__(self, num_workers: int, test_files: List[str],
+                 item_timeout: float = ITEM_TIMEOUT_S, logs_dir: Path = WORKER_LOGS_DIR,
+                 worker_target=worker_main):
+        """Initialize pool; workers are started by run().
+
+        ``worker_target`` is the worker process entry point; it takes the same
+        arguments as worker_main (async_engine.async_worker_main runs
+        several items at once).
+        """
+        import multiprocessing
+
+        # Spawned workers read E2E_AGENT_ID from the environment at import
+        self._mp = multiprocessing.get_context("spawn")
+        self.num_workers = num_workers
+        self.target = num_workers  # Workers to keep running; see resize()
+        self.test_files = list(test_files)
+        self.worker_target = worker_target
+        self.item_timeout = item_timeout
+        self.logs_dir = Path(logs_dir)
+        self._results = self._mp.Queue()
+        self._workers = {}  # worker id -> state
+        self.next_worker_id = 1  # Carried over when pools run one after another
+        self._startup_failed = False
+        self._items = {}  # node id -> item, for retries
+        self._affinity = None  # Set by run()
+        self._attempts = {}  # node id -> statuses of its attempts so far
+        self.respawned = 0
+        self.peak_workers = 0
+        self.worker_seconds = 0.0  # Summed lifetime of all workers
+
+    def _spawn(self) -> int:
+        worker_id = self.next_worker_id
+        self.next_worker_id += 1
+        control = self._mp.Queue()
+        os.environ["E2E_AGENT_ID"] = str(worker_id)
+        try:
+            process = self._mp.Process(
+                target=self.worker_target,
+                args=(worker_id, self.test_files, control, self._results, self.logs_dir),
+                name=f"worker-{worker_id}",
+                daemon=True,
+            )
+            process.start()
+        finally:
+            os.environ.pop("E2E_AGENT_ID", None)
+        self._workers[worker_id] = {
+            "process": process,
+            "control": control,
+            "assigned": [],  # Items sent, oldest first
+            "running": {},  # node id -> start time
+            "spawned_at": time.time(),
+            "completed": 0,
+            "ready": False,
+            "closing": False,
+        }
+        self.peak_workers = max(self.peak_workers, self._active())
+        return worker_id
+
+    def _active(self) -> int:
+        return sum(1 for state in self._workers.values() if not state["closing"])
+
+    def resize(self, target: int) -> None:
+        """Change the worker count; extra workers leave after their current item."""
+
+        self.target = max(1, target)
+
+    def busy_workers(self) -> int:
+        """Workers with an item running or in reserve."""
+
+        return sum(1 for state in self._workers.values() if state["assigned"])
+
+    def warm_worker_pids(self) -> List[int]:
+        """Pids of live workers that have finished at least one item."""
+
+        return [
+            state["process"].pid for state in self._workers.values()
+            if state["completed"] and state["process"].is_alive()
+        ]
+
+    @staticmethod
+    def _failed(item: Dict, worker_id: int, status: str, error: str, duration: float = 0.0) -> Dict:
+        return {
+            **item,
+            "worker": f"worker-{worker_id}",
+            "status": status,
+            "duration_seconds": duration,
+            "tests": [],
+            "error": error,
+        }
+
+    def _close(self, worker_id: int) -> None:
+        state = self._workers[worker_id]
+        self._affinity.release(worker_id)
+        if not state["closing"]:
+            state["closing"] = True
+            state["control"].put(None)
+
+    def _assign(self, worker_id: int, pending: List[Dict]) -> None:
+        state = self._workers[worker_id]
+        if state["closing"]:
+            return  # Already told to finish; anything sent now would be stranded
+        item = self._affinity.next_item(worker_id, pending) if self._active() <= self.target else None
+        if item is not None:
+            state["assigned"].append(item)
+            state["control"].put(item["nodeid"])
+        else:
+            # Out of (unclaimed) work, or the pool is shrinking: finish the reserve item and exit
+            self._close(worker_id)
+
+    def _top_up(self, pending: List[Dict]) -> None:
+        # A worker that never became ready means none will; do not loop
+        if self._startup_failed:
+            return
+        # A new worker needs a scenario nobody holds
+        free = self._affinity.free_scenarios(pending)
+        while free and self._active() < min(self.target, free + self.busy_workers()):
+            self._spawn()
+
+    def run(self, items: List[Dict], autoscaler=None, retry=None) -> Iterator[Dict]:
+        """Yield one result per item, in completion order.
+
+        With an autoscaler the worker count starts at its initial estimate
+        and is re-planned while the run progresses. With a retry policy,
+        items it accepts are re-queued and only their last attempt is
+        yielded; every result lists the statuses of its attempts.
+        """
+
+        from scheduler import ScenarioAffinity
+
+        pending = list(items)
+        self._items = {item["nodeid"]: item for item in items}
+        self._attempts = {}
+        self._affinity = ScenarioAffinity()
+        if autoscaler is not None:
+            self.resize(autoscaler.initial(len(pending)))
+        self._top_up(pending)
+
+        while self._workers:
+            try:
+                message = self._results.get(timeout=1.0)
+            except queue.Empty:
+                message = None
+            for result in self._collect(message, pending):
+                yield from self._finish(result, pending, retry)
+
+            if autoscaler is not None and pending:
+                target = autoscaler.adjust(self, len(pending))
+                if target is not None:
+                    self.resize(target)
+            self._top_up(pending)
+
+        # Nothing could run the rest (e.g. every worker failed to start)
+        for item in pending:
+            result = self._failed(item, 0, "error", f"No worker available (see {self.logs_dir})")
+            yield {**result, "attempts": self._attempts.get(item["nodeid"], []) + ["error"]}
+
+    def _collect(self, message, pending: List[Dict]) -> Iterator[Dict]:
+        if message is not None:
+            yield from self._handle(message, pending)
+        yield from self._reap(pending)
+
+    def _finish(self, result: Dict, pending: List[Dict], retry) -> Iterator[Dict]:
+        """Yield a finished attempt, or re-queue its item for another one."""
+
+        from flakes import finish_attempt
+
+        result, again = finish_attempt(result, self._attempts, retry)
+        item = self._items.get(result["nodeid"])
+        if again and item is not None:
+            pending.insert(0, item)  # Retried next, while the cause is fresh
+            return
+        yield result
+
+    def _handle(self, message, pending: List[Dict]) -> Iterator[Dict]:
+        kind, worker_id, payload = message
+        state = self._workers.get(worker_id)
+        if state is None:
+            return  # Late message from a worker that was already replaced
+
+        if kind == "ready":
+            state["ready"] = True
+            self._assign(worker_id, pending)
+        elif kind == "started":
+            state["running"][payload] = time.time()
+        elif kind == "result":
+            item = next(
+                (i for i in state["assigned"] if i["nodeid"] == payload["nodeid"]),
+                {"nodeid": payload["nodeid"]},
+            )
+            if item in state["assigned"]:
+                state["assigned"].remove(item)
+            state["running"].pop(payload["nodeid"], None)
+            state["completed"] += 1
+            yield {**item, **payload, "worker": f"worker-{worker_id}", "worker_id": worker_id}
+
+    def _reap(self, pending: List[Dict]) -> Iterator[Dict]:
+        """Handle hung and dead workers; run() replaces them while work remains."""
+
+        for worker_id, state in list(self._workers.items()):
+            process = state["process"]
+            now = time.time()
+            hung = {n for n, started in state["running"].items() if now - started > self.item_timeout}
+            if hung:
+                process.terminate()
+            elif process.is_alive():
+                continue
+            else:
+                # Results it sent before exiting are still queued
+                while True:
+                    try:
+                        message = self._results.get_nowait()
+                    except queue.Empty:
+                        break
+                    yield from self._handle(message, pending)
+
+            process.join()
+            del self._workers[worker_id]
+            self._affinity.release(worker_id)
+            self.worker_seconds += time.time() - state["spawned_at"]
+            requeue = []
+            for item in state["assigned"]:
+                started = state["running"].get(item["nodeid"])
+                if item["nodeid"] in hung:
+                    yield self._failed(item, worker_id, "timeout",
+                                       f"Item exceeded {self.item_timeout:.0f}s", now - started)
+                elif started is None or hung:
+                    # Never started (a reserve item), or cut short by a hung neighbour
+                    requeue.append(item)
+                else:
+                    yield self._failed(item, worker_id, "error",
+                                       f"Worker exited with code {process.exitcode}", now - started)
+            pending[:0] = requeue
+
+            if not state["ready"]:
+                self._startup_failed = True
+            elif pending and not state["closing"]:
+                self.respawned += 1